@@ -0,0 +1,56 @@
+# benchmarks/bench_orchestrator.py
+"""
+Time MainOrchestrator.process_query end to end against a recorded session, offline.
+
+Record once with live API keys (tool and LLM caches off, so latencies are cold-start):
+    LLM_CACHE_ENABLED=false ROUTE_CACHE_ENABLED=false python -m benchmarks.bench_orchestrator --record
+
+Then replay on any machine (dummy API keys are enough):
+    python -m benchmarks.bench_orchestrator [--cassette path] [--latency-scale 1.0] [--repeat 5]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from config import Config
+from src.orchestrator.main_orchestrator import MainOrchestrator
+from src.tools.record_replay import Cassette
+
+QUERY = "Plan a scenic trip from San Francisco to Los Angeles"
+ORIGIN = "San Francisco, CA, US"
+DESTINATION = "Los Angeles, CA, US"
+# A fixed departure day keeps the POI opening hours, and so the recorded requests, the same on every replay
+PREFERENCES = {"avoid_bad_weather": True, "include_pois": True, "departure_date": "2026-06-06"}
+
+async def run_once() -> float:
+    # A fresh orchestrator per run so tool caches don't carry over between runs
+    orchestrator = MainOrchestrator()
+    started = time.perf_counter()
+    await orchestrator.process_query(QUERY, ORIGIN, DESTINATION, PREFERENCES)
+    return time.perf_counter() - started
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cassette", default=Config.REPLAY_CASSETTE_PATH)
+    parser.add_argument("--record", action="store_true", help="call the live APIs and record the session")
+    parser.add_argument("--latency-scale", type=float, default=Config.REPLAY_LATENCY_SCALE, help="0 replays without delays")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.record:
+        with Cassette(args.cassette, mode="record").activate() as cassette:
+            elapsed = asyncio.run(run_once())
+        print(f"Recorded {cassette.recorded} calls to {args.cassette} in {elapsed:.2f}s")
+        return
+
+    timings = []
+    for _ in range(args.repeat):
+        cassette = Cassette(args.cassette, mode="replay", simulate_latency=args.latency_scale > 0, latency_scale=args.latency_scale)
+        with cassette.activate():
+            timings.append(asyncio.run(run_once()))
+    print(f"{args.repeat} replays of {args.cassette} at latency scale {args.latency_scale}")
+    print(f"{'min (s)':>10}{'median (s)':>12}{'max (s)':>10}")
+    print(f"{min(timings):>10.3f}{statistics.median(timings):>12.3f}{max(timings):>10.3f}")
+
+if __name__ == "__main__":
+    main()
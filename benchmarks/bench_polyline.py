@@ -0,0 +1,121 @@
+# benchmarks/bench_polyline.py
+"""
+Compare the NumPy polyline codec in src/tools/polyline.py against straightforward
+pure-Python implementations on a synthetic long route.
+
+Run from the project root:
+    python -m benchmarks.bench_polyline [--vertices 50000] [--target 500] [--repeat 5]
+"""
+import argparse
+import math
+import timeit
+import numpy as np
+from typing import List, Tuple
+from src.tools.polyline import EARTH_RADIUS_KM, cumulative_distances, decode_polyline, encode_polyline, simplify
+
+def reference_decode(encoded: str, precision: int = 5) -> List[Tuple[float, float]]:
+    factor = 10 ** precision
+    coordinates = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            result = shift = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coordinates.append((lat / factor, lng / factor))
+    return coordinates
+
+def reference_encode(points: List[Tuple[float, float]], precision: int = 5) -> str:
+    factor = 10 ** precision
+    output = []
+    previous_lat = previous_lng = 0
+    for lat, lng in points:
+        lat, lng = int(round(lat * factor)), int(round(lng * factor))
+        for delta in (lat - previous_lat, lng - previous_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                output.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            output.append(chr(value + 63))
+        previous_lat, previous_lng = lat, lng
+    return "".join(output)
+
+def reference_cumulative_distances(points: List[Tuple[float, float]]) -> List[float]:
+    distances = [0.0]
+    for (lat1, lng1), (lat2, lng2) in zip(points, points[1:]):
+        lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+        distances.append(distances[-1] + 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a))))
+    return distances
+
+def reference_douglas_peucker(points: List[Tuple[float, float]], epsilon: float) -> List[Tuple[float, float]]:
+    # Classic recursive Douglas-Peucker with a tolerance in degrees, for timing comparison
+    if len(points) < 3:
+        return list(points)
+    (x1, y1), (x2, y2) = points[0], points[-1]
+    dx, dy = x2 - x1, y2 - y1
+    norm = math.hypot(dx, dy) or 1e-12
+    farthest, max_distance = 0, -1.0
+    for index in range(1, len(points) - 1):
+        x, y = points[index]
+        distance = abs(dy * x - dx * y + x2 * y1 - y2 * x1) / norm
+        if distance > max_distance:
+            farthest, max_distance = index, distance
+    if max_distance <= epsilon:
+        return [points[0], points[-1]]
+    left = reference_douglas_peucker(points[:farthest + 1], epsilon)
+    return left[:-1] + reference_douglas_peucker(points[farthest:], epsilon)
+
+def synthetic_route(vertices: int, seed: int = 0) -> np.ndarray:
+    """
+    A wandering route of `vertices` points starting near San Francisco, rounded to polyline precision.
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.0005, (vertices, 2)) + [-0.0003, 0.0002]
+    return np.round(np.cumsum(steps, axis=0) + [37.77, -122.42], 5)
+
+def best_of(callable_, repeat: int) -> float:
+    return min(timeit.repeat(callable_, number=1, repeat=repeat))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vertices", type=int, default=50000)
+    parser.add_argument("--target", type=int, default=500, help="vertex count for simplification")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    points = synthetic_route(args.vertices)
+    point_list = [tuple(point) for point in points.tolist()]
+    encoded = encode_polyline(points)
+    assert encoded == reference_encode(point_list), "Encoders disagree"
+    assert np.allclose(decode_polyline(encoded), reference_decode(encoded)), "Decoders disagree"
+
+    cases = [
+        ("decode", lambda: reference_decode(encoded), lambda: decode_polyline(encoded)),
+        ("encode", lambda: reference_encode(point_list), lambda: encode_polyline(points)),
+        ("cumulative distance", lambda: reference_cumulative_distances(point_list), lambda: cumulative_distances(points)),
+        ("simplify (DP)", lambda: reference_douglas_peucker(point_list, 1e-3), lambda: simplify(points, args.target)),
+        ("simplify (Visvalingam)", None, lambda: simplify(points, args.target, method="visvalingam")),
+    ]
+    print(f"{args.vertices} vertices, {len(encoded)} encoded characters, best of {args.repeat}")
+    print(f"{'operation':<24}{'python (ms)':>14}{'numpy (ms)':>14}{'speedup':>10}")
+    for name, reference, vectorized in cases:
+        numpy_ms = best_of(vectorized, args.repeat) * 1000
+        if reference is None:
+            print(f"{name:<24}{'-':>14}{numpy_ms:>14.1f}{'-':>10}")
+            continue
+        python_ms = best_of(reference, args.repeat) * 1000
+        print(f"{name:<24}{python_ms:>14.1f}{numpy_ms:>14.1f}{python_ms / numpy_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
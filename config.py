@@ -9,6 +9,134 @@ class Config:
     OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHERMAP_API_KEY")
     MODEL_NAME =  "gemini-2.0-flash-lite" # "gemini-1.5-flash"
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    # Per-task model routing; each task defaults to MODEL_NAME
+    MODEL_ROUTES = {
+        "planner": os.getenv("PLANNER_MODEL_NAME", MODEL_NAME),
+        "optimizer": os.getenv("OPTIMIZER_MODEL_NAME", MODEL_NAME),
+        "reporter": os.getenv("REPORTER_MODEL_NAME", MODEL_NAME),
+        "critique": os.getenv("CRITIQUE_MODEL_NAME", MODEL_NAME),
+    }
+    # Faster model raced against a task's model once its latency budget (seconds) is spent; 0 disables
+    FALLBACK_MODEL_NAME = os.getenv("FALLBACK_MODEL_NAME", "gemini-2.0-flash-lite")
+    STAGE_LATENCY_BUDGETS = {
+        task: float(os.getenv(f"{task.upper()}_LATENCY_BUDGET_SECONDS", "0"))
+        for task in ("planner", "optimizer", "reporter", "critique")
+    }
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+
+    # LLM response cache (in-memory LRU in front of a SQLite file)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+    LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "5000"))
+    LLM_CACHE_DISK_MAX_BYTES = int(os.getenv("LLM_CACHE_DISK_MAX_BYTES", str(50 * 1024 * 1024)))
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_responses.sqlite3"))
+
+    # Upper bound on distinct shared LLM clients (one per model/settings combination)
+    LLM_MAX_CLIENTS = int(os.getenv("LLM_MAX_CLIENTS", "4"))
+
+    # Client-side rate limiting for Gemini calls (per model)
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+    LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+    LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+
+    # Opt-in hedged requests: duplicate a call that runs past the given latency percentile
+    LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+    # Route digest shipped to the prompts
+    ROUTE_DIGEST_TOKEN_BUDGET = int(os.getenv("ROUTE_DIGEST_TOKEN_BUDGET", "300"))
+    ROUTE_DIGEST_MAX_WAYPOINTS = int(os.getenv("ROUTE_DIGEST_MAX_WAYPOINTS", "12"))
+
+    # Pooled async HTTP client used by the REST tools
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "50"))
+    HTTP_POOL_SIZE_PER_HOST = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "20"))
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+    HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+
+    # Weather cache (keys are normalized city strings)
+    WEATHER_CACHE_TTL_SECONDS = float(os.getenv("WEATHER_CACHE_TTL_SECONDS", "900"))
+    WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "1024"))
+    WEATHER_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("WEATHER_NEGATIVE_CACHE_TTL_SECONDS", "120"))
+    # Batched lookups: ids per group request and concurrent single lookups
+    WEATHER_GROUP_CHUNK_SIZE = int(os.getenv("WEATHER_GROUP_CHUNK_SIZE", "20"))
+    WEATHER_MAX_CONCURRENCY = int(os.getenv("WEATHER_MAX_CONCURRENCY", "8"))
+    # Weather sampled along the route: every N km (or N minutes of driving when set), snapped to a
+    # coarse grid (0.25 degrees is roughly 25 km) so nearby samples share one lookup
+    ROUTE_WEATHER_ENABLED = os.getenv("ROUTE_WEATHER_ENABLED", "true").lower() == "true"
+    ROUTE_WEATHER_SPACING_KM = float(os.getenv("ROUTE_WEATHER_SPACING_KM", "50"))
+    ROUTE_WEATHER_SPACING_MINUTES = float(os.getenv("ROUTE_WEATHER_SPACING_MINUTES", "0"))
+    ROUTE_WEATHER_GRID_DEGREES = float(os.getenv("ROUTE_WEATHER_GRID_DEGREES", "0.25"))
+    ROUTE_WEATHER_MAX_SAMPLES = int(os.getenv("ROUTE_WEATHER_MAX_SAMPLES", "12"))
+
+    # Route cache: routes between the same places are stable, so they are kept for a day by default.
+    # Traffic-aware routing reflects live conditions and bypasses the cache.
+    ROUTE_CACHE_ENABLED = os.getenv("ROUTE_CACHE_ENABLED", "true").lower() == "true"
+    ROUTE_CACHE_TTL_SECONDS = float(os.getenv("ROUTE_CACHE_TTL_SECONDS", "86400"))
+    ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "256"))
+    ROUTE_CACHE_DISK_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_DISK_MAX_ENTRIES", "5000"))
+    ROUTE_CACHE_PATH = os.getenv("ROUTE_CACHE_PATH", os.path.join(CACHE_DIR, "routes.sqlite3"))
+    ROUTE_TRAFFIC_AWARE = os.getenv("ROUTE_TRAFFIC_AWARE", "false").lower() == "true"
+    # Routes API async client: concurrent requests on the shared channel and startup warm-up budget
+    ROUTES_MAX_CONCURRENCY = int(os.getenv("ROUTES_MAX_CONCURRENCY", "10"))
+    ROUTES_WARMUP_TIMEOUT_SECONDS = float(os.getenv("ROUTES_WARMUP_TIMEOUT_SECONDS", "5"))
+    # Route matrix request limits (Routes API: 625 elements and 50 address waypoints per request)
+    ROUTE_MATRIX_MAX_ELEMENTS = int(os.getenv("ROUTE_MATRIX_MAX_ELEMENTS", "625"))
+    ROUTE_MATRIX_MAX_WAYPOINTS = int(os.getenv("ROUTE_MATRIX_MAX_WAYPOINTS", "50"))
+
+    # Local stop-ordering solver for the plan's points of interest
+    STOP_ORDERING_ENABLED = os.getenv("STOP_ORDERING_ENABLED", "true").lower() == "true"
+    STOP_ORDERING_TIME_BUDGET_SECONDS = float(os.getenv("STOP_ORDERING_TIME_BUDGET_SECONDS", "0.05"))
+    STOP_DWELL_MINUTES = float(os.getenv("STOP_DWELL_MINUTES", "45"))
+    TRIP_DEPARTURE_TIME = os.getenv("TRIP_DEPARTURE_TIME", "09:00")
+
+    # Points of interest along the route (Google Places Text Search behind a local geohash index)
+    POI_SEARCH_ENABLED = os.getenv("POI_SEARCH_ENABLED", "true").lower() == "true"
+    POI_SEARCH_QUERY = os.getenv("POI_SEARCH_QUERY", "tourist attractions")
+    POI_GEOHASH_PRECISION = int(os.getenv("POI_GEOHASH_PRECISION", "3"))
+    POI_CORRIDOR_KM = float(os.getenv("POI_CORRIDOR_KM", "25"))
+    POI_MAX_RESULTS = int(os.getenv("POI_MAX_RESULTS", "8"))
+    POI_MAX_CONCURRENCY = int(os.getenv("POI_MAX_CONCURRENCY", "8"))
+    POI_CACHE_TTL_SECONDS = float(os.getenv("POI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    POI_INDEX_PATH = os.getenv("POI_INDEX_PATH", os.path.join(CACHE_DIR, "poi_index.json"))
+    # How long the planner waits for the route before searching the straight origin-destination corridor
+    POI_ROUTE_WAIT_SECONDS = float(os.getenv("POI_ROUTE_WAIT_SECONDS", "0.5"))
+    # How long the planner waits for Places when the index misses; the search finishes in the background
+    POI_TIMEOUT_SECONDS = float(os.getenv("POI_TIMEOUT_SECONDS", "1"))
+
+    # Local gazetteer for resolving place strings before any network call
+    GAZETTEER_ENABLED = os.getenv("GAZETTEER_ENABLED", "true").lower() == "true"
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH")
+
+    # Circuit breakers per dependency: open after this many consecutive failures or SLO-busting calls
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+    # Latency SLOs; a slower call is answered with the last known good value while it finishes in the background
+    WEATHER_LATENCY_SLO_SECONDS = float(os.getenv("WEATHER_LATENCY_SLO_SECONDS", "2"))
+    ROUTE_LATENCY_SLO_SECONDS = float(os.getenv("ROUTE_LATENCY_SLO_SECONDS", "4"))
+    # How long last known good values stay available as stale fallbacks
+    WEATHER_STALE_TTL_SECONDS = float(os.getenv("WEATHER_STALE_TTL_SECONDS", str(6 * 3600)))
+    ROUTE_STALE_TTL_SECONDS = float(os.getenv("ROUTE_STALE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+    # Per-call timeouts for the optimizer's tool fan-out
+    ROUTE_TIMEOUT_SECONDS = float(os.getenv("ROUTE_TIMEOUT_SECONDS", "15"))
+    WEATHER_TIMEOUT_SECONDS = float(os.getenv("WEATHER_TIMEOUT_SECONDS", "8"))
+    # Overall budget for one process_query call; pending stages are cancelled when it runs out (0 = no limit)
+    REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "0"))
+
+    # Prompt variants evaluated at once by EvaluationScript.run_evaluation
+    EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "3"))
+
+    # Record/replay of external calls for offline benchmarks ("off", "record" or "replay")
+    REPLAY_MODE = os.getenv("REPLAY_MODE", "off").lower()
+    REPLAY_CASSETTE_PATH = os.getenv("REPLAY_CASSETTE_PATH", os.path.join(CACHE_DIR, "session.jsonl.gz"))
+    REPLAY_SIMULATE_LATENCY = os.getenv("REPLAY_SIMULATE_LATENCY", "true").lower() == "true"
+    REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "1.0"))
 
     @staticmethod
     def validate():
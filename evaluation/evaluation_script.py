@@ -1,12 +1,15 @@
 # evaluation/evaluation_script.py
 from src.orchestrator.main_orchestrator import MainOrchestrator
 from src.prompts.planner_prompts import PLANNER_PROMPT_CASUAL, PLANNER_PROMPT_PRECISE, PLANNER_PROMPT_SCENIC
-from src.llm_integration.llm_client import LLMClient
+from src.llm_integration.model_router import get_model_router
 from src.prompts.llm_critique_prompts import CRITIQUE_PROMPT
 from evaluation.metrics import compute_average_scores, find_best_prompt
+from config import Config
+import asyncio
 import json
 import logging
-from typing import Dict, List, Tuple, Optional
+from functools import partial
+from typing import Callable, Dict, List, Tuple, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,91 +17,57 @@ logger = logging.getLogger(__name__)
 class EvaluationScript:
     def __init__(self):
         self.orchestrator = MainOrchestrator()
-        self.llm_client = LLMClient()
+        self.model_router = get_model_router()
+        self.llm_client = self.model_router.client_for("critique")
 
-    async def run_evaluation(self, query: str, origin: str, destination: str, preferences: dict, refinement: str = None, prior_itinerary: dict = None) -> Tuple[Optional[dict], List[dict]]:
+    async def run_evaluation(self, query: str, origin: str, destination: str, preferences: dict, refinement: str = None, prior_itinerary: dict = None, on_token: Optional[Callable[[str, str], None]] = None) -> Tuple[Optional[dict], List[dict]]:
+        """
+        Plan the trip with each planner prompt variant and critique the resulting itineraries.
+
+        Route and weather are fetched once and shared by every variant, so the variants are
+        compared on identical inputs; each variant waits only for the parts it needs next (its
+        POI search and planner for the route alone). Variants run concurrently, at most
+        Config.EVAL_CONCURRENCY at a time; a failing variant is recorded as an error result
+        without cancelling the others. A failed shared route is not refetched per variant: the
+        route is required, so every variant records that same error.
+
+        Returns:
+            The itinerary of the last variant (in prompt order) that produced one, and one
+            result per variant in prompt order.
+        """
+        results = []
         try:
             if not query:
                 raise ValueError("Query parameter is required and cannot be empty")
             logger.info(f"Starting evaluation with query: {query}")
-            
-            results = []
+
             prompt_types = {
                 "casual": PLANNER_PROMPT_CASUAL,
                 "precise": PLANNER_PROMPT_PRECISE,
                 "scenic": PLANNER_PROMPT_SCENIC
             }
-            itinerary = None
-
-            for prompt_name, planner_prompt in prompt_types.items():
-                try:
-                    logger.info(f"Evaluating prompt: {prompt_name}")
-                    itinerary = await self.orchestrator.process_query(
-                        query=query,
-                        origin=origin,
-                        destination=destination,
-                        preferences=preferences,
-                        planner_prompt=planner_prompt,
+            tool_data = self.orchestrator.optimizer.start_tool_data(origin, destination)
+            semaphore = asyncio.Semaphore(max(1, Config.EVAL_CONCURRENCY))
+
+            async def evaluate(prompt_name: str, planner_prompt: str) -> Tuple[Optional[dict], dict]:
+                async with semaphore:
+                    return await self.evaluate_prompt(
+                        prompt_name, planner_prompt, query, origin, destination, preferences,
                         refinement=refinement,
-                        prior_itinerary=prior_itinerary
+                        prior_itinerary=prior_itinerary,
+                        on_token=partial(on_token, prompt_name) if on_token else None,
+                        tool_data=tool_data
                     )
 
-                    # Extract final_itinerary string from dictionary
-                    final_itinerary = itinerary.get("final_itinerary")
-                    if not isinstance(final_itinerary, str):
-                        logger.error(f"Invalid final_itinerary type: {type(final_itinerary)}")
-                        results.append({
-                            "prompt": prompt_name,
-                            "error": f"Invalid final_itinerary format: expected str, got {type(final_itinerary)}"
-                        })
-                        continue
-
-                    critique_prompt = CRITIQUE_PROMPT.format(
-                        query=query,
-                        origin=origin,
-                        destination=destination,
-                        preferences=preferences,
-                        itinerary=final_itinerary
-                    )
-                    critique_response = await self.llm_client.generate(critique_prompt)
-
-                    try:
-                        critique_json = json.loads(critique_response)
-                        route_feasibility = float(critique_json.get("route_feasibility", 0))
-                        constraint_satisfaction = float(critique_json.get("constraint_satisfaction", 0))
-                        response_quality = float(critique_json.get("response_quality", 0))
-                        total = (route_feasibility + constraint_satisfaction + response_quality) / 3
-                        result = {
-                            "prompt": prompt_name,
-                            "route_feasibility": route_feasibility,
-                            "constraint_satisfaction": constraint_satisfaction,
-                            "response_quality": response_quality,
-                            "total": total,
-                            "comments": critique_json.get("comments", "")
-                        }
-                    except (json.JSONDecodeError, ValueError) as e:
-                        logger.error(f"Failed to parse critique response for {prompt_name}: {str(e)}")
-                        result = {
-                            "prompt": prompt_name,
-                            "route_feasibility": 0.0,
-                            "constraint_satisfaction": 0.0,
-                            "response_quality": 0.0,
-                            "total": 0.0,
-                            "error": f"Failed to parse critique response: {str(e)}"
-                        }
-
-                    results.append(result)
-                    logger.info(f"Evaluation result for {prompt_name}: {result}")
-                except Exception as e:
-                    logger.error(f"Evaluation error for {prompt_name}: {str(e)}")
-                    results.append({
-                        "prompt": prompt_name,
-                        "route_feasibility": 0.0,
-                        "constraint_satisfaction": 0.0,
-                        "response_quality": 0.0,
-                        "total": 0.0,
-                        "error": str(e)
-                    })
+            try:
+                # gather keeps prompt order regardless of which variant finishes first
+                outcomes = await asyncio.gather(*(evaluate(name, prompt) for name, prompt in prompt_types.items()))
+            finally:
+                # No-op once fetched; stops the shared lookups if the evaluation is cancelled
+                for future in tool_data.values():
+                    future.cancel()
+            results = [result for _, result in outcomes]
+            itinerary = next((itinerary for itinerary, _ in reversed(outcomes) if itinerary is not None), None)
 
             avg_scores = compute_average_scores(results)
             best_prompt = find_best_prompt(results)
@@ -108,4 +77,84 @@ class EvaluationScript:
             return itinerary or {}, results
         except Exception as e:
             logger.error(f"Evaluation script error: {str(e)}")
-            return {}, results
\ No newline at end of file
+            return {}, results
+
+    async def evaluate_prompt(self, prompt_name: str, planner_prompt: str, query: str, origin: str, destination: str, preferences: dict, refinement: str = None, prior_itinerary: dict = None, on_token: Optional[Callable[[str], None]] = None, tool_data: Optional[dict] = None) -> Tuple[Optional[dict], dict]:
+        """
+        Run one prompt variant through the orchestrator and critique its itinerary.
+
+        Errors are caught and returned as a zero-score result, so one variant can't fail the evaluation.
+
+        Returns:
+            The itinerary (None if planning failed) and the variant's result.
+        """
+        itinerary = None
+        try:
+            logger.info(f"Evaluating prompt: {prompt_name}")
+            itinerary = await self.orchestrator.process_query(
+                query=query,
+                origin=origin,
+                destination=destination,
+                preferences=preferences,
+                planner_prompt=planner_prompt,
+                refinement=refinement,
+                prior_itinerary=prior_itinerary,
+                on_token=on_token,
+                tool_data=tool_data
+            )
+
+            # Extract final_itinerary string from dictionary
+            final_itinerary = itinerary.get("final_itinerary")
+            if not isinstance(final_itinerary, str):
+                logger.error(f"Invalid final_itinerary type: {type(final_itinerary)}")
+                return itinerary, {
+                    "prompt": prompt_name,
+                    "error": f"Invalid final_itinerary format: expected str, got {type(final_itinerary)}"
+                }
+
+            critique_prompt = CRITIQUE_PROMPT.format(
+                query=query,
+                origin=origin,
+                destination=destination,
+                preferences=preferences,
+                itinerary=final_itinerary
+            )
+            critique_response = await self.model_router.generate("critique", critique_prompt, client=self.llm_client)
+
+            try:
+                critique_json = json.loads(critique_response)
+                route_feasibility = float(critique_json.get("route_feasibility", 0))
+                constraint_satisfaction = float(critique_json.get("constraint_satisfaction", 0))
+                response_quality = float(critique_json.get("response_quality", 0))
+                total = (route_feasibility + constraint_satisfaction + response_quality) / 3
+                result = {
+                    "prompt": prompt_name,
+                    "route_feasibility": route_feasibility,
+                    "constraint_satisfaction": constraint_satisfaction,
+                    "response_quality": response_quality,
+                    "total": total,
+                    "comments": critique_json.get("comments", "")
+                }
+            except (json.JSONDecodeError, ValueError) as e:
+                logger.error(f"Failed to parse critique response for {prompt_name}: {str(e)}")
+                result = {
+                    "prompt": prompt_name,
+                    "route_feasibility": 0.0,
+                    "constraint_satisfaction": 0.0,
+                    "response_quality": 0.0,
+                    "total": 0.0,
+                    "error": f"Failed to parse critique response: {str(e)}"
+                }
+
+            logger.info(f"Evaluation result for {prompt_name}: {result}")
+            return itinerary, result
+        except Exception as e:
+            logger.error(f"Evaluation error for {prompt_name}: {str(e)}")
+            return itinerary, {
+                "prompt": prompt_name,
+                "route_feasibility": 0.0,
+                "constraint_satisfaction": 0.0,
+                "response_quality": 0.0,
+                "total": 0.0,
+                "error": str(e)
+            }
\ No newline at end of file
@@ -1,15 +1,19 @@
 # src/agents/base_agent.py
 from abc import ABC, abstractmethod
-from src.llm_integration.llm_client import LLMClient
+from src.llm_integration.model_router import get_model_router
 import logging
-from typing import Union
+from typing import AsyncIterator, Union
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class BaseAgent(ABC):
+    # Routing key for ModelRouter; subclasses set it to pick their model and latency budget
+    task = None
+
     def __init__(self):
-        self.llm_client = LLMClient()
+        self.model_router = get_model_router()
+        self.llm_client = self.model_router.client_for(self.task)
 
     @abstractmethod
     async def process(self, input_data: dict) -> Union[dict, str]:
@@ -17,7 +21,15 @@ class BaseAgent(ABC):
 
     async def generate_response(self, prompt: str) -> str:
         try:
-            return await self.llm_client.generate(prompt)
+            return await self.model_router.generate(self.task, prompt, client=self.llm_client)
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
+            raise
+
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        try:
+            async for chunk in self.model_router.stream(self.task, prompt, client=self.llm_client):
+                yield chunk
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
             raise
\ No newline at end of file
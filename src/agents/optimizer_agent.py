@@ -3,15 +3,26 @@ from src.agents.base_agent import BaseAgent
 from src.tools.google_maps_tool import GoogleMapsTool
 from src.tools.openweathermap_tool import OpenWeatherMapTool
 from src.prompts.optimizer_prompts import OPTIMIZER_PROMPT
+from src.prompts.compaction import CompactionReport, compact_route, compact_weather
+from src.tools.polyline import decode_polyline, sample_by_distance, snap_to_grid
+from src.tools.stop_ordering import order_stops, parse_opening_hours, parse_time_of_day
+from config import Config
+import asyncio
+import json
 import logging
+import re
 import traceback
+import numpy as np
 from datetime import timedelta
 from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class OptimizerAgent(BaseAgent):
+    task = "optimizer"
+
     def __init__(self):
         super().__init__()
         self.maps_tool = GoogleMapsTool()
@@ -43,29 +54,32 @@ class OptimizerAgent(BaseAgent):
             logger.info(f"Optimizer input - destination: {destination} (type: {type(destination)})")
             logger.info(f"Optimizer input - preferences: {preferences}")
 
-            route_data = await self.maps_tool.get_directions(origin, destination)
-            # Convert route_data to serializable format
-            if route_data:
-                route_data = self._serialize_route_data(route_data)
-            logger.info(f"Serialized route data: {route_data}")
-
-            logger.info(f"Fetching weather for origin: {origin}")
-            origin_weather_data = await self.weather_tool.get_weather_forecast(origin)
-            # Serialize weather data
-            origin_weather_data = self._serialize_route_data(origin_weather_data)
-            logger.info(f"Serialized origin weather data: {origin_weather_data}")
+            prefetched_keys = ("route_data", "weather_origin", "weather_destination")
+            if all(input_data.get(key) for key in prefetched_keys):
+                logger.info("Using prefetched route and weather data")
+                tool_data = {key: input_data[key] for key in prefetched_keys}
+            else:
+                report = CompactionReport()
+                tool_data = await self.fetch_tool_data(origin, destination, report=report)
+                logger.info(f"Compaction report: {report.summary()}")
+            route_weather = input_data.get("route_weather", tool_data.get("route_weather"))
+            if route_weather is None:
+                route_weather = await self.fetch_route_weather(tool_data["route_data"])
+            # Sample points were only needed for the along-route weather lookups
+            route_data = {key: value for key, value in tool_data["route_data"].items() if key != "sample_points"}
+            origin_weather_data = tool_data["weather_origin"]
+            destination_weather_data = tool_data["weather_destination"]
 
-            logger.info(f"Fetching weather for destination: {destination}")
-            destination_weather_data = await self.weather_tool.get_weather_forecast(destination)
-            # Serialize weather data
-            destination_weather_data = self._serialize_route_data(destination_weather_data)
-            logger.info(f"Serialized destination weather data: {destination_weather_data}")
+            # Order the plan's stops locally so the LLM doesn't have to
+            ordered_stops = await self.order_plan_stops(initial_plan, origin, destination, preferences)
 
             prompt = OPTIMIZER_PROMPT.format(
                 initial_plan=initial_plan,
                 route_data=route_data,
                 weather_origin = origin_weather_data,
                 weather_destination = destination_weather_data,
+                route_weather = route_weather,
+                ordered_stops = ordered_stops if ordered_stops else "Not available; order the stops sensibly along the route.",
                 preferences=preferences
             )
             optimized_plan = await self.generate_response(prompt)
@@ -74,7 +88,9 @@ class OptimizerAgent(BaseAgent):
                 "optimized_plan": optimized_plan,
                 "route_data": route_data,
                 "weather_origin": origin_weather_data,
-                "weather_destination": destination_weather_data
+                "weather_destination": destination_weather_data,
+                "route_weather": route_weather,
+                "ordered_stops": ordered_stops
             }
             logger.info(f"Optimizer output: {result}")
             return result
@@ -82,6 +98,222 @@ class OptimizerAgent(BaseAgent):
             logger.error(f"OptimizerAgent error: {str(e)}\nTraceback: {traceback.format_exc()}")
             raise
 
+    async def fetch_route(self, origin: str, destination: str, report: Optional[CompactionReport] = None) -> dict:
+        """
+        Fetch the route, bounded by Config.ROUTE_TIMEOUT_SECONDS, and compact it into a prompt-ready digest.
+
+        Raises:
+            asyncio.TimeoutError or the tool's error; the route is required for optimization.
+        """
+        route_data = await asyncio.wait_for(
+            self.maps_tool.get_directions(origin, destination),
+            timeout=Config.ROUTE_TIMEOUT_SECONDS
+        )
+        # Compact before serializing so the raw protobuf route is never walked or shipped
+        if route_data:
+            encoded = route_data.get("overall_polyline")
+            route_data = self._serialize_route_data(compact_route(route_data, report=report))
+            if Config.ROUTE_WEATHER_ENABLED and encoded:
+                route_data["sample_points"] = self._route_sample_points(encoded, route_data)
+        logger.info(f"Serialized route data: {route_data}")
+        return route_data
+
+    async def fetch_endpoint_weather(self, origin: str, destination: str, report: Optional[CompactionReport] = None) -> Tuple[dict, dict]:
+        """
+        Fetch and serialize the weather for the origin and destination in one batched lookup (a
+        single group request when both are in the gazetteer), bounded by Config.WEATHER_TIMEOUT_SECONDS.
+
+        Weather is optional: a city whose lookup fails or times out gets a placeholder marked
+        `unavailable` so the plan can still be optimized and the prompts can note the missing data.
+
+        Returns:
+            (origin weather, destination weather).
+        """
+        cities = (origin, destination)
+        reason = "lookup failed"
+        try:
+            logger.info(f"Fetching weather for: {origin} and {destination}")
+            results = await asyncio.wait_for(self.weather_tool.get_weather_many(list(cities)), timeout=Config.WEATHER_TIMEOUT_SECONDS)
+        except Exception as e:
+            reason = str(e) or type(e).__name__
+            results = [None, None]
+        weather = []
+        for city, stage, weather_data in zip(cities, ("weather_origin", "weather_destination"), results):
+            if weather_data is None:
+                logger.warning(f"Weather unavailable for '{city}', continuing without it: {reason}")
+                weather.append({"city": city, "unavailable": True, "error": reason})
+                continue
+            weather_data = self._serialize_route_data(compact_weather(weather_data, report=report, stage=stage))
+            logger.info(f"Serialized weather data for {city}: {weather_data}")
+            weather.append(weather_data)
+        return weather[0], weather[1]
+
+    def _extract_stops(self, initial_plan) -> List[dict]:
+        """
+        Points of interest from the planner's JSON plan, as dicts with `name` and, when the
+        plan gives them, `opening_hours` and `visit_minutes`. Returns [] if the plan isn't JSON.
+        """
+        plan = initial_plan
+        if isinstance(plan, str):
+            match = re.search(r"\{.*\}", plan, flags=re.DOTALL)
+            try:
+                plan = json.loads(match.group(0)) if match else None
+            except json.JSONDecodeError:
+                plan = None
+        if not isinstance(plan, dict):
+            return []
+        stops = []
+        for item in plan.get("points_of_interest") or []:
+            if isinstance(item, str):
+                stops.append({"name": item})
+            elif isinstance(item, dict):
+                name = next((item[key] for key in ("name", "title", "poi", "location", "stop") if item.get(key)), None)
+                if name:
+                    stops.append({
+                        "name": str(name),
+                        "opening_hours": item.get("opening_hours") or item.get("hours"),
+                        "visit_minutes": item.get("visit_minutes") or item.get("duration_minutes")
+                    })
+        return stops
+
+    async def order_plan_stops(self, initial_plan, origin: str, destination: str, preferences: Optional[dict] = None) -> Optional[List[dict]]:
+        """
+        Visiting order for the plan's points of interest, from a driving-time matrix and the local solver.
+
+        Stops are visited between origin and destination, staying `visit_minutes` (or
+        Config.STOP_DWELL_MINUTES) at each; opening hours become time windows relative to the
+        departure time (preferences["departure_time"] or Config.TRIP_DEPARTURE_TIME).
+
+        Returns:
+            Ordered list of {"name", "drive_min"} dicts (drive time from the previous stop), or None
+            when there is nothing to order or the matrix is unavailable.
+        """
+        stops = self._extract_stops(initial_plan)
+        if not Config.STOP_ORDERING_ENABLED or len(stops) < 2:
+            return None
+        places = [origin] + [stop["name"] for stop in stops] + [destination]
+        try:
+            matrix = await asyncio.wait_for(
+                # Stop names are points of interest, not cities: keep them out of the city gazetteer
+                self.maps_tool.get_route_matrix(places, places, addresses=places[1:-1]),
+                timeout=Config.ROUTE_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Route matrix unavailable, leaving stop order to the LLM: {str(e) or type(e).__name__}")
+            return None
+
+        departure_min = parse_time_of_day((preferences or {}).get("departure_time") or Config.TRIP_DEPARTURE_TIME) or 0
+        windows = [None]
+        for stop in stops:
+            hours = parse_opening_hours(stop.get("opening_hours"))
+            windows.append(((hours[0] - departure_min) * 60, (hours[1] - departure_min) * 60) if hours else None)
+        windows.append(None)
+        dwell = [0.0] + [float(stop.get("visit_minutes") or Config.STOP_DWELL_MINUTES) * 60 for stop in stops] + [0.0]
+
+        result = order_stops(matrix.durations_s, dwell_s=dwell, windows_s=windows, time_budget_s=Config.STOP_ORDERING_TIME_BUDGET_SECONDS)
+        ordered = [
+            {"name": places[current], "drive_min": round(float(matrix.durations_s[previous, current]) / 60)
+                if not np.isnan(matrix.durations_s[previous, current]) else None}
+            for previous, current in zip(result.order, result.order[1:-1])
+        ]
+        logger.info(f"Stop order: {[stop['name'] for stop in ordered]} ({result.duration_s / 3600:.1f} h, {result.lateness_s / 60:.0f} min late)")
+        return ordered
+
+    def _route_sample_points(self, encoded: str, route_digest: dict) -> list:
+        """
+        Grid cells along the route where weather should be sampled, in driving order.
+
+        Samples are spaced Config.ROUTE_WEATHER_SPACING_KM apart, or Config.ROUTE_WEATHER_SPACING_MINUTES
+        of driving when set (converted with the route's average speed).
+        """
+        try:
+            points = decode_polyline(encoded)
+        except ValueError as e:
+            logger.warning(f"Could not decode route polyline, skipping along-route weather: {str(e)}")
+            return []
+        spacing_km = Config.ROUTE_WEATHER_SPACING_KM
+        distance_km = route_digest.get("distance_km")
+        duration_min = route_digest.get("duration_min")
+        if Config.ROUTE_WEATHER_SPACING_MINUTES > 0 and distance_km and duration_min:
+            spacing_km = distance_km * Config.ROUTE_WEATHER_SPACING_MINUTES / duration_min
+        samples = sample_by_distance(points, spacing_km, max_samples=Config.ROUTE_WEATHER_MAX_SAMPLES)
+        return snap_to_grid(samples, Config.ROUTE_WEATHER_GRID_DEGREES).tolist()
+
+    async def fetch_route_weather(self, route_data: Optional[dict], report: Optional[CompactionReport] = None) -> list:
+        """
+        Fetch weather for the route's sample points concurrently (at most Config.WEATHER_MAX_CONCURRENCY at once).
+
+        Like endpoint weather this is optional: failed points are marked `unavailable`.
+
+        Returns:
+            One compacted weather dictionary per sample point, in driving order.
+        """
+        points = (route_data or {}).get("sample_points") or []
+        if not points:
+            return []
+        semaphore = asyncio.Semaphore(Config.WEATHER_MAX_CONCURRENCY)
+
+        async def fetch_point(lat: float, lon: float) -> dict:
+            async with semaphore:
+                try:
+                    weather = await asyncio.wait_for(
+                        self.weather_tool.get_weather_by_coordinates(lat, lon),
+                        timeout=Config.WEATHER_TIMEOUT_SECONDS
+                    )
+                    return weather
+                except Exception as e:
+                    logger.warning(f"Weather unavailable at ({lat}, {lon}): {str(e) or type(e).__name__}")
+                    return {"lat": lat, "lon": lon, "unavailable": True}
+
+        raw_weather = await asyncio.gather(*(fetch_point(lat, lon) for lat, lon in points))
+        route_weather = [compact_weather(weather) for weather in raw_weather]
+        if report is not None:
+            report.record("route_weather", raw_weather, route_weather)
+        logger.info(f"Fetched weather at {len(route_weather)} points along the route")
+        return route_weather
+
+    def start_tool_data(self, origin: str, destination: str, report: Optional[CompactionReport] = None) -> Dict[str, asyncio.Future]:
+        """
+        Start fetching the route and the origin/destination weather (one batched lookup) concurrently,
+        compacted for the prompts. Weather along the route follows as soon as the route is in.
+
+        Returns:
+            One future per key (`route_data`, `weather_origin`, `weather_destination`, `route_weather`),
+            so consumers can wait for just the parts they need. The caller owns the futures.
+        """
+        route = asyncio.ensure_future(self.fetch_route(origin, destination, report=report))
+        endpoints = asyncio.ensure_future(self.fetch_endpoint_weather(origin, destination, report=report))
+
+        async def fetch_route_weather() -> list:
+            return await self.fetch_route_weather(await asyncio.shield(route), report=report)
+
+        async def endpoint_weather(index: int) -> dict:
+            return (await endpoints)[index]
+
+        return {
+            "route_data": route,
+            "weather_origin": asyncio.ensure_future(endpoint_weather(0)),
+            "weather_destination": asyncio.ensure_future(endpoint_weather(1)),
+            "route_weather": asyncio.ensure_future(fetch_route_weather())
+        }
+
+    async def fetch_tool_data(self, origin: str, destination: str, report: Optional[CompactionReport] = None) -> dict:
+        """
+        Fetch the route and all weather via `start_tool_data` and wait for every part.
+
+        Returns:
+            Dictionary with `route_data`, `weather_origin`, `weather_destination` and `route_weather`.
+        """
+        futures = self.start_tool_data(origin, destination, report=report)
+        try:
+            values = await asyncio.gather(*futures.values())
+        except BaseException:
+            # The route failed (or we were cancelled): don't leave the weather lookups running.
+            for future in futures.values():
+                future.cancel()
+            raise
+        return dict(zip(futures, values))
+
     def _serialize_route_data(self, data):
         """
         Convert Route, timedelta, mappingproxy, Descriptor, or other non-serializable objects to serializable format.
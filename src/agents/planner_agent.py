@@ -1,14 +1,68 @@
 # src/agents/planner_agent.py
 from src.agents.base_agent import BaseAgent
-from src.llm_integration.llm_client import LLMClient
+from src.tools.gazetteer import get_gazetteer
+from src.tools.google_search_tool import GoogleSearchTool
+from config import Config
+import asyncio
+import json
 import logging
+from datetime import date
+from typing import Awaitable, List, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class PlannerAgent(BaseAgent):
+    task = "planner"
+
     def __init__(self):
         super().__init__()
+        self.search_tool = GoogleSearchTool()
+
+    async def fetch_candidate_pois(self, route: Awaitable[dict], origin: str, destination: str, preferences: Optional[dict] = None) -> List[dict]:
+        """
+        Real points of interest along the route for the planner to choose from.
+
+        The route is only waited on for Config.POI_ROUTE_WAIT_SECONDS (a cache hit); after that the
+        corridor is the straight line between the gazetteer's origin and destination, so the planner
+        is not held up by the route call. A search that misses the local index is waited on for
+        Config.POI_TIMEOUT_SECONDS. Optional: returns [] when disabled, unavailable or slow.
+
+        Args:
+            route: The in-flight route fetch; it is never cancelled here.
+            preferences: `departure_date` (ISO date) picks the day whose opening hours are listed; defaults to today.
+        """
+        if not Config.POI_SEARCH_ENABLED:
+            return []
+        try:
+            route_data = await asyncio.wait_for(asyncio.shield(route), timeout=Config.POI_ROUTE_WAIT_SECONDS)
+            line = (route_data or {}).get("waypoints")
+        except Exception as e:
+            logger.info(f"Route not ready for the POI search, using the origin-destination corridor: {str(e) or type(e).__name__}")
+            line = None
+        line = line or self._straight_corridor(origin, destination)
+        if not line:
+            return []
+        try:
+            departure = (preferences or {}).get("departure_date")
+            weekday = (date.fromisoformat(departure) if departure else date.today()).weekday()
+            pois = await self.search_tool.search_corridor(line, weekday=weekday, wait_seconds=Config.POI_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning(f"Candidate POIs unavailable, planning without them: {str(e) or type(e).__name__}")
+            return []
+        candidates = [
+            {key: poi[key] for key in ("name", "rating", "opening_hours", "detour_km") if poi.get(key) is not None}
+            for poi in pois
+        ]
+        logger.info(f"Candidate POIs: {[poi['name'] for poi in candidates]}")
+        return candidates
+
+    def _straight_corridor(self, origin: str, destination: str) -> Optional[List[List[float]]]:
+        gazetteer = get_gazetteer()
+        ends = [gazetteer.resolve(place, fuzzy=False) for place in (origin, destination)] if gazetteer else []
+        if len(ends) < 2 or None in ends:
+            return None
+        return [[entry.lat, entry.lon] for entry in ends]
 
     async def process(self, input_data: dict) -> str:
         try:
@@ -47,10 +101,17 @@ class PlannerAgent(BaseAgent):
                 refinement=refinement or "",
                 prior_itinerary=prior_itinerary or ""
             )
+            candidate_pois = input_data.get("candidate_pois")
+            if candidate_pois:
+                # Appended after formatting: the JSON braces must not be read as placeholders
+                formatted_prompt += (
+                    "\nCandidate points of interest along the route (real places; prefer these over invented ones, "
+                    f"and use their exact names): {json.dumps(candidate_pois)}"
+                )
             logger.info(f"Planner prompt: {formatted_prompt}")
 
             # Generate plan
-            plan = await self.llm_client.generate(formatted_prompt)
+            plan = await self.generate_response(formatted_prompt)
             logger.info(f"Generated plan: {plan}")
             return plan
         except Exception as e:
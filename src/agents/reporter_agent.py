@@ -2,17 +2,21 @@ from src.agents.base_agent import BaseAgent
 from src.prompts.common_prompts import REPORTER_PROMPT
 import logging
 import json
+from typing import Callable, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ReporterAgent(BaseAgent):
-    async def process(self, input_data: dict) -> dict:
+    task = "reporter"
+
+    async def process(self, input_data: dict, on_token: Optional[Callable[[str], None]] = None) -> dict:
         try:
             optimized_plan = input_data.get("optimized_plan")
             route_data = input_data.get("route_data")
             weather_origin = input_data.get("weather_origin")
             weather_destination = input_data.get("weather_destination")
+            route_weather = input_data.get("route_weather") or []
             preferences = input_data.get("preferences",{})
 
             missing_inputs = []
@@ -42,10 +46,19 @@ class ReporterAgent(BaseAgent):
                 route_data=json.dumps(route_data),
                 weather_origin_data = weather_origin,
                 weather_destination_data = weather_destination,
+                route_weather_data = json.dumps(route_weather),
                 preferences=json.dumps(preferences),
 
             )
-            final_report = await self.generate_response(prompt)
+            if on_token is None:
+                final_report = await self.generate_response(prompt)
+            else:
+                # Stream the report so the caller can render it before the model finishes.
+                chunks = []
+                async for chunk in self.stream_response(prompt):
+                    chunks.append(chunk)
+                    on_token(chunk)
+                final_report = "".join(chunks)
 
             return {"final_itinerary": final_report}
         except Exception as e:
@@ -5,6 +5,10 @@ import sys
 import os
 import logging
 import json
+import queue
+import concurrent.futures
+import threading
+from typing import Optional
 
 
 # Debug sys.path
@@ -19,14 +23,66 @@ logger.info(f"sys.path: {sys.path}")
 
 try:
     from evaluation.evaluation_script import EvaluationScript
+    from src.tools.record_replay import Cassette, start_cassette_from_config
 except ImportError as e:
     logger.error(f"Import error: {str(e)}")
     raise
 
 st.set_page_config(page_title="Travel Assistant", page_icon="✈️")
 
-async def run_evaluation(query: str, origin: str, destination: str, preferences: dict, refinement: str = None, prior_itinerary: dict = None) -> tuple:
-    evaluator = EvaluationScript()
+@st.cache_resource
+def start_cassette() -> Optional[Cassette]:
+    """
+    Record or replay the external calls of the whole server process when Config.REPLAY_MODE is set.
+    """
+    return start_cassette_from_config()
+
+@st.cache_resource
+def get_evaluator() -> EvaluationScript:
+    """
+    Build the evaluator (orchestrator, agents, tools) once per Streamlit server process
+    instead of on every button click. Requests are isolated per call, so it is safe to share.
+    """
+    return EvaluationScript()
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Long-lived event loop on a daemon thread. Pooled HTTP/gRPC connections, rate limiters
+    and other loop-bound resources survive across reruns instead of dying with each asyncio.run().
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="travel-assistant-loop", daemon=True).start()
+    return loop
+
+@st.cache_resource
+def warm_up_connections() -> None:
+    """
+    Open the Routes API channel on the shared loop once per server process, in the background,
+    so the first trip doesn't pay for gRPC connection setup.
+    """
+    maps_tool = get_evaluator().orchestrator.optimizer.maps_tool
+    asyncio.run_coroutine_threadsafe(maps_tool.warm_up(), get_event_loop())
+
+def run_async(coro, on_poll=None):
+    """
+    Run `coro` on the shared event loop and block the script thread until it finishes,
+    calling `on_poll` periodically so streamed output can be rendered from this thread.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    while True:
+        try:
+            result = future.result(timeout=0.1)
+            break
+        except concurrent.futures.TimeoutError:
+            if on_poll:
+                on_poll()
+    if on_poll:
+        on_poll()
+    return result
+
+async def run_evaluation(query: str, origin: str, destination: str, preferences: dict, refinement: str = None, prior_itinerary: dict = None, on_token=None) -> tuple:
+    evaluator = get_evaluator()
     try:
         if not query:
             logger.error("run_evaluation: Query is empty")
@@ -38,16 +94,75 @@ async def run_evaluation(query: str, origin: str, destination: str, preferences:
             destination=destination,
             preferences=preferences,
             refinement=refinement,
-            prior_itinerary=prior_itinerary
+            prior_itinerary=prior_itinerary,
+            on_token=on_token
         )
         logger.info(f"Evaluation result - Itinerary: {json.dumps(itinerary, indent=2)}")
         return itinerary, results
     except Exception as e:
         logger.error(f"Evaluation error: {str(e)}")
+        raise
+
+def make_stream_renderer():
+    """
+    Build an on_token(prompt_name, chunk) callback that collects each prompt's itinerary while it streams.
+
+    Tokens arrive on the event-loop thread, so they are queued and rendered from the script
+    thread by `render`.
+
+    Returns:
+        The callback, a `render` function that draws queued tokens, and a function that
+        clears the draft placeholders once the final results are shown.
+    """
+    placeholders = {}
+    buffers = {}
+    tokens = queue.Queue()
+
+    def on_token(prompt_name: str, chunk: str) -> None:
+        tokens.put((prompt_name, chunk))
+
+    def render() -> None:
+        updated = set()
+        while True:
+            try:
+                prompt_name, chunk = tokens.get_nowait()
+            except queue.Empty:
+                break
+            if prompt_name not in placeholders:
+                placeholders[prompt_name] = st.empty()
+                buffers[prompt_name] = ""
+            buffers[prompt_name] += chunk
+            updated.add(prompt_name)
+        for prompt_name in updated:
+            placeholders[prompt_name].markdown(f"**Draft itinerary ({prompt_name})**\n\n{buffers[prompt_name]}")
+
+    def clear() -> None:
+        for placeholder in placeholders.values():
+            placeholder.empty()
+
+    return on_token, render, clear
+
+def plan(query: str, origin: str, destination: str, preferences: dict, refinement: str = None, prior_itinerary: dict = None) -> tuple:
+    """
+    Run the evaluation on the shared loop, streaming draft itineraries into the page.
+    """
+    on_token, render, clear_drafts = make_stream_renderer()
+    try:
+        return run_async(
+            run_evaluation(query, origin, destination, preferences, refinement=refinement, prior_itinerary=prior_itinerary, on_token=on_token),
+            on_poll=render
+        )
+    except Exception as e:
         st.error(f"Error running evaluation: {str(e)}")
         return None, []
+    finally:
+        clear_drafts()
 
 def main():
+    cassette = start_cassette()
+    if cassette is None or cassette.mode == "record":
+        # A replayed session never talks to the Routes API
+        warm_up_connections()
     st.title("Travel Assistant Chatbot")
     st.write("Plan your trip with AI-powered recommendations!")
 
@@ -87,8 +202,8 @@ def main():
         logger.info(f"Session state updated: {json.dumps(st.session_state.conversation, indent=2)}")
 
         with st.spinner("Planning your trip..."):
-            # Run initial evaluation
-            itinerary, results = asyncio.run(run_evaluation(query, origin, destination, preferences))
+            # Run initial evaluation, rendering each itinerary as it streams in
+            itinerary, results = plan(query, origin, destination, preferences)
             if itinerary and results:
                 st.session_state.conversation["itinerary"] = itinerary
                 st.session_state.conversation["results"] = results
@@ -148,14 +263,14 @@ def main():
 
             with st.spinner("Refining your trip..."):
                 # Run evaluation with refinement
-                itinerary, results = asyncio.run(run_evaluation(
+                itinerary, results = plan(
                     query=st.session_state.conversation["query"],
                     origin=st.session_state.conversation["origin"],
                     destination=st.session_state.conversation["destination"],
                     preferences=st.session_state.conversation["preferences"],
                     refinement=refinement,
                     prior_itinerary=st.session_state.conversation["itinerary"]
-                ))
+                )
                 if itinerary and results:
                     st.session_state.conversation["itinerary"] = itinerary
                     st.session_state.conversation["results"] = results
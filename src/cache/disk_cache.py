@@ -0,0 +1,196 @@
+# src/cache/disk_cache.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SQLiteCache:
+    """
+    Persistent key/value cache backed by a single SQLite file.
+
+    Values must be JSON-serializable. Entries carry an absolute expiry timestamp and
+    a last-access timestamp used for LRU eviction once `max_entries` or `max_bytes` is exceeded.
+    The database is opened lazily on first use.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_bytes: Optional[int] = None, default_ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+            logger.info(f"SQLite cache opened at {self.path}")
+        return self._conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Return the cached value for `key`, or `default` if it is missing or expired.
+        """
+        value, _ = self.get_with_expiry(key, default)
+        return value
+
+    def get_with_expiry(self, key: str, default: Any = None) -> tuple:
+        """
+        Return `(value, expires_at)` for `key`; `(default, None)` on a miss.
+        """
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+                now = time.time()
+                if row is None:
+                    self.misses += 1
+                    return default, None
+                value, expires_at = row
+                if expires_at is not None and expires_at <= now:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self.misses += 1
+                    return default, None
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return json.loads(value), expires_at
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cache read failed for key '{key}': {str(e)}")
+            return default, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store `value` under `key`, then evict least-recently-used entries beyond the size caps.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        payload = json.dumps(value)
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload.encode("utf-8")), expires_at, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cache write failed for key '{key}': {str(e)}")
+
+    def get_many_with_expiry(self, keys: Iterable[str]) -> Dict[str, tuple]:
+        """
+        Return `{key: (value, expires_at)}` for the keys that are present and fresh, under one lock.
+        """
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connect()
+                now = time.time()
+                for key in keys:
+                    row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+                    if row is None or (row[1] is not None and row[1] <= now):
+                        self.misses += 1
+                        continue
+                    conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                    self.hits += 1
+                    found[key] = (json.loads(row[0]), row[1])
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cache batch read failed: {str(e)}")
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Store several values in one transaction, then evict once.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        rows = []
+        for key, value in items.items():
+            payload = json.dumps(value)
+            rows.append((key, payload, len(payload.encode("utf-8")), expires_at, now))
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    self._evict(conn, now)
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cache batch write failed: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        overflow = max(0, count - self.max_entries)
+        if overflow:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+            count -= overflow
+        if self.max_bytes is not None:
+            total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            while total_bytes > self.max_bytes and count > 0:
+                key, size = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC LIMIT 1").fetchone()
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total_bytes -= size
+                count -= 1
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss/eviction counters and current size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+            "max_entries": self.max_entries
+        }
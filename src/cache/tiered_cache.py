@@ -0,0 +1,114 @@
+# src/cache/tiered_cache.py
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from src.cache.lru_cache import TTLCache
+from src.cache.disk_cache import SQLiteCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TieredCache:
+    """
+    Two-tier cache: an in-memory LRU in front of an optional on-disk SQLite store.
+
+    Reads check memory first, then disk; disk hits are promoted into memory with
+    their remaining TTL. Writes go to both tiers.
+    """
+
+    def __init__(self, memory: TTLCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.disk is None:
+            return default
+        return self._promote(key, *self.disk.get_with_expiry(key, _MISSING), default)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl=ttl)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """
+        `get` for coroutines: memory hits are served inline, the disk tier is read on a worker thread
+        so SQLite never blocks the event loop.
+        """
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.disk is None:
+            return default
+        return self._promote(key, *await asyncio.to_thread(self.disk.get_with_expiry, key, _MISSING), default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        `set` for coroutines: memory is updated inline, the disk write runs on a worker thread.
+        """
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, ttl)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Batched `aget`: memory first, then every remaining key in one worker-thread trip to disk.
+
+        Returns:
+            The cached values by key; missing keys are left out.
+        """
+        found = {}
+        remaining = []
+        for key in keys:
+            value = self.memory.get(key, _MISSING)
+            if value is _MISSING:
+                remaining.append(key)
+            else:
+                found[key] = value
+        if remaining and self.disk is not None:
+            for key, (value, expires_at) in (await asyncio.to_thread(self.disk.get_many_with_expiry, remaining)).items():
+                found[key] = self._promote(key, value, expires_at, None)
+        return found
+
+    async def aset_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Batched `aset`: memory is updated inline, the disk tier in one worker-thread transaction.
+        """
+        for key, value in items.items():
+            self.memory.set(key, value, ttl=ttl)
+        if items and self.disk is not None:
+            await asyncio.to_thread(self.disk.set_many, items, ttl)
+
+    def _promote(self, key: str, value: Any, expires_at: Optional[float], default: Any) -> Any:
+        # A disk hit is copied into memory with its remaining TTL
+        if value is _MISSING:
+            return default
+        ttl = max(0.0, expires_at - time.time()) if expires_at is not None else None
+        self.memory.set(key, value, ttl=ttl)
+        return value
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return per-tier counters, e.g. {"memory": {...}, "disk": {...}}.
+        """
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
@@ -0,0 +1,82 @@
+# src/llm_integration/client_registry.py
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from config import Config
+from src.cache.tiered_cache import TieredCache
+from src.llm_integration.llm_client import LLMClient, build_response_cache
+from src.llm_integration.rate_limiter import RateLimiter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_clients: "OrderedDict[tuple, LLMClient]" = OrderedDict()
+_response_cache: Optional[TieredCache] = None
+_response_cache_built = False
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+def get_response_cache() -> Optional[TieredCache]:
+    """
+    Return the process-wide LLM response cache, building it on first use.
+    """
+    global _response_cache, _response_cache_built
+    with _lock:
+        if not _response_cache_built:
+            _response_cache = build_response_cache()
+            _response_cache_built = True
+        return _response_cache
+
+def get_rate_limiter(model_name: str) -> RateLimiter:
+    """
+    Return the rate limiter for `model_name`. Quotas are per model, so every client
+    of the same model shares one limiter regardless of its other settings.
+    """
+    with _lock:
+        limiter = _rate_limiters.get(model_name)
+        if limiter is None:
+            limiter = RateLimiter.from_config()
+            _rate_limiters[model_name] = limiter
+        return limiter
+
+def get_llm_client(model_name: Optional[str] = None, **llm_settings) -> LLMClient:
+    """
+    Return the shared LLMClient for a model and settings, creating it lazily.
+
+    Clients are keyed by model name plus settings, so every agent asking for the same
+    configuration reuses one chat model and its underlying connections. At most
+    Config.LLM_MAX_CLIENTS configurations are kept; the least recently used is dropped beyond that.
+    """
+    model_name = model_name or Config.MODEL_NAME
+    key = (model_name, tuple(sorted(llm_settings.items())))
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _clients.move_to_end(key)
+            return client
+    cache = get_response_cache()
+    rate_limiter = get_rate_limiter(model_name)
+    with _lock:
+        # Another thread may have created the client while the cache was being built.
+        client = _clients.get(key)
+        if client is None:
+            client = LLMClient(model_name=model_name, cache=cache, rate_limiter=rate_limiter, **llm_settings)
+            _clients[key] = client
+            logger.info(f"Registered shared LLM client for {model_name} {dict(llm_settings)}")
+            while len(_clients) > Config.LLM_MAX_CLIENTS:
+                evicted_key, _ = _clients.popitem(last=False)
+                logger.info(f"Dropped shared LLM client for {evicted_key[0]} (registry full)")
+        _clients.move_to_end(key)
+        return client
+
+def reset_llm_clients() -> None:
+    """
+    Forget all shared clients, rate limiters and the response cache (used by tests and after config changes).
+    """
+    global _response_cache, _response_cache_built
+    with _lock:
+        _clients.clear()
+        _rate_limiters.clear()
+        _response_cache = None
+        _response_cache_built = False
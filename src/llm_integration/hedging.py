@@ -0,0 +1,107 @@
+# src/llm_integration/hedging.py
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Dict, Iterable, Optional
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class LatencyHistogram:
+    """
+    Sliding window of the most recent call latencies, in seconds.
+    """
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Nearest-rank percentile of the recorded latencies, or None when there are no samples.
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, math.ceil(percentile / 100.0 * len(ordered)) - 1)
+        return ordered[min(rank, len(ordered) - 1)]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class HedgingPolicy:
+    """
+    Decides when a slow model call gets a duplicate ("hedge") request.
+
+    A hedge is sent once a call has run longer than the configured percentile of recent
+    latencies, provided enough samples exist and hedges stay below `max_hedge_ratio`
+    of all requests, which caps the extra cost.
+    """
+
+    def __init__(self, percentile: float = 95.0, max_hedge_ratio: float = 0.1, min_samples: int = 20, min_delay: float = 0.5):
+        self.percentile = percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_config(cls) -> Optional["HedgingPolicy"]:
+        """
+        Build the policy from Config, or return None when hedging is disabled.
+        """
+        if not Config.LLM_HEDGING_ENABLED:
+            return None
+        return cls(
+            percentile=Config.LLM_HEDGE_PERCENTILE,
+            max_hedge_ratio=Config.LLM_HEDGE_MAX_RATIO,
+            min_samples=Config.LLM_HEDGE_MIN_SAMPLES
+        )
+
+    def hedge_delay(self, histogram: LatencyHistogram) -> Optional[float]:
+        """
+        Seconds to wait before hedging, or None if there is not enough latency history yet.
+        """
+        if len(histogram) < self.min_samples:
+            return None
+        return max(self.min_delay, histogram.percentile(self.percentile))
+
+    def allow_hedge(self) -> bool:
+        return self.hedges + 1 <= self.max_hedge_ratio * self.requests
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_ratio": self.hedges / self.requests if self.requests else 0.0
+        }
+
+
+async def first_successful(tasks: Iterable["asyncio.Future"], preferred: Optional["asyncio.Future"] = None):
+    """
+    Wait for the first task to succeed and cancel the rest.
+
+    Returns:
+        Tuple of (winning task, its result). If every task fails, the last error is raised.
+    """
+    pending = set(tasks)
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # When several finish together, prefer `preferred` (e.g. the original request).
+            for task in sorted(done, key=lambda t: t is not preferred):
+                if task.exception() is None:
+                    return task, task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -1,40 +1,187 @@
 # src/llm_integration/llm_client.py
+import asyncio
 import logging
+import hashlib
+import time
+from typing import AsyncIterator, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from config import Config
+from src.cache.lru_cache import TTLCache
+from src.cache.disk_cache import SQLiteCache
+from src.cache.tiered_cache import TieredCache
+from src.llm_integration.rate_limiter import RateLimiter
+from src.llm_integration.hedging import HedgingPolicy, LatencyHistogram, first_successful
 import re
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def build_response_cache() -> Optional[TieredCache]:
+    """
+    Build the LLM response cache from Config, or return None when caching is disabled.
+    """
+    if not Config.LLM_CACHE_ENABLED:
+        return None
+    memory = TTLCache(max_entries=Config.LLM_CACHE_MAX_ENTRIES, default_ttl=Config.LLM_CACHE_TTL_SECONDS)
+    disk = None
+    if Config.LLM_CACHE_PATH:
+        disk = SQLiteCache(
+            Config.LLM_CACHE_PATH,
+            max_entries=Config.LLM_CACHE_DISK_MAX_ENTRIES,
+            max_bytes=Config.LLM_CACHE_DISK_MAX_BYTES,
+            default_ttl=Config.LLM_CACHE_TTL_SECONDS
+        )
+    return TieredCache(memory, disk)
+
 class LLMClient:
-    def __init__(self):
+    def __init__(self, model_name: Optional[str] = None, cache: Optional[TieredCache] = None, rate_limiter: Optional[RateLimiter] = None, hedging: Optional[HedgingPolicy] = None, **llm_settings):
         try:
             Config.validate()
-            self.llm = ChatGoogleGenerativeAI(api_key=Config.GEMINI_API_KEY, model=Config.MODEL_NAME)
-            logger.info(f"LLM initialized with model: {Config.MODEL_NAME}")
+            self.model_name = model_name or Config.MODEL_NAME
+            self.llm_settings = llm_settings
+            self.llm = ChatGoogleGenerativeAI(api_key=Config.GEMINI_API_KEY, model=self.model_name, **llm_settings)
+            self.cache = cache if cache is not None else build_response_cache()
+            self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter.from_config()
+            self.hedging = hedging if hedging is not None else HedgingPolicy.from_config()
+            self.latency_histogram = LatencyHistogram()
+            logger.info(f"LLM initialized with model: {self.model_name}")
         except Exception as e:
             logger.error(f"Failed to initialize LLM: {str(e)}")
             raise
 
+    def cache_key(self, prompt: str) -> str:
+        """
+        Cache key for a prompt: the model name plus a SHA-256 digest of the model settings and prompt text.
+        """
+        settings = repr(sorted(self.llm_settings.items())) if self.llm_settings else ""
+        digest = hashlib.sha256((settings + prompt).encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def estimate_tokens(self, prompt: str) -> int:
+        """
+        Rough prompt size in tokens (about four characters per token) for the tokens-per-minute budget.
+        """
+        return max(1, len(prompt) // 4)
+
+    def rate_limit_metrics(self) -> dict:
+        return self.rate_limiter.metrics()
+
+    def hedging_metrics(self) -> dict:
+        return self.hedging.metrics() if self.hedging is not None else {}
+
+    async def _invoke(self, messages: list, tokens: int):
+        async def call():
+            # Timed inside the limiter slot: queueing and 429 backoff would inflate the hedge delay
+            started = time.perf_counter()
+            response = await self.llm.agenerate([messages])
+            self.latency_histogram.record(time.perf_counter() - started)
+            return response
+
+        return await self.rate_limiter.run(call, tokens=tokens)
+
+    async def _hedged_invoke(self, messages: list, tokens: int):
+        """
+        Run the call and, if it outlives the hedge delay, race it against a duplicate.
+        The first successful response wins and the other request is cancelled.
+        """
+        self.hedging.requests += 1
+        delay = self.hedging.hedge_delay(self.latency_histogram)
+        primary = asyncio.ensure_future(self._invoke(messages, tokens))
+        if delay is None:
+            return await primary
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self.hedging.allow_hedge():
+                return await primary
+            logger.info(f"LLM call exceeded p{self.hedging.percentile:.0f} latency ({delay:.2f}s); sending hedged request")
+            hedge = asyncio.ensure_future(self._invoke(messages, tokens))
+            self.hedging.hedges += 1
+            pending.add(hedge)
+            winner, response = await first_successful(pending, preferred=primary)
+            if winner is hedge:
+                self.hedging.hedge_wins += 1
+            return response
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _call_model(self, messages: list, tokens: int):
+        if self.hedging is None:
+            return await self._invoke(messages, tokens)
+        return await self._hedged_invoke(messages, tokens)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {}
+
+    def _strip_json_fence(self, text: str) -> str:
+        if text.startswith("```json") and text.endswith("```"):
+            text = re.sub(r'^```json\s*', '', text, flags=re.MULTILINE)
+            text = re.sub(r'\s*```$', '', text, flags=re.MULTILINE)
+            logger.info(f"Stripped response text: {text[:500]}...")
+        return text
+
     async def generate(self, prompt: str) -> str:
         try:
+            if self.cache is not None:
+                key = self.cache_key(prompt)
+                cached = await self.cache.aget(key)
+                if cached is not None:
+                    logger.info(f"LLM cache hit for key {key}")
+                    return cached
+
             logger.info(f"Sending prompt to model: {prompt[:500]}...")
             messages = [HumanMessage(content=prompt)]
-            response = await self.llm.agenerate([messages])
+            response = await self._call_model(messages, self.estimate_tokens(prompt))
             logger.info(f"Raw response type: {type(response)}")
             logger.info(f"Raw response content: {response}")
 
             text = response.generations[0][0].message.content
             logger.info(f"Extracted response text: {text[:500]}...")
+            text = self._strip_json_fence(text)
 
-            if text.startswith("```json") and text.endswith("```"):
-                text = re.sub(r'^```json\s*', '', text, flags=re.MULTILINE)
-                text = re.sub(r'\s*```$', '', text, flags=re.MULTILINE)
-                logger.info(f"Stripped response text: {text[:500]}...")
-
+            if self.cache is not None and text:
+                await self.cache.aset(key, text)
             return text
         except Exception as e:
             logger.error(f"LLM generation failed: {str(e)}")
+            raise
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream the completion for `prompt` as text chunks using the chat model's streaming API.
+
+        A cached response is yielded as a single chunk. The full text is cached once the
+        stream completes, so a later `generate` call with the same prompt is a cache hit.
+
+        Yields:
+            Text chunks in the order the model produced them.
+        """
+        try:
+            key = self.cache_key(prompt) if self.cache is not None else None
+            if key is not None:
+                cached = await self.cache.aget(key)
+                if cached is not None:
+                    logger.info(f"LLM cache hit for key {key}")
+                    yield cached
+                    return
+
+            logger.info(f"Streaming prompt to model: {prompt[:500]}...")
+            messages = [HumanMessage(content=prompt)]
+            chunks = []
+            # Streams are not retried once tokens have been yielded, so they only take a limiter slot.
+            async with self.rate_limiter.slot(self.estimate_tokens(prompt)):
+                async for chunk in self.llm.astream(messages):
+                    text = chunk.content if isinstance(chunk.content, str) else ""
+                    if text:
+                        chunks.append(text)
+                        yield text
+
+            full_text = "".join(chunks)
+            logger.info(f"Streamed response text: {full_text[:500]}...")
+            if key is not None and full_text:
+                await self.cache.aset(key, self._strip_json_fence(full_text))
+        except Exception as e:
+            logger.error(f"LLM streaming failed: {str(e)}")
             raise
\ No newline at end of file
@@ -0,0 +1,139 @@
+# src/llm_integration/model_router.py
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Dict, Optional, Tuple
+from config import Config
+from src.llm_integration.client_registry import get_llm_client
+from src.llm_integration.hedging import first_successful
+from src.llm_integration.llm_client import LLMClient
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ModelRouter:
+    """
+    Routes each agent or task (planner, optimizer, reporter, critique) to a model.
+
+    When a task has a latency budget and its call is still running once the budget is
+    spent (for a stream: before its first chunk), the same prompt is also sent to the
+    fallback model and the first successful answer is used. Every routing decision is logged.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, str]] = None, fallback_model: Optional[str] = None, budgets: Optional[Dict[str, float]] = None):
+        self.routes = dict(routes if routes is not None else Config.MODEL_ROUTES)
+        self.fallback_model = fallback_model if fallback_model is not None else Config.FALLBACK_MODEL_NAME
+        self.budgets = dict(budgets if budgets is not None else Config.STAGE_LATENCY_BUDGETS)
+        self.fallbacks: Dict[str, int] = {}
+
+    def model_for(self, task: Optional[str]) -> str:
+        return self.routes.get(task) or Config.MODEL_NAME
+
+    def client_for(self, task: Optional[str]) -> LLMClient:
+        return get_llm_client(self.model_for(task))
+
+    async def generate(self, task: Optional[str], prompt: str, client: Optional[LLMClient] = None) -> str:
+        """
+        Generate a response for `task`, falling back to the faster model if the budget is exceeded.
+
+        Args:
+            task: Routing key, e.g. "planner" or "critique".
+            prompt: Prompt text.
+            client: Client to use for the primary call; defaults to the routed client.
+        """
+        client = client or self.client_for(task)
+        budget = self.budgets.get(task)
+        model_name = getattr(client, "model_name", self.model_for(task))
+        if not budget or not self.fallback_model or self.fallback_model == model_name:
+            logger.info(f"Routing '{task}' to {model_name} (no latency budget)")
+            return await client.generate(prompt)
+
+        logger.info(f"Routing '{task}' to {model_name} with a {budget:.1f}s budget (fallback: {self.fallback_model})")
+        primary = asyncio.ensure_future(client.generate(prompt))
+        fallback = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=budget)
+            if done:
+                return primary.result()
+
+            logger.warning(f"'{task}' exceeded its {budget:.1f}s budget on {model_name}; racing fallback model {self.fallback_model}")
+            self.fallbacks[task] = self.fallbacks.get(task, 0) + 1
+            fallback = asyncio.ensure_future(get_llm_client(self.fallback_model).generate(prompt))
+            winner, response = await first_successful({primary, fallback}, preferred=primary)
+            logger.info(f"'{task}' answered by {model_name if winner is primary else self.fallback_model}")
+            return response
+        finally:
+            # No-op for a finished call; stops the model calls when the caller is cancelled
+            for call in (primary, fallback):
+                if call is not None:
+                    call.cancel()
+
+    async def stream(self, task: Optional[str], prompt: str, client: Optional[LLMClient] = None) -> AsyncIterator[str]:
+        """
+        Stream a response for `task`; the latency budget applies to the time to the first chunk.
+
+        If the routed model hasn't produced a chunk once the budget is spent, the fallback model's
+        stream is started too, and whichever yields a first chunk first (the routed model on a tie)
+        is streamed to the end. The other stream is closed.
+
+        Args:
+            task: Routing key, e.g. "reporter".
+            prompt: Prompt text.
+            client: Client to use for the primary stream; defaults to the routed client.
+        """
+        client = client or self.client_for(task)
+        budget = self.budgets.get(task)
+        model_name = getattr(client, "model_name", self.model_for(task))
+        if not budget or not self.fallback_model or self.fallback_model == model_name:
+            logger.info(f"Routing '{task}' stream to {model_name} (no latency budget)")
+            async for chunk in client.stream(prompt):
+                yield chunk
+            return
+
+        logger.info(f"Routing '{task}' stream to {model_name} with a {budget:.1f}s time-to-first-chunk budget (fallback: {self.fallback_model})")
+        streams = [client.stream(prompt)]
+        heads = [asyncio.ensure_future(_first_chunk(streams[0]))]
+        try:
+            done, _ = await asyncio.wait(heads, timeout=budget)
+            winner = heads[0]
+            if not done:
+                logger.warning(f"'{task}' produced no output within its {budget:.1f}s budget on {model_name}; racing fallback model {self.fallback_model}")
+                self.fallbacks[task] = self.fallbacks.get(task, 0) + 1
+                streams.append(get_llm_client(self.fallback_model).stream(prompt))
+                heads.append(asyncio.ensure_future(_first_chunk(streams[1])))
+                winner, _ = await first_successful(heads, preferred=heads[0])
+                logger.info(f"'{task}' streamed by {model_name if winner is heads[0] else self.fallback_model}")
+            stream = streams[heads.index(winner)]
+            for chunk in winner.result():
+                yield chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            # A generator can only be closed once its pending read has finished
+            pending = [head for head in heads if not head.done()]
+            for head in pending:
+                head.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for opened in streams:
+                await opened.aclose()
+
+async def _first_chunk(stream: AsyncIterator[str]) -> Tuple[str, ...]:
+    """
+    The stream's first chunk as a 1-tuple, or () if it is empty; the stream stays open.
+    """
+    async for chunk in stream:
+        return (chunk,)
+    return ()
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+def get_model_router() -> ModelRouter:
+    """
+    Return the process-wide router built from Config.
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
@@ -0,0 +1,215 @@
+# src/llm_integration/rate_limiter.py
+import asyncio
+import logging
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRY_AFTER_PATTERNS = [
+    re.compile(r"retry[_ ]delay\s*\{\s*seconds:\s*(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry (?:in|after) (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+    re.compile(r"\"retryDelay\":\s*\"(\d+(?:\.\d+)?)s\"", re.IGNORECASE),
+]
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    True if `error` is a 429 / RESOURCE_EXHAUSTED response from the model API.
+    """
+    for attr in ("code", "status_code"):
+        code = getattr(error, attr, None)
+        if code == 429 or getattr(code, "value", None) == 429:
+            return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "Resource has been exhausted" in message
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Extract a server-provided retry delay from `error`, if there is one.
+    """
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers and headers.get("Retry-After"):
+        try:
+            return float(headers.get("Retry-After"))
+        except ValueError:
+            pass
+    message = str(error)
+    for pattern in _RETRY_AFTER_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`, holding at most `capacity` tokens.
+    The refill rate can be lowered and raised at runtime for adaptive throttling.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_rate_per_minute = rate_per_minute
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate_per_minute / 60.0)
+        self._updated_at = now
+
+    def try_consume(self, amount: float) -> float:
+        """
+        Take `amount` tokens if available. Returns 0 on success, otherwise the seconds to wait.
+        Requests larger than the bucket are clamped to its capacity so they can still proceed.
+        """
+        amount = min(amount, self.capacity)
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) * 60.0 / self.rate_per_minute
+
+class RateLimiter:
+    """
+    Client-side governor for model calls.
+
+    Combines a requests-per-minute and a tokens-per-minute token bucket with a cap on
+    in-flight calls. Calls that fail with a 429 are retried after the server's retry-after
+    hint or a jittered exponential backoff, and the request rate is halved on each 429 and
+    recovered gradually on success (AIMD), so throughput settles just under the quota.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int, max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0, sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep, clock: Callable[[], float] = time.monotonic):
+        self.request_bucket = TokenBucket(requests_per_minute, clock=clock)
+        self.token_bucket = TokenBucket(tokens_per_minute, clock=clock)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket_lock = asyncio.Lock()
+        self._metrics = {
+            "requests": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "throttled": 0,
+            "retries": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_config(cls) -> "RateLimiter":
+        return cls(
+            requests_per_minute=Config.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=Config.LLM_TOKENS_PER_MINUTE,
+            max_concurrency=Config.LLM_MAX_CONCURRENCY,
+            max_retries=Config.LLM_MAX_RETRIES,
+            backoff_base=Config.LLM_BACKOFF_BASE_SECONDS,
+            backoff_max=Config.LLM_BACKOFF_MAX_SECONDS
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait until both the request and the token budget allow one more call of `tokens` tokens.
+        """
+        async with self._bucket_lock:
+            while True:
+                wait = self.request_bucket.try_consume(1)
+                if wait == 0:
+                    wait = self.token_bucket.try_consume(tokens)
+                    if wait == 0:
+                        return
+                    # Give the request token back; we'll try both again after waiting.
+                    self.request_bucket.tokens += 1
+                self._metrics["wait_seconds"] += wait
+                await self._sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self, tokens: int):
+        """
+        Async context manager holding one rate-limited, concurrency-bounded call slot.
+        """
+        await self.acquire(tokens)
+        async with self._semaphore:
+            self._metrics["requests"] += 1
+            self._metrics["in_flight"] += 1
+            self._metrics["max_in_flight"] = max(self._metrics["max_in_flight"], self._metrics["in_flight"])
+            try:
+                yield
+            finally:
+                self._metrics["in_flight"] -= 1
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff for retry `attempt` (0-based).
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _on_throttled(self) -> None:
+        bucket = self.request_bucket
+        bucket.rate_per_minute = max(1.0, bucket.rate_per_minute / 2)
+        logger.warning(f"Rate limited by model API; request rate lowered to {bucket.rate_per_minute:.1f}/min")
+
+    def _on_success(self) -> None:
+        bucket = self.request_bucket
+        if bucket.rate_per_minute < bucket.max_rate_per_minute:
+            bucket.rate_per_minute = min(bucket.max_rate_per_minute, bucket.rate_per_minute + bucket.max_rate_per_minute * 0.05)
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """
+        Run `call` within the limiter, retrying 429 responses.
+
+        Args:
+            call: Zero-argument coroutine factory; invoked again for each retry.
+            tokens: Estimated tokens the call consumes against the tokens-per-minute budget.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(tokens):
+                    result = await call()
+                self._metrics["succeeded"] += 1
+                self._on_success()
+                return result
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    self._metrics["failed"] += 1
+                    raise
+                self._metrics["throttled"] += 1
+                self._on_throttled()
+                if attempt >= self.max_retries:
+                    self._metrics["failed"] += 1
+                    logger.error(f"Giving up after {attempt + 1} rate-limited attempts")
+                    raise
+                retry_after = retry_after_seconds(e)
+                delay = retry_after if retry_after is not None else self.backoff_delay(attempt)
+                self._metrics["retries"] += 1
+                self._metrics["backoff_seconds"] += delay
+                logger.warning(f"Model API returned 429, retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+                await self._sleep(delay)
+                attempt += 1
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Return counters plus the current effective request rate.
+        """
+        metrics = dict(self._metrics)
+        metrics["requests_per_minute"] = self.request_bucket.rate_per_minute
+        return metrics
@@ -2,11 +2,15 @@
 from src.agents.planner_agent import PlannerAgent
 from src.agents.optimizer_agent import OptimizerAgent
 from src.agents.reporter_agent import ReporterAgent
-from src.orchestrator.state_manager import StateManager
+from src.orchestrator.request_context import RequestContext
+from src.orchestrator.stage_graph import StageGraph
+from config import Config
+import asyncio
 import logging
 import json
 from datetime import timedelta
 from types import MappingProxyType
+from typing import Callable, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,9 +32,17 @@ class MainOrchestrator:
         self.planner = PlannerAgent()
         self.optimizer = OptimizerAgent()
         self.reporter = ReporterAgent()
-        self.state_manager = StateManager()
 
-    async def process_query(self, query: str, origin: str, destination: str, preferences: dict, planner_prompt: str = None, refinement: str = None, prior_itinerary: dict = None) -> dict:
+    async def process_query(self, query: str, origin: str, destination: str, preferences: dict, planner_prompt: str = None, refinement: str = None, prior_itinerary: dict = None, on_token: Optional[Callable[[str], None]] = None, tool_data: Optional[dict] = None) -> dict:
+        """
+        Plan, optimize and report a trip.
+
+        Args:
+            tool_data: Optional route and weather snapshot from `OptimizerAgent.fetch_tool_data`, or the
+                futures from `OptimizerAgent.start_tool_data`. When given, it replaces the route and weather
+                calls, so several queries for the same trip (e.g. prompt variants) share one set of tool
+                calls. Each stage waits only for its own entry, and shared futures are never cancelled here.
+        """
         try:
             # Validate inputs
             if not query:
@@ -43,17 +55,17 @@ class MainOrchestrator:
                 logger.error("Destination is empty or missing")
                 raise ValueError("Destination is required")
 
-            # Initialize state
-            state = {
-                "query": query,
-                "origin": origin,
-                "destination": destination,
-                "preferences": preferences,
-                "refinement": refinement,
-                "prior_itinerary": prior_itinerary
-            }
-            self.state_manager.update_state(state)
-            logger.info(f"Orchestrator state initialized: {json.dumps(state, indent=2, cls=CustomJSONEncoder)}")
+            # Request-scoped state, so concurrent calls on one orchestrator stay isolated
+            context = RequestContext(
+                query=query,
+                origin=origin,
+                destination=destination,
+                preferences=preferences,
+                planner_prompt=planner_prompt,
+                refinement=refinement,
+                prior_itinerary=prior_itinerary
+            )
+            logger.info(f"[{context.request_id}] Orchestrator state initialized: {json.dumps(context.get_state(), indent=2, cls=CustomJSONEncoder)}")
 
             # Generate initial plan with refinement context
             initial_plan_input = {
@@ -65,27 +77,81 @@ class MainOrchestrator:
                 "prior_itinerary": prior_itinerary.get("final_itinerary") if prior_itinerary else None,
                 "planner_prompt": planner_prompt
             }
-            logger.info(f"Planner input: {json.dumps(initial_plan_input, indent=2, cls=CustomJSONEncoder)}")
-            initial_plan = await self.planner.process(initial_plan_input)
-            self.state_manager.update_state({"initial_plan": initial_plan})
-            logger.info(f"Initial plan generated: {initial_plan}")
+            logger.info(f"[{context.request_id}] Planner input: {json.dumps(initial_plan_input, indent=2, cls=CustomJSONEncoder)}")
 
-            # Optimize plan
-            optimizer_input = {
-                "initial_plan": initial_plan,
-                "origin": origin,
-                "destination": destination,
-                "preferences": preferences,
-                "refinement": refinement
-            }
-            optimized_data = await self.optimizer.process(optimizer_input)
-            self.state_manager.update_state(optimized_data)
-            logger.info(f"Optimized data: {json.dumps(optimized_data, indent=2, cls=CustomJSONEncoder)}")
+            async def from_snapshot(key: str):
+                value = tool_data.get(key)
+                return await asyncio.shield(value) if asyncio.isfuture(value) else value
+
+            async def run_planner(deps: dict) -> str:
+                initial_plan = await self.planner.process({**initial_plan_input, "candidate_pois": deps["pois"]})
+                context.update_state({"initial_plan": initial_plan})
+                logger.info(f"[{context.request_id}] Initial plan generated: {initial_plan}")
+                return initial_plan
+
+            async def run_optimizer(deps: dict) -> dict:
+                # Route and weather were prefetched while the planner was running
+                optimizer_input = {
+                    "initial_plan": deps["planner"],
+                    "origin": origin,
+                    "destination": destination,
+                    "preferences": preferences,
+                    "refinement": refinement,
+                    "route_data": deps["route"],
+                    "weather_origin": deps["weather_origin"],
+                    "weather_destination": deps["weather_destination"],
+                    "route_weather": deps["route_weather"]
+                }
+                optimized_data = await self.optimizer.process(optimizer_input)
+                context.update_state(optimized_data)
+                logger.info(f"[{context.request_id}] Optimized data: {json.dumps(optimized_data, indent=2, cls=CustomJSONEncoder)}")
+                return optimized_data
+
+            async def run_reporter(deps: dict) -> dict:
+                # Generate final itinerary, streaming tokens to on_token when provided
+                final_itinerary = await self.reporter.process(context.get_state(), on_token=on_token)
+                context.update_state({"final_itinerary": final_itinerary})
+                logger.info(f"[{context.request_id}] Final itinerary generated: {json.dumps(final_itinerary, indent=2, cls=CustomJSONEncoder)}")
+                return final_itinerary
+
+            # Weather depends only on origin/destination, so it runs alongside the planner. The POI search
+            # shares the route fetch but waits on it only briefly, so the planner overlaps the route call.
+            graph = StageGraph()
+            owned = []
+            if tool_data is None:
+                # Origin/destination weather share one batched lookup; route weather follows the route
+                tool_data = self.optimizer.start_tool_data(origin, destination, report=context.compaction_report)
+                owned = list(tool_data.values())
+            else:
+                logger.info(f"[{context.request_id}] Using the provided route and weather snapshot")
+            route = asyncio.ensure_future(from_snapshot("route_data"))
+            graph.add_stage("weather_origin", lambda deps: from_snapshot("weather_origin"))
+            graph.add_stage("weather_destination", lambda deps: from_snapshot("weather_destination"))
+            graph.add_stage("route_weather", lambda deps: from_snapshot("route_weather"))
+            graph.add_stage("route", lambda deps: route)
+            tool_stages = ("route", "weather_origin", "weather_destination", "route_weather")
+            graph.add_stage("pois", lambda deps: self.planner.fetch_candidate_pois(route, origin, destination, preferences))
+            graph.add_stage("planner", run_planner, depends_on=("pois",))
+            graph.add_stage("optimizer", run_optimizer, depends_on=("planner",) + tool_stages)
+            graph.add_stage("reporter", run_reporter, depends_on=("optimizer",))
 
-            # Generate final itinerary
-            final_itinerary = await self.reporter.process(self.state_manager.get_state())
-            self.state_manager.update_state({"final_itinerary": final_itinerary})
-            logger.info(f"Final itinerary generated: {json.dumps(final_itinerary, indent=2, cls=CustomJSONEncoder)}")
+            # On timeout wait_for cancels the graph, which cancels its in-flight stages and tool calls
+            timeout = Config.REQUEST_TIMEOUT_SECONDS or None
+            try:
+                results = await asyncio.wait_for(graph.run(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"[{context.request_id}] Request exceeded {timeout}s; cancelled stages still running (finished: {sorted(graph.timings)})")
+                raise
+            finally:
+                # No-op once fetched; stops the tool calls if the graph failed before awaiting them
+                route.cancel()
+                for future in owned:
+                    future.cancel()
+                await asyncio.gather(*owned, return_exceptions=True)
+            final_itinerary = results["reporter"]
+            context.stage_timings.update(graph.timings)
+            logger.info(f"[{context.request_id}] Stage timings (s): {context.stage_timings}")
+            logger.info(f"[{context.request_id}] Prompt compaction: {context.compaction_report.summary()}")
 
             return final_itinerary
         except Exception as e:
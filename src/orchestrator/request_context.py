@@ -0,0 +1,45 @@
+# src/orchestrator/request_context.py
+import logging
+import uuid
+from typing import Dict, Optional
+from src.orchestrator.state_manager import StateManager
+from src.prompts.compaction import CompactionReport
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RequestContext:
+    """
+    State scoped to a single `MainOrchestrator.process_query` call.
+
+    Each call gets its own StateManager, so concurrent requests on one orchestrator
+    never see each other's `initial_plan`, `route_data`, etc.
+    """
+
+    def __init__(self, query: str, origin: str, destination: str, preferences: dict, planner_prompt: Optional[str] = None, refinement: Optional[str] = None, prior_itinerary: Optional[dict] = None):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.query = query
+        self.origin = origin
+        self.destination = destination
+        self.preferences = preferences
+        self.planner_prompt = planner_prompt
+        self.refinement = refinement
+        self.prior_itinerary = prior_itinerary
+        self.stage_timings: Dict[str, float] = {}
+        self.compaction_report = CompactionReport()
+        self.state_manager = StateManager()
+        self.state_manager.update_state({
+            "query": query,
+            "origin": origin,
+            "destination": destination,
+            "preferences": preferences,
+            "refinement": refinement,
+            "prior_itinerary": prior_itinerary
+        })
+        logger.info(f"Request context {self.request_id} created for '{origin}' -> '{destination}'")
+
+    def update_state(self, new_state: Dict) -> None:
+        self.state_manager.update_state(new_state)
+
+    def get_state(self) -> Dict:
+        return self.state_manager.get_state()
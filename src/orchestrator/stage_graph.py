@@ -0,0 +1,95 @@
+# src/orchestrator/stage_graph.py
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+class StageGraph:
+    """
+    Dependency graph of async pipeline stages.
+
+    Each stage is an async callable that receives a dict of its dependencies' results.
+    `run` starts every stage as soon as all of its dependencies have finished, so
+    independent stages overlap. If any stage fails, the remaining stages are cancelled
+    and the first error is raised.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[StageFunc, Tuple[str, ...]]] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add_stage(self, name: str, func: StageFunc, depends_on: Iterable[str] = ()) -> None:
+        """
+        Register a stage.
+
+        Args:
+            name: Unique stage name; its result is stored under this key.
+            func: Async callable taking a dict of dependency results.
+            depends_on: Names of stages that must finish before this one starts.
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        self._stages[name] = (func, tuple(depends_on))
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        visiting, visited = set(), set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through '{name}'")
+            if name not in self._stages:
+                raise ValueError(f"Unknown stage dependency: '{name}'")
+            visiting.add(name)
+            for dependency in self._stages[name][1]:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self._stages:
+            visit(name)
+        return order
+
+    async def _run_stage(self, name: str, tasks: Dict[str, "asyncio.Task"]) -> Any:
+        func, depends_on = self._stages[name]
+        dependency_results = {}
+        for dependency in depends_on:
+            dependency_results[dependency] = await tasks[dependency]
+        started = time.perf_counter()
+        logger.info(f"Stage '{name}' started")
+        result = await func(dependency_results)
+        self.timings[name] = time.perf_counter() - started
+        logger.info(f"Stage '{name}' finished in {self.timings[name]:.2f}s")
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run all stages, overlapping those whose dependencies allow it.
+
+        Returns:
+            Dictionary mapping each stage name to its result.
+        """
+        order = self._topological_order()
+        tasks: Dict[str, asyncio.Task] = {}
+        for name in order:
+            tasks[name] = asyncio.ensure_future(self._run_stage(name, tasks))
+        try:
+            done, pending = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+            return {name: task.result() for name, task in tasks.items()}
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            # Let cancelled stages unwind before returning control to the caller.
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
@@ -26,13 +26,17 @@ Context:
 - Destination Weather Data; OpenWeatherMap API data for the trip's destination.
 '{weather_destination_data}'
 
+- Along-Route Weather; OpenWeatherMap API data sampled at points along the route, in driving order.
+'{route_weather_data}'
+Entries marked "stale": true are the last known values from an earlier lookup because the live service was unavailable; treat them as approximate.
+
 - Preferences; user preferences, including desire to avoid bad weather and interest in including points of interest.
 '{preferences}' 
 ##########################
 Instructions:
 1. Structure the itinerary with clear headings and bullet points for readability.
 2. Summarize the trip in the Itinerary Summary, including purpose, duration, and key highlights.
-3. Provide detailed weather forecasts for origin and destination, highlighting potential impacts (e.g., rain, heat) and recommending specific items (e.g., umbrellas, sunscreen).
+3. Provide detailed weather forecasts for origin, destination and along the route, highlighting potential impacts (e.g., rain, heat) and recommending specific items (e.g., umbrellas, sunscreen).
 4. Include precise route instructions from the route data, emphasizing major turns, tollbooths, and route changes. Add estimated times and distances for each segment.
 5. If preferences include points of interest, suggest relevant attractions or stops along the route, tailored to the user’s interests.
 6. Ensure recommendations are practical, concise, and aligned with the weather and trip context.
@@ -0,0 +1,153 @@
+# src/prompts/compaction.py
+import json
+import logging
+import re
+import numpy as np
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from config import Config
+from src.tools.polyline import decode_polyline, simplify
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tool output that is never useful in a prompt
+_DROPPED_ROUTE_KEYS = ("raw_route_object",)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about four characters per token).
+    """
+    return (len(text) + 3) // 4
+
+def _payload_size(data: Any) -> int:
+    return len(json.dumps(data, default=str).encode("utf-8"))
+
+def _duration_minutes(value: Any) -> Optional[int]:
+    """
+    Convert a Routes API duration ("3600s", timedelta, "1:00:00" or seconds) to whole minutes.
+    """
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        seconds = value.total_seconds()
+    elif isinstance(value, (int, float)):
+        seconds = float(value)
+    elif isinstance(value, str) and re.fullmatch(r"\d+(\.\d+)?s", value.strip()):
+        seconds = float(value.strip()[:-1])
+    elif isinstance(value, str) and re.fullmatch(r"(\d+ days?, )?\d+:\d{2}:\d{2}", value.strip()):
+        days = 0
+        clock = value.strip()
+        if "day" in clock:
+            day_part, clock = clock.split(", ")
+            days = int(day_part.split()[0])
+        hours, minutes, secs = (int(part) for part in clock.split(":"))
+        seconds = days * 86400 + hours * 3600 + minutes * 60 + secs
+    else:
+        return None
+    return int(round(seconds / 60))
+
+def sample_waypoints(encoded: Optional[str], max_points: int) -> List[List[float]]:
+    """
+    Decode `encoded` and simplify it to at most `max_points` vertices, always including the
+    first and last. Douglas-Peucker keeps the turns that shape the route rather than evenly
+    spaced vertices. Coordinates are rounded to ~100 m.
+    """
+    if not encoded or max_points <= 0:
+        return []
+    points = decode_polyline(encoded)
+    if max_points == 1:
+        points = points[:1]
+    else:
+        points = simplify(points, max_points)
+    return np.round(points, 3).tolist()
+
+class CompactionReport:
+    """
+    Bytes and estimated tokens before and after compaction, per stage.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, int]] = {}
+
+    def record(self, stage: str, before: Any, after: Any) -> None:
+        before_bytes = _payload_size(before)
+        after_bytes = _payload_size(after)
+        self.stages[stage] = {
+            "bytes_before": before_bytes,
+            "bytes_after": after_bytes,
+            "tokens_before": (before_bytes + 3) // 4,
+            "tokens_after": (after_bytes + 3) // 4,
+        }
+        logger.info(f"Compacted {stage}: {before_bytes} -> {after_bytes} bytes")
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Per-stage figures plus totals of bytes and tokens saved.
+        """
+        return {
+            "stages": self.stages,
+            "bytes_saved": sum(s["bytes_before"] - s["bytes_after"] for s in self.stages.values()),
+            "tokens_saved": sum(s["tokens_before"] - s["tokens_after"] for s in self.stages.values()),
+        }
+
+def compact_route(route_data: Optional[dict], token_budget: Optional[int] = None, report: Optional[CompactionReport] = None, stage: str = "route") -> Optional[dict]:
+    """
+    Turn `GoogleMapsTool.get_directions` output into a prompt-ready digest.
+
+    Distances become kilometres, durations minutes, polylines a short list of simplified
+    waypoints, and the raw protobuf route is dropped. Keys the compactor does not know
+    are passed through unchanged. If the digest exceeds `token_budget`, waypoints are
+    thinned and then per-leg details dropped until it fits.
+    """
+    if not isinstance(route_data, dict):
+        return route_data
+    token_budget = token_budget if token_budget is not None else Config.ROUTE_DIGEST_TOKEN_BUDGET
+
+    digest = {key: value for key, value in route_data.items() if key not in _DROPPED_ROUTE_KEYS}
+    if "overall_distance_meters" in digest:
+        digest.pop("overall_distance_text", None)
+        digest["distance_km"] = round(digest.pop("overall_distance_meters") / 1000, 1)
+    if "overall_duration_str" in digest or "overall_duration_text" in digest:
+        duration = digest.pop("overall_duration_str", None)
+        duration_text = digest.pop("overall_duration_text", None)
+        digest["duration_min"] = _duration_minutes(duration if duration is not None else duration_text)
+    if "legs_data" in digest:
+        digest["legs"] = [
+            {
+                "distance_km": round((leg.get("distance_meters") or 0) / 1000, 1),
+                "duration_min": _duration_minutes(leg.get("duration_str"))
+            }
+            for leg in digest.pop("legs_data") or []
+        ]
+    max_waypoints = Config.ROUTE_DIGEST_MAX_WAYPOINTS
+    if "overall_polyline" in digest:
+        encoded = digest.pop("overall_polyline")
+        digest["waypoints"] = sample_waypoints(encoded, max_waypoints)
+    else:
+        encoded = None
+
+    # Shrink to the budget: thin waypoints first, then drop per-leg detail.
+    while token_budget and estimate_tokens(json.dumps(digest, default=str)) > token_budget:
+        if len(digest.get("waypoints") or []) > 2:
+            max_waypoints = max(2, max_waypoints // 2)
+            digest["waypoints"] = sample_waypoints(encoded, max_waypoints)
+        elif digest.get("legs"):
+            digest.pop("legs")
+        else:
+            break
+
+    if report is not None:
+        report.record(stage, route_data, digest)
+    return digest
+
+def compact_weather(weather_data: Optional[dict], report: Optional[CompactionReport] = None, stage: str = "weather") -> Optional[dict]:
+    """
+    Drop empty fields from an `OpenWeatherMapTool` result so only the summary reaches the prompt.
+    """
+    if not isinstance(weather_data, dict):
+        return weather_data
+    digest = {key: value for key, value in weather_data.items() if value not in (None, "", [], {})}
+    if report is not None:
+        report.record(stage, weather_data, digest)
+    return digest
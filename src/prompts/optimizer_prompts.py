@@ -16,14 +16,21 @@ Context:
 - Destination Weather Data; OpenWeatherMap API data for the trip’s destination.
 '{weather_destination}'.
 
+- Along-Route Weather; OpenWeatherMap API data sampled at points along the route, in driving order.
+'{route_weather}'.
+Entries marked "stale": true are the last known values from an earlier lookup because the live service was unavailable; treat them as approximate.
+
+- Stop Order; visiting order for the plan's points of interest, computed from driving times and opening hours, with driving minutes from the previous stop.
+'{ordered_stops}'.
+
 - User Preferences; user-specified constraints, including preferences for avoiding bad weather and including points of interest.
 '{preferences}'
 #####################
 Instructions:
 1. Analyze the initial plan and refine it to improve efficiency (e.g., shorter routes, cost-effectuveness) while maintaining user-requested activities.
-2. Adjust the itinerary based on weather data to avoid adverse conditions if the user stated that in preferences (e.g., schedule outdoor activities if weather is sunny or indoor activities if weather is rainy).
+2. Adjust the itinerary based on weather data, including along-route weather, to avoid adverse conditions if the user stated that in preferences (e.g., schedule outdoor activities if weather is sunny or indoor activities if weather is rainy).
 3. Optimize the route using route data, prioritizing safety, time efficiency, and user preferences (e.g., scenic routes if requested).
-4. Include relevant points of interest from preferences, ensuring they align with the route and schedule.
+4. Include relevant points of interest from preferences, ensuring they align with the route and schedule. When a stop order is provided, keep the stops in exactly that order.
 5. Return a JSON object with fields: `optimized_route` (detailed directions with key stops), `travel_time` (in hours/minutes), `weather_conditions` (summary of weather impacts), and `points_of_interest` (optimized suggestions with brief descriptions).
 6. Use a precise, professional tone, ensuring the output is clear and actionable.
 7. Validate that all recommendations are feasible and aligned with user constraints.
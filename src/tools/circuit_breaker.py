@@ -0,0 +1,193 @@
+# src/tools/circuit_breaker.py
+import asyncio
+import logging
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set, TypeVar
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling a dependency whose breaker is open.
+    """
+
+class CircuitBreaker:
+    """
+    Per-dependency circuit breaker.
+
+    Closed: calls go through; consecutive failures and calls slower than `slow_call_seconds`
+    (the latency SLO) both count toward `failure_threshold`, which opens the breaker.
+    Open: calls fail fast with CircuitOpenError for `reset_seconds`. Half-open: one probe call
+    is let through; success closes the breaker, failure or a slow probe opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: Optional[float] = None,
+        reset_seconds: float = 30.0,
+        is_failure: Callable[[BaseException], bool] = lambda e: True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+        # Errors the caller caused (e.g. an unknown city) say nothing about the dependency's health
+        self.is_failure = is_failure
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @classmethod
+    def from_config(cls, name: str, slow_call_seconds: Optional[float], is_failure: Callable[[BaseException], bool] = lambda e: True) -> "CircuitBreaker":
+        return cls(
+            name,
+            failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+            slow_call_seconds=slow_call_seconds,
+            reset_seconds=Config.BREAKER_RESET_SECONDS,
+            is_failure=is_failure
+        )
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+            self._probing = False
+            logger.info(f"Circuit '{self.name}' half-open; next call is a probe")
+        return self._state
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def _open(self, reason: str) -> None:
+        if self._state != OPEN:
+            self.opened += 1
+            logger.warning(f"Circuit '{self.name}' opened after {reason}; failing fast for {self.reset_seconds:.0f}s")
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probing = False
+
+    def record_success(self, seconds: float) -> None:
+        if self.slow_call_seconds and seconds > self.slow_call_seconds:
+            self.record_failure(f"a {seconds:.1f}s call (SLO {self.slow_call_seconds:.1f}s)")
+            return
+        if self._state != CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self._state = CLOSED
+        self._probing = False
+        self.consecutive_failures = 0
+
+    def record_failure(self, reason: str = "an error") -> None:
+        self.consecutive_failures += 1
+        if self._state == HALF_OPEN:
+            self._open(f"a failed probe ({reason})")
+        elif self.consecutive_failures >= self.failure_threshold:
+            self._open(f"{self.consecutive_failures} consecutive failures, the last {reason}")
+
+    async def call(self, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fetch()` through the breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker is open; otherwise whatever `fetch` raises.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        started = self._clock()
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            # Abandoned by the caller; a probe slot is released without a verdict
+            self._probing = False
+            raise
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(type(e).__name__)
+            else:
+                self.record_success(self._clock() - started)
+            raise
+        self.record_success(self._clock() - started)
+        return result
+
+    def metrics(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name: str, slow_call_seconds: Optional[float] = None, is_failure: Callable[[BaseException], bool] = lambda e: True) -> CircuitBreaker:
+    """
+    Return the process-wide breaker for a dependency, so every tool instance calling it shares one state.
+    The first caller's settings win.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker.from_config(name, slow_call_seconds, is_failure)
+            _breakers[name] = breaker
+        return breaker
+
+def reset_circuit_breakers() -> None:
+    """
+    Forget all shared breakers (used by tests and after config changes).
+    """
+    with _breakers_lock:
+        _breakers.clear()
+
+# Background revalidations still running after their caller was served a stale value
+_revalidating: Set[asyncio.Future] = set()
+
+def _discard(future: asyncio.Future) -> None:
+    _revalidating.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Background revalidation failed: {str(future.exception()) or type(future.exception()).__name__}")
+
+async def stale_while_revalidate(refresh: "asyncio.Future[dict]", stale: Optional[dict], budget_seconds: Optional[float], label: str) -> dict:
+    """
+    Wait for `refresh` up to `budget_seconds`, falling back to the last known good value.
+
+    Without a stale value this simply awaits the refresh. With one, the stale value (marked
+    `"stale": True`) is returned if the refresh fails or is still running when the budget runs
+    out; in the latter case the refresh keeps running in the background and updates the caches
+    when it lands. The refresh is never cancelled here, so other callers sharing it are unaffected.
+    """
+    if stale is None:
+        return await asyncio.shield(refresh)
+    done, _ = await asyncio.wait({refresh}, timeout=budget_seconds or None)
+    if done:
+        error = asyncio.CancelledError() if refresh.cancelled() else refresh.exception()
+        if error is None:
+            return refresh.result()
+        logger.warning(f"Serving stale data for '{label}': {str(error) or type(error).__name__}")
+    else:
+        logger.warning(f"Serving stale data for '{label}' after {budget_seconds:.1f}s; revalidating in the background")
+        _revalidating.add(refresh)
+        refresh.add_done_callback(_discard)
+    return {**stale, "stale": True}
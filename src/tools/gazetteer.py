@@ -0,0 +1,213 @@
+# src/tools/gazetteer.py
+import logging
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv")
+
+# US state names; "Washington" or "New York, US" may mean the state, so the city of the same
+# name is only picked when the state code is given too
+_US_STATE_NAMES = frozenset(name.lower() for name in (
+    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut", "Delaware",
+    "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa", "Kansas", "Kentucky",
+    "Louisiana", "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota", "Mississippi",
+    "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire", "New Jersey", "New Mexico",
+    "New York", "North Carolina", "North Dakota", "Ohio", "Oklahoma", "Oregon", "Pennsylvania",
+    "Rhode Island", "South Carolina", "South Dakota", "Tennessee", "Texas", "Utah", "Vermont",
+    "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming"
+))
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _edit_distance(a: str, b: str) -> int:
+    """
+    Optimal string alignment distance: insertions, deletions, substitutions and adjacent transpositions.
+    """
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+def _is_typo(text: str, name: str) -> bool:
+    """
+    True when `text` is a misspelling of `name`: same word count, nearly the same length and at
+    most one edit per six characters. "South San Francisco" or "Oakland Zoo" are other places, not typos.
+    """
+    if len(text.split()) != len(name.split()) or abs(len(text) - len(name)) > 1:
+        return False
+    return _edit_distance(text, name) <= max(1, len(name) // 6)
+
+class GazetteerEntry(NamedTuple):
+    owm_id: int
+    name: str
+    admin: str
+    country: str
+    lat: float
+    lon: float
+
+    @property
+    def canonical_name(self) -> str:
+        """
+        "Name, Admin, Country" (admin omitted when unknown), e.g. "San Francisco, CA, US".
+        """
+        return ", ".join(part for part in (self.name, self.admin, self.country) if part)
+
+class Gazetteer:
+    """
+    Local index of known places for resolving free-form origin/destination strings.
+
+    Rows are stored column-wise in compact arrays (ids, coordinates) with names in
+    plain lists. Lookups use a sorted name index for exact and prefix matches and a
+    trigram index for fuzzy matches, so no network call is needed to resolve a place.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, str, str, str, float, float]]):
+        self._ids = array("q")
+        self._lats = array("d")
+        self._lons = array("d")
+        self._names: List[str] = []
+        self._admins: List[str] = []
+        self._countries: List[str] = []
+        for owm_id, name, admin, country, lat, lon in rows:
+            self._ids.append(int(owm_id))
+            self._names.append(name)
+            self._admins.append(admin.upper())
+            self._countries.append(country.upper())
+            self._lats.append(float(lat))
+            self._lons.append(float(lon))
+
+        keys = [_normalize(name) for name in self._names]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._sorted_keys = [keys[i] for i in order]
+        self._sorted_rows = array("I", order)
+        self._trigram_index: Dict[str, array] = {}
+        for row, key in enumerate(keys):
+            for gram in _trigrams(key):
+                self._trigram_index.setdefault(gram, array("I")).append(row)
+        self._keys = keys
+        logger.info(f"Gazetteer loaded with {len(self)} places")
+
+    @classmethod
+    def load(cls, path: str) -> "Gazetteer":
+        """
+        Load a tab-separated file of `owm_id, name, admin, country, lat, lon` rows; '#' lines are comments.
+        """
+        rows = []
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                owm_id, name, admin, country, lat, lon = line.rstrip("\n").split("\t")
+                rows.append((int(owm_id), name, admin, country, float(lat), float(lon)))
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def entry(self, row: int) -> GazetteerEntry:
+        return GazetteerEntry(self._ids[row], self._names[row], self._admins[row], self._countries[row], self._lats[row], self._lons[row])
+
+    def _exact_rows(self, key: str) -> List[int]:
+        start = bisect_left(self._sorted_keys, key)
+        rows = []
+        while start < len(self._sorted_keys) and self._sorted_keys[start] == key:
+            rows.append(self._sorted_rows[start])
+            start += 1
+        return rows
+
+    def prefix(self, text: str, limit: int = 10) -> List[GazetteerEntry]:
+        """
+        Places whose name starts with `text`, in alphabetical order.
+        """
+        key = _normalize(text)
+        start = bisect_left(self._sorted_keys, key)
+        matches = []
+        while start < len(self._sorted_keys) and self._sorted_keys[start].startswith(key) and len(matches) < limit:
+            matches.append(self.entry(self._sorted_rows[start]))
+            start += 1
+        return matches
+
+    def _matches_qualifiers(self, row: int, qualifiers: List[str]) -> bool:
+        if not all(q in (self._admins[row], self._countries[row]) for q in qualifiers):
+            return False
+        # "Washington" or "Washington, US" may be the state; only a state qualifier settles it
+        if self._countries[row] == "US" and self._keys[row] in _US_STATE_NAMES:
+            return self._admins[row] in qualifiers
+        return True
+
+    def resolve(self, place: str, min_similarity: float = 0.55, fuzzy: bool = True) -> Optional[GazetteerEntry]:
+        """
+        Resolve "City", "City, CC" or "City, ST, CC" to a known place.
+
+        Exact name matches win. Otherwise, when `fuzzy`, a trigram candidate above `min_similarity`
+        (Jaccard) is accepted only if the input is a small typo of its name (see `_is_typo`), so
+        "South San Francisco" or "Sacramento Zoo" are not mapped onto a city centre.
+        State/country qualifiers must match when given.
+
+        Returns:
+            The matching GazetteerEntry, or None if the place is unknown, ambiguous or only similar.
+        """
+        if not place or not place.strip():
+            return None
+        parts = [part.strip() for part in place.split(",") if part.strip()]
+        key = _normalize(parts[0])
+        qualifiers = [part.upper() for part in parts[1:]]
+
+        rows = [row for row in self._exact_rows(key) if self._matches_qualifiers(row, qualifiers)]
+        if len(rows) == 1:
+            return self.entry(rows[0])
+        if len(rows) > 1:
+            logger.info(f"Gazetteer: '{place}' is ambiguous ({len(rows)} matches)")
+            return None
+        if not fuzzy:
+            return None
+
+        grams = _trigrams(key)
+        scores: Dict[int, int] = {}
+        for gram in grams:
+            for row in self._trigram_index.get(gram, ()):
+                scores[row] = scores.get(row, 0) + 1
+        best_row, best_score = None, 0.0
+        for row, shared in scores.items():
+            if not self._matches_qualifiers(row, qualifiers):
+                continue
+            similarity = shared / (len(grams) + len(_trigrams(self._keys[row])) - shared)
+            if similarity > best_score:
+                best_row, best_score = row, similarity
+        if best_row is not None and best_score >= min_similarity and _is_typo(key, self._keys[best_row]):
+            return self.entry(best_row)
+        return None
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """
+    Return the process-wide gazetteer loaded from Config.GAZETTEER_PATH, or None when disabled.
+    """
+    global _gazetteer
+    if not Config.GAZETTEER_ENABLED:
+        return None
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer.load(Config.GAZETTEER_PATH or DEFAULT_GAZETTEER_PATH)
+        return _gazetteer
@@ -1,67 +1,258 @@
 import logging
 import asyncio 
+import copy
+import hashlib
 import os     
+import numpy as np
+from datetime import timedelta
 from google.maps import routing_v2
 from google.protobuf import field_mask_pb2
+from google.type import latlng_pb2
+from config import Config
+from src.cache.lru_cache import TTLCache
+from src.cache.disk_cache import SQLiteCache
+from src.cache.tiered_cache import TieredCache
+from src.tools.circuit_breaker import CircuitBreaker, get_circuit_breaker, stale_while_revalidate
+from src.tools.gazetteer import Gazetteer, get_gazetteer
+from src.tools.openweathermap_tool import normalize_city
+from typing import Collection, Dict, List, NamedTuple, Optional, Tuple
 from google.api_core.client_options import ClientOptions # If explicit API key for client is needed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ROUTE_FIELD_MASK = ",".join([
+    "routes.legs.steps", # For turn-by-turn (if needed, can be verbose)
+    "routes.legs.polyline", # Polyline for each leg
+    "routes.legs.distance_meters",
+    "routes.legs.duration",
+    "routes.distance_meters", # Overall route distance
+    "routes.duration",        # Overall route duration
+    "routes.polyline.encoded_polyline", # Overall route polyline
+    # "routes.travel_advisory.toll_info" # If you need toll information (might require billing SKU upgrade)
+])
+
+MATRIX_FIELD_MASK = "originIndex,destinationIndex,status,condition,distanceMeters,duration"
+
+class RouteMatrix(NamedTuple):
+    """
+    Dense origin x destination matrices; NaN where no route was found or the element failed.
+    """
+    durations_s: np.ndarray
+    distances_m: np.ndarray
+
+def build_route_cache() -> Optional[TieredCache]:
+    """
+    Build the route cache from Config, or return None when caching is disabled.
+    """
+    if not Config.ROUTE_CACHE_ENABLED:
+        return None
+    memory = TTLCache(max_entries=Config.ROUTE_CACHE_MAX_ENTRIES, default_ttl=Config.ROUTE_CACHE_TTL_SECONDS)
+    disk = None
+    if Config.ROUTE_CACHE_PATH:
+        disk = SQLiteCache(
+            Config.ROUTE_CACHE_PATH,
+            max_entries=Config.ROUTE_CACHE_DISK_MAX_ENTRIES,
+            default_ttl=Config.ROUTE_CACHE_TTL_SECONDS
+        )
+    return TieredCache(memory, disk)
+
+def _is_outage(error: BaseException) -> bool:
+    # "No routes found" is an answer about the places, not a sign that the Routes API is unhealthy
+    return not isinstance(error, ValueError)
+
+def _duration_str(value) -> Optional[str]:
+    """
+    Routes API durations as "<seconds>s", whether the client hands back a timedelta or a string.
+    """
+    if isinstance(value, timedelta):
+        return f"{int(value.total_seconds())}s"
+    return str(value) if value is not None else None
+
+def _duration_seconds(value) -> Optional[float]:
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, str) and value.endswith("s"):
+        return float(value[:-1])
+    return None
+
+def _matrix_blocks(n_origins: int, n_destinations: int, max_elements: int, max_waypoints: int) -> Tuple[int, int]:
+    """
+    Origin and destination block sizes whose product stays within `max_elements` and whose sum
+    stays within `max_waypoints`, the Routes API limits for one matrix request.
+    """
+    destination_block = max(1, min(n_destinations, max_elements, max_waypoints - 1))
+    origin_block = max(1, min(n_origins, max_elements // destination_block, max_waypoints - destination_block))
+    return origin_block, destination_block
+
 class GoogleMapsTool:
-    def __init__(self):
-        try:
-            # Alternatively, to be explicit if the env var isn't picked up as expected:
-            api_key = os.getenv("GOOGLE_MAPS_API_KEY") 
-            if api_key:
-                client_options = ClientOptions(api_key = api_key)
-                self.client = routing_v2.RoutesClient(client_options = client_options)
-            else:
-                 # Fallback to default (ADC or other auto-discovery)
-                self.client = routing_v2.RoutesClient()
+    def __init__(self, gazetteer: Optional[Gazetteer] = None, cache: Optional[TieredCache] = None, breaker: Optional[CircuitBreaker] = None):
+        # Known places are sent as coordinates, skipping server-side geocoding of the address
+        self.gazetteer = gazetteer if gazetteer is not None else get_gazetteer()
+        # Routes between the same places rarely change, so results are kept in memory and on disk
+        self.cache = cache if cache is not None else build_route_cache()
+        # Last known good routes, served when the Routes API is down or slower than its SLO
+        self.stale = TTLCache(max_entries=Config.ROUTE_CACHE_MAX_ENTRIES, default_ttl=Config.ROUTE_STALE_TTL_SECONDS)
+        self.breaker = breaker if breaker is not None else get_circuit_breaker(
+            "routes", Config.ROUTE_LATENCY_SLO_SECONDS, is_failure=_is_outage
+        )
+        # Alternatively, to be explicit if the env var isn't picked up as expected:
+        api_key = os.getenv("GOOGLE_MAPS_API_KEY") 
+        # Fallback to default (ADC or other auto-discovery) when no key is set
+        self.client_options = ClientOptions(api_key = api_key) if api_key else None
+        # The async client's gRPC channel belongs to the event loop it was opened on, so it is
+        # created lazily and kept for the life of that loop
+        self._client: Optional[routing_v2.RoutesAsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def async_client(self) -> routing_v2.RoutesAsyncClient:
+        """
+        Return the Routes API async client for the running event loop, creating it if needed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            if self._client is not None:
+                logger.warning("Event loop changed; opening a new Routes API channel")
+            try:
+                self._client = routing_v2.RoutesAsyncClient(client_options = self.client_options)
+                self._client_loop = loop
                 logger.info("Routes API client initialized successfully.")
+            except Exception as e:
+                logger.error(f"Failed to initialize Routes API client: {str(e)}")
+                raise
+        return self._client
+
+    def _concurrency_limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(Config.ROUTES_MAX_CONCURRENCY)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def warm_up(self, timeout: Optional[float] = None) -> bool:
+        """
+        Open the gRPC channel ahead of the first request so it doesn't pay for connection setup.
+
+        Best effort: failures are logged and the channel connects on first use instead.
+
+        Returns:
+            True if the channel is ready.
+        """
+        timeout = Config.ROUTES_WARMUP_TIMEOUT_SECONDS if timeout is None else timeout
+        try:
+            channel = self.async_client().transport.grpc_channel
+            await asyncio.wait_for(channel.channel_ready(), timeout=timeout)
+            logger.info("Routes API channel ready")
+            return True
         except Exception as e:
-            logger.error(f"Failed to initialize Routes API client: {str(e)}")
-            raise
+            logger.warning(f"Routes API warm-up did not complete: {str(e) or type(e).__name__}")
+            return False
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.transport.close()
+        self._client = None
+        self._client_loop = None
+
+    def _waypoint(self, place: str, resolve: bool = True) -> routing_v2.types.Waypoint:
+        """
+        Waypoint for `place`: coordinates when the gazetteer knows it (and `resolve` is set), otherwise the address string.
+        """
+        entry = self.gazetteer.resolve(place) if self.gazetteer is not None and resolve else None
+        if entry is None:
+            return routing_v2.types.Waypoint(address=place)
+        logger.info(f"Resolved '{place}' locally to {entry.canonical_name} ({entry.lat}, {entry.lon})")
+        return routing_v2.types.Waypoint(
+            location=routing_v2.types.Location(lat_lng=latlng_pb2.LatLng(latitude=entry.lat, longitude=entry.lon))
+        )
+
+    def _place_key(self, place: str) -> str:
+        # Exact gazetteer hits only: a fuzzy match must never let one place share another's cached routes
+        entry = self.gazetteer.resolve(place, fuzzy=False) if self.gazetteer is not None else None
+        return f"id:{entry.owm_id}" if entry is not None else normalize_city(place)
+
+    def cache_key(self, origin: str, destination: str, travel_mode: int = routing_v2.types.RouteTravelMode.DRIVE, field_mask: str = ROUTE_FIELD_MASK) -> str:
+        """
+        Cache key for a route: normalized origin and destination, travel mode and a digest of the field mask.
+        """
+        mask_digest = hashlib.sha256(field_mask.encode("utf-8")).hexdigest()[:12]
+        return f"{self._place_key(origin)}|{self._place_key(destination)}|{int(travel_mode)}|{mask_digest}"
+
+    def cache_stats(self) -> dict:
+        stats = self.cache.stats() if self.cache is not None else {}
+        return {**stats, "breaker": self.breaker.metrics()}
+
+    async def get_directions(self, origin: str, destination: str, traffic_aware: Optional[bool] = None) -> dict:
+        """
+        Fetch driving directions between two places.
 
-    async def get_directions(self, origin: str, destination: str) -> dict:
+        Results are cached for Config.ROUTE_CACHE_TTL_SECONDS in memory and on disk, keyed by the
+        normalized places, travel mode and field mask. Traffic-aware requests (Config.ROUTE_TRAFFIC_AWARE
+        or `traffic_aware=True`) reflect current conditions, so they bypass the cache. When the Routes
+        API is failing or slower than Config.ROUTE_LATENCY_SLO_SECONDS, a previously fetched route
+        is returned with `"stale": True` and the request finishes in the background.
+
+        Returns:
+            JSON-serializable dictionary with overall and per-leg distances, durations ("<seconds>s")
+            and encoded polylines.
+        """
+        traffic_aware = Config.ROUTE_TRAFFIC_AWARE if traffic_aware is None else traffic_aware
+        travel_mode = routing_v2.types.RouteTravelMode.DRIVE
+        use_cache = self.cache is not None and not traffic_aware
+        key = self.cache_key(origin, destination, travel_mode)
+        if use_cache:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                logger.info(f"Route cache hit for '{origin}' -> '{destination}'")
+                return copy.deepcopy(cached)
+
+        async def refresh() -> dict:
+            route_data = await self.breaker.call(lambda: self._compute_route(origin, destination, travel_mode, traffic_aware))
+            if use_cache:
+                await self.cache.aset(key, route_data)
+            self.stale.set(key, route_data)
+            return route_data
+
+        stale = self.stale.get(key)
+        if stale is None:
+            # Nothing to fall back to: await the call directly so cancelling the caller cancels the RPC
+            route_data = await refresh()
+        else:
+            route_data = await stale_while_revalidate(
+                asyncio.ensure_future(refresh()), stale, Config.ROUTE_LATENCY_SLO_SECONDS, f"{origin} -> {destination}"
+            )
+        return copy.deepcopy(route_data)
+
+    async def _compute_route(self, origin: str, destination: str, travel_mode: int, traffic_aware: bool) -> dict:
         try:
             logger.info(f"Fetching directions from '{origin}' to '{destination}' using Routes API.")
             request = routing_v2.types.ComputeRoutesRequest(
-                origin=routing_v2.types.Waypoint(address=origin),
-                destination=routing_v2.types.Waypoint(address=destination),
-                travel_mode=routing_v2.types.RouteTravelMode.DRIVE,
+                origin=self._waypoint(origin),
+                destination=self._waypoint(destination),
+                travel_mode=travel_mode,
                 # I can add other parameters here, for example:
-                # routing_preference=routing_v2.types.RoutingPreference.TRAFFIC_AWARE,
                 # compute_alternative_routes=False,
                 # language_code="en-US",
                 # units=routing_v2.types.Units.METRIC, # Or IMPERIAL
             )
+            if traffic_aware:
+                request.routing_preference = routing_v2.types.RoutingPreference.TRAFFIC_AWARE
 
-            field_mask_paths = [
-                "routes.legs.steps", # For turn-by-turn (if needed, can be verbose)
-                "routes.legs.polyline", # Polyline for each leg
-                "routes.legs.distance_meters",
-                "routes.legs.duration",
-                "routes.distance_meters", # Overall route distance
-                "routes.duration",        # Overall route duration
-                "routes.polyline.encoded_polyline", # Overall route polyline
-                # "routes.travel_advisory.toll_info" # If you need toll information (might require billing SKU upgrade)
-            ]
-            field_mask_str = ",".join(field_mask_paths)
-
-            # The compute_routes method is synchronous.
-            # We run it in a separate thread to avoid blocking the asyncio event loop.
-            response = await asyncio.to_thread(
-                self.client.compute_routes,
-                request=request,
-                metadata=[
-                    ('x-goog-fieldmask', field_mask_str)
-                    # The API key should be handled by the client (ADC or GOOGLE_API_KEY env var).
-                    # If you still face auth issues, you might need to add it here explicitly:
-                    # ('x-goog-api-key', os.getenv("GOOGLE_MAPS_API_KEY"))
-                ]
-            )
+            # Native async call on the long-lived channel: no worker thread per request, and
+            # cancelling the awaiting task (e.g. the orchestrator giving up) cancels the RPC.
+            async with self._concurrency_limit():
+                response = await self.async_client().compute_routes(
+                    request=request,
+                    metadata=[
+                        ('x-goog-fieldmask', ROUTE_FIELD_MASK)
+                        # The API key should be handled by the client (ADC or GOOGLE_API_KEY env var).
+                        # If you still face auth issues, you might need to add it here explicitly:
+                        # ('x-goog-api-key', os.getenv("GOOGLE_MAPS_API_KEY"))
+                    ],
+                    timeout=Config.ROUTE_TIMEOUT_SECONDS
+                )
 
             if not response.routes:
                 logger.warning(f"No routes found from '{origin}' to '{destination}'.")
@@ -72,12 +263,7 @@ class GoogleMapsTool:
             route = response.routes[0]
 
             distance_meters = route.distance_meters
-            duration_seconds_str = route.duration # Format is "123s" (e.g., "3600s")
-
-            # For compatibility and clarity:
-            # The old structure: directions[0]["legs"][0]["distance"]["text"]
-            # The new structure gives overall route.distance_meters and route.duration
-            # and also route.legs[i].distance_meters and route.legs[i].duration
+            duration_seconds_str = _duration_str(route.duration) # Format is "123s" (e.g., "3600s")
 
             # Create a more structured leg representation
             parsed_legs = []
@@ -86,32 +272,122 @@ class GoogleMapsTool:
                     parsed_leg = {
                         "distance_meters": leg.distance_meters,
                         "distance_text": f"{leg.distance_meters / 1000:.1f} km", # Example formatting
-                        "duration_str": leg.duration, # e.g., "300s"
-                        "duration_text": leg.duration, # You might want to parse "300s" to "5 mins"
+                        "duration_str": _duration_str(leg.duration), # e.g., "300s"
+                        "duration_text": _duration_str(leg.duration), # You might want to parse "300s" to "5 mins"
                         "polyline": leg.polyline.encoded_polyline if leg.polyline else None,
                         "steps": [] # You can populate steps here if needed from leg.steps
                     }
-                    # For example, to add simplified step instructions:
-                    # for step in leg.steps:
-                    #    parsed_leg["steps"].append({
-                    #        "instruction": step.navigation_instruction.instructions if step.navigation_instruction else "N/A",
-                    #        "distance_meters": step.distance_meters,
-                    #        "duration": step.duration,
-                    #    })
                     parsed_legs.append(parsed_leg)
 
-
+            # Plain, JSON-serializable data only: the protobuf route is not kept, so results can be cached on disk
             return {
                 "overall_distance_meters": distance_meters,
                 "overall_distance_text": f"{distance_meters / 1000:.1f} km", # Example formatting
                 "overall_duration_str": duration_seconds_str, # e.g., "3600s"
                 "overall_duration_text": duration_seconds_str, # You might want to parse this for "1 hour" etc.
                 "overall_polyline": route.polyline.encoded_polyline if route.polyline else None,
-                "legs_data": parsed_legs, # Detailed data for each leg
-                "raw_route_object": route # For access to all underlying protobuf data if needed
+                "legs_data": parsed_legs # Detailed data for each leg
             }
 
         except Exception as e:
             logger.error(f"Error fetching directions using Routes API: {str(e)}", exc_info=True)
             # Consider re-raising a custom error or handling it based on your application's needs
-            raise
\ No newline at end of file
+            raise
+
+    async def get_route_matrix(self, origins: List[str], destinations: List[str], addresses: Collection[str] = ()) -> RouteMatrix:
+        """
+        Driving duration and distance between every origin and destination.
+
+        Pairs are served from the route cache where possible. The rest go to the Routes API matrix
+        endpoint in blocks within Config.ROUTE_MATRIX_MAX_ELEMENTS elements and
+        Config.ROUTE_MATRIX_MAX_WAYPOINTS waypoints per request, sent concurrently.
+
+        Args:
+            origins: Place strings.
+            destinations: Place strings.
+            addresses: Places to send as given, never through the city gazetteer (e.g. points of interest).
+
+        Returns:
+            RouteMatrix with (len(origins), len(destinations)) arrays of seconds and metres.
+        """
+        travel_mode = routing_v2.types.RouteTravelMode.DRIVE
+        durations = np.full((len(origins), len(destinations)), np.nan)
+        distances = np.full((len(origins), len(destinations)), np.nan)
+        keys = {
+            (i, j): self.cache_key(origin, destination, travel_mode, MATRIX_FIELD_MASK)
+            for i, origin in enumerate(origins)
+            for j, destination in enumerate(destinations)
+        }
+        # One batched lookup, so the disk tier is read off the event loop in a single trip
+        found = await self.cache.aget_many(keys.values()) if self.cache is not None else {}
+        missing = set()
+        for (i, j), key in keys.items():
+            cached = found.get(key)
+            if cached is None:
+                missing.add((i, j))
+            elif cached["duration_s"] is not None:
+                durations[i, j], distances[i, j] = cached["duration_s"], cached["distance_m"]
+        if not missing:
+            logger.info(f"Route matrix {durations.shape} served from cache")
+            return RouteMatrix(durations, distances)
+
+        origin_rows = sorted({i for i, _ in missing})
+        destination_cols = sorted({j for _, j in missing})
+        origin_block, destination_block = _matrix_blocks(
+            len(origin_rows), len(destination_cols), Config.ROUTE_MATRIX_MAX_ELEMENTS, Config.ROUTE_MATRIX_MAX_WAYPOINTS
+        )
+        blocks = []
+        for a in range(0, len(origin_rows), origin_block):
+            for b in range(0, len(destination_cols), destination_block):
+                rows = origin_rows[a:a + origin_block]
+                cols = destination_cols[b:b + destination_block]
+                if any((i, j) in missing for i in rows for j in cols):
+                    blocks.append((rows, cols))
+        logger.info(f"Route matrix {durations.shape}: {len(missing)} pairs missing from cache, {len(blocks)} request(s)")
+
+        def compute_block(rows: List[int], cols: List[int]):
+            return self.breaker.call(lambda: self._compute_matrix_block([origins[i] for i in rows], [destinations[j] for j in cols], travel_mode, addresses))
+
+        results = await asyncio.gather(*(compute_block(rows, cols) for rows, cols in blocks))
+        fresh = {}
+        for (rows, cols), elements in zip(blocks, results):
+            for (a, b), element in elements.items():
+                i, j = rows[a], cols[b]
+                if element["duration_s"] is not None:
+                    durations[i, j], distances[i, j] = element["duration_s"], element["distance_m"]
+                if element["cacheable"]:
+                    fresh[keys[i, j]] = {"duration_s": element["duration_s"], "distance_m": element["distance_m"]}
+        if self.cache is not None:
+            await self.cache.aset_many(fresh)
+        return RouteMatrix(durations, distances)
+
+    async def _compute_matrix_block(self, origins: List[str], destinations: List[str], travel_mode: int, addresses: Collection[str] = ()) -> Dict[Tuple[int, int], dict]:
+        """
+        One compute_route_matrix call. Elements stream back in any order and are keyed by their
+        (origin, destination) index within the block. Failed elements are not cacheable.
+        """
+        try:
+            request = routing_v2.types.ComputeRouteMatrixRequest(
+                origins=[routing_v2.types.RouteMatrixOrigin(waypoint=self._waypoint(origin, origin not in addresses)) for origin in origins],
+                destinations=[routing_v2.types.RouteMatrixDestination(waypoint=self._waypoint(destination, destination not in addresses)) for destination in destinations],
+                travel_mode=travel_mode
+            )
+            elements = {}
+            async with self._concurrency_limit():
+                stream = await self.async_client().compute_route_matrix(
+                    request=request,
+                    metadata=[('x-goog-fieldmask', MATRIX_FIELD_MASK)],
+                    timeout=Config.ROUTE_TIMEOUT_SECONDS
+                )
+                async for element in stream:
+                    failed = bool(element.status and element.status.code)
+                    found = not failed and element.condition == routing_v2.types.RouteMatrixElementCondition.ROUTE_EXISTS
+                    elements[element.origin_index, element.destination_index] = {
+                        "duration_s": _duration_seconds(element.duration) if found else None,
+                        "distance_m": float(element.distance_meters) if found else None,
+                        "cacheable": not failed
+                    }
+            return elements
+        except Exception as e:
+            logger.error(f"Error computing route matrix using Routes API: {str(e)}", exc_info=True)
+            raise
@@ -0,0 +1,252 @@
+# src/tools/google_search_tool.py
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+import numpy as np
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+from config import Config
+from src.tools.geohash import geohash_bounds, geohash_encode
+from src.tools.http_client import PooledHTTPClient, get_http_client
+from src.tools.polyline import distance_to_line, sample_by_distance
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PLACES_FIELD_MASK = ",".join([
+    "places.id",
+    "places.displayName",
+    "places.formattedAddress",
+    "places.location",
+    "places.rating",
+    "places.types",
+    "places.regularOpeningHours.weekdayDescriptions",
+])
+
+class POIIndex:
+    """
+    Points of interest bucketed by geohash cell, plus the set of cells already searched.
+
+    A covered cell with no POIs is a known empty area, not a miss, so repeated corridors are
+    answered entirely from the index. The index persists to a JSON file when `path` is set.
+    """
+
+    def __init__(self, precision: int, path: Optional[str] = None):
+        self.precision = precision
+        self.path = path
+        self.buckets: Dict[str, List[dict]] = {}
+        self.covered: Dict[str, float] = {}
+        self._ids = set()
+
+    @classmethod
+    def load(cls, path: str, precision: int) -> "POIIndex":
+        """
+        Load an index file (`{"pois": [...], "covered": {cell: fetched_at}}`); a missing file gives an empty index.
+        """
+        index = cls(precision, path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                data = json.load(handle)
+            index.add(data.get("pois", []))
+            index.covered = {cell: fetched_at for cell, fetched_at in data.get("covered", {}).items() if len(cell) == precision}
+            logger.info(f"POI index loaded with {len(index)} places in {len(index.covered)} searched cells")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, pois: Iterable[dict], cells: Iterable[str] = ()) -> None:
+        """
+        Add POIs (deduplicated by id) to the bucket of their own location and mark `cells` as searched.
+        """
+        for poi in pois:
+            if poi["id"] in self._ids:
+                continue
+            self._ids.add(poi["id"])
+            cell = geohash_encode(poi["lat"], poi["lon"], self.precision)
+            self.buckets.setdefault(cell, []).append(poi)
+        now = time.time()
+        for cell in cells:
+            self.covered[cell] = now
+
+    def is_covered(self, cell: str, ttl: Optional[float] = None) -> bool:
+        fetched_at = self.covered.get(cell)
+        return fetched_at is not None and (not ttl or time.time() - fetched_at < ttl)
+
+    def query(self, cells: Iterable[str]) -> List[dict]:
+        return [poi for cell in cells for poi in self.buckets.get(cell, [])]
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump({"pois": [poi for bucket in self.buckets.values() for poi in bucket], "covered": self.covered}, handle)
+        os.replace(temporary, self.path)
+
+def corridor_cells(line: np.ndarray, corridor_km: float, precision: int) -> List[str]:
+    """
+    Geohash cells that cover every point within `corridor_km` of the line, in route order.
+    """
+    samples = sample_by_distance(line, max(corridor_km, 1.0))
+    cells = []
+    for lat, lon in samples:
+        d_lat = corridor_km / 111.0
+        d_lon = corridor_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        for dy in (-d_lat, 0.0, d_lat):
+            for dx in (-d_lon, 0.0, d_lon):
+                cell = geohash_encode(lat + dy, lon + dx, precision)
+                if cell not in cells:
+                    cells.append(cell)
+    return cells
+
+class GoogleSearchTool:
+    """
+    Points of interest along a route corridor from the Google Places API (Text Search),
+    served from a local geohash index once an area has been searched.
+    """
+
+    def __init__(self, index: Optional[POIIndex] = None, http_client: Optional[PooledHTTPClient] = None, offline: bool = False):
+        self.api_key = Config.GOOGLE_MAPS_API_KEY
+        self.search_url = "https://places.googleapis.com/v1/places:searchText"
+        self.index = index if index is not None else POIIndex.load(Config.POI_INDEX_PATH, Config.POI_GEOHASH_PRECISION)
+        self.http_client = http_client or get_http_client()
+        # Offline: answer from the index only (e.g. a fixture dataset), never call the API
+        self.offline = offline
+        self.network_calls = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Cell searches in flight, kept referenced until they finish
+        self._background: Set[asyncio.Future] = set()
+        # One search per cell at a time: concurrent corridors over the same cell share it
+        self._cell_searches: Dict[str, asyncio.Future] = {}
+        self._cell_searches_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def search_corridor(self, line: Sequence[Sequence[float]], limit: Optional[int] = None, weekday: Optional[int] = None, wait_seconds: Optional[float] = None) -> List[dict]:
+        """
+        Best-rated points of interest within Config.POI_CORRIDOR_KM of a route.
+
+        Args:
+            line: (lat, lng) points along the route, e.g. the route digest's waypoints.
+            limit: Maximum number of POIs (defaults to Config.POI_MAX_RESULTS).
+            weekday: Day whose opening hours are reported, 0 = Monday (defaults to today).
+            wait_seconds: How long to wait for Places when the index misses cells (None waits for
+                all of them). On timeout the answer comes from what the index already holds and the
+                searches finish in the background, filling the index for next time.
+
+        Returns:
+            POI dictionaries (`name`, `address`, `lat`, `lon`, `rating`, `types`, `opening_hours`,
+            `detour_km`), best rated first among those kept, then listed in route order.
+        """
+        limit = limit or Config.POI_MAX_RESULTS
+        weekday = date.today().weekday() if weekday is None else weekday
+        line = np.asarray(line, dtype=float).reshape(-1, 2)
+        if len(line) == 0:
+            return []
+        cells = corridor_cells(line, Config.POI_CORRIDOR_KM, self.index.precision)
+        missing = [cell for cell in cells if not self.index.is_covered(cell, Config.POI_CACHE_TTL_SECONDS)]
+        if missing and not self.offline:
+            logger.info(f"POI index covers {len(cells) - len(missing)}/{len(cells)} corridor cells; searching the rest")
+            # Never cancelled from here, so an abandoned search still fills the index
+            search = asyncio.ensure_future(self._search_cells(missing))
+            self._background.add(search)
+            search.add_done_callback(self._background.discard)
+            done, _ = await asyncio.wait({search}, timeout=wait_seconds)
+            if not done:
+                logger.info(f"POI search still running after {wait_seconds:.1f}s; answering from the index")
+
+        candidates = self.index.query(cells)
+        if not candidates:
+            return []
+        coordinates = np.array([[poi["lat"], poi["lon"]] for poi in candidates])
+        detours, progress = distance_to_line(coordinates, line)
+        within = np.flatnonzero(detours <= Config.POI_CORRIDOR_KM)
+        best = sorted(within, key=lambda i: (-(candidates[i].get("rating") or 0), progress[i]))[:limit]
+        return [
+            {
+                **{key: value for key, value in candidates[i].items() if key != "weekday_hours"},
+                "opening_hours": self._hours_on(candidates[i], weekday),
+                "detour_km": round(float(detours[i]), 1)
+            }
+            for i in sorted(best, key=lambda i: progress[i])
+        ]
+
+    @staticmethod
+    def _hours_on(poi: dict, weekday: int) -> Optional[str]:
+        # Places lists weekdayDescriptions Monday first; older index entries only have one day's hours
+        weekday_hours = poi.get("weekday_hours") or []
+        return weekday_hours[weekday] if weekday < len(weekday_hours) else poi.get("opening_hours")
+
+    def _concurrency_limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(Config.POI_MAX_CONCURRENCY)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _search_cells(self, cells: List[str]) -> None:
+        await asyncio.gather(*(self._shared_cell_search(cell) for cell in cells))
+        self.index.save()
+
+    def _shared_cell_search(self, cell: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self._cell_searches_loop is not loop:
+            self._cell_searches = {}
+            self._cell_searches_loop = loop
+        search = self._cell_searches.get(cell)
+        if search is None:
+            search = asyncio.ensure_future(self._search_cell(cell))
+            self._cell_searches[cell] = search
+            search.add_done_callback(lambda _: self._cell_searches.pop(cell, None))
+        return search
+
+    async def _search_cell(self, cell: str) -> None:
+        """
+        Text Search restricted to one geohash cell; results are added to the index and the cell marked searched.
+        Failures are logged and leave the cell unsearched so it is retried next time.
+        """
+        lat_min, lat_max, lon_min, lon_max = geohash_bounds(cell)
+        body = {
+            "textQuery": Config.POI_SEARCH_QUERY,
+            "maxResultCount": 20,
+            "locationRestriction": {"rectangle": {
+                "low": {"latitude": lat_min, "longitude": lon_min},
+                "high": {"latitude": lat_max, "longitude": lon_max}
+            }}
+        }
+        headers = {"X-Goog-Api-Key": self.api_key, "X-Goog-FieldMask": PLACES_FIELD_MASK}
+        try:
+            async with self._concurrency_limit():
+                self.network_calls += 1
+                async with self.http_client.session().post(self.search_url, json=body, headers=headers) as response:
+                    if response.status >= 400:
+                        text = await response.text()
+                        logger.error(f"HTTP error searching places in cell '{cell}': {response.status} - {text}")
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+        except Exception as e:
+            logger.warning(f"POI search failed for cell '{cell}': {str(e) or type(e).__name__}")
+            return
+        pois = [self._parse(place) for place in data.get("places", []) if place.get("location")]
+        self.index.add(pois, cells=[cell])
+        logger.info(f"Indexed {len(pois)} places in cell '{cell}'")
+
+    def _parse(self, place: dict) -> dict:
+        hours = (place.get("regularOpeningHours") or {}).get("weekdayDescriptions") or []
+        return {
+            "id": place["id"],
+            "name": (place.get("displayName") or {}).get("text"),
+            "address": place.get("formattedAddress"),
+            "lat": place["location"]["latitude"],
+            "lon": place["location"]["longitude"],
+            "rating": place.get("rating"),
+            "types": place.get("types", [])[:3],
+            # Monday first, e.g. "Monday: 9:00 AM – 5:00 PM" -> "9:00 AM – 5:00 PM"
+            "weekday_hours": [description.split(": ", 1)[-1] for description in hours]
+        }
@@ -0,0 +1,72 @@
+# src/tools/http_client.py
+import asyncio
+import logging
+import threading
+from typing import Optional
+import aiohttp
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class PooledHTTPClient:
+    """
+    Shared aiohttp session with a bounded, keep-alive connection pool.
+
+    aiohttp sessions belong to the event loop they were created on, so the session is
+    created lazily on first use and recreated if the caller is running on a different loop.
+    """
+
+    def __init__(self, pool_size: int, pool_size_per_host: int, timeout_seconds: float, keepalive_seconds: float):
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        self.keepalive_seconds = keepalive_seconds
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_config(cls) -> "PooledHTTPClient":
+        return cls(
+            pool_size=Config.HTTP_POOL_SIZE,
+            pool_size_per_host=Config.HTTP_POOL_SIZE_PER_HOST,
+            timeout_seconds=Config.HTTP_TIMEOUT_SECONDS,
+            keepalive_seconds=Config.HTTP_KEEPALIVE_SECONDS
+        )
+
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Return the session for the running event loop, creating it if needed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed:
+                logger.warning("Event loop changed; opening a new HTTP connection pool")
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_seconds
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._loop = loop
+            logger.info(f"HTTP connection pool opened (limit={self.pool_size}, per_host={self.pool_size_per_host})")
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+_shared_client: Optional[PooledHTTPClient] = None
+_shared_lock = threading.Lock()
+
+def get_http_client() -> PooledHTTPClient:
+    """
+    Return the process-wide pooled HTTP client built from Config.
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = PooledHTTPClient.from_config()
+        return _shared_client
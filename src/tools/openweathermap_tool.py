@@ -1,46 +1,275 @@
-import requests
+import aiohttp
+import asyncio
+import re
 from config import Config
+from src.cache.lru_cache import TTLCache
+from src.tools.circuit_breaker import CircuitBreaker, get_circuit_breaker, stale_while_revalidate
+from src.tools.http_client import PooledHTTPClient, get_http_client
+from src.tools.gazetteer import Gazetteer, GazetteerEntry, get_gazetteer
 import logging
-import asyncio
+from typing import Dict, List, NamedTuple, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Statuses that mean "this city will not resolve", worth remembering for a short while
+_NEGATIVE_CACHE_STATUSES = (400, 404)
+
+def normalize_city(city: str) -> str:
+    """
+    Canonical cache key for a city string: lower-case, single spaces, no spaces around commas.
+    "San Francisco,CA,US" and " san  francisco, CA, US " both become "san francisco,ca,us".
+    """
+    parts = [re.sub(r"\s+", " ", part).strip() for part in city.lower().split(",")]
+    return ",".join(part for part in parts if part)
+
+def _is_outage(error: BaseException) -> bool:
+    # An unknown city is the caller's problem, not a sign that OpenWeatherMap is unhealthy
+    return not (isinstance(error, aiohttp.ClientResponseError) and error.status in _NEGATIVE_CACHE_STATUSES)
+
+class _NegativeEntry(NamedTuple):
+    """
+    A remembered "this city will not resolve" answer. Only the failure details are cached; every
+    negative hit raises a fresh ClientResponseError, so callers never share one exception object.
+    """
+    status: int
+    message: str
+    request_info: aiohttp.RequestInfo
+
+    @classmethod
+    def from_error(cls, error: aiohttp.ClientResponseError) -> "_NegativeEntry":
+        return cls(error.status, error.message, error.request_info)
+
+    def error(self) -> aiohttp.ClientResponseError:
+        return aiohttp.ClientResponseError(self.request_info, (), status=self.status, message=self.message)
+
 class OpenWeatherMapTool:
-    def __init__(self):
+    def __init__(self, http_client: Optional[PooledHTTPClient] = None, cache: Optional[TTLCache] = None, gazetteer: Optional[Gazetteer] = None, breaker: Optional[CircuitBreaker] = None):
         self.api_key = Config.OPENWEATHERMAP_API_KEY
         self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+        self.group_url = "http://api.openweathermap.org/data/2.5/group"
+        # Shared keep-alive connection pool instead of a fresh connection per lookup
+        self.http_client = http_client or get_http_client()
+        # Conditions change on the order of tens of minutes, so recent lookups are reused
+        self.cache = cache if cache is not None else TTLCache(
+            max_entries=Config.WEATHER_CACHE_MAX_ENTRIES,
+            default_ttl=Config.WEATHER_CACHE_TTL_SECONDS
+        )
+        # Resolve known places locally so lookups go by OpenWeatherMap city id
+        self.gazetteer = gazetteer if gazetteer is not None else get_gazetteer()
+        self.negative_ttl = Config.WEATHER_NEGATIVE_CACHE_TTL_SECONDS
+        # Last known good values, kept well past the cache TTL, served when the API is down or slow
+        self.stale = TTLCache(max_entries=Config.WEATHER_CACHE_MAX_ENTRIES, default_ttl=Config.WEATHER_STALE_TTL_SECONDS)
+        self.breaker = breaker if breaker is not None else get_circuit_breaker(
+            "openweathermap", Config.WEATHER_LATENCY_SLO_SECONDS, is_failure=_is_outage
+        )
+        self.negative_hits = 0
+        self._in_flight: Dict[str, asyncio.Future] = {}
         if not self.api_key:
             logger.error("OpenWeatherMap API Key is not configured!")
             raise ValueError("OpenWeatherMap API Key is missing.")
 
+    def cache_stats(self) -> dict:
+        stats = self.cache.stats()
+        stats["negative_hits"] = self.negative_hits
+        stats["breaker"] = self.breaker.metrics()
+        return stats
+
+    def _parse(self, city: str, data: dict) -> dict:
+        return {
+            "city": city,
+            "temperature": data["main"]["temp"],
+            "weather": data["weather"][0]["description"],
+            "humidity": data["main"]["humidity"],
+            "country": data.get("sys", {}).get("country") # Adding country for context
+        }
+
+    def resolve_city(self, city: str) -> Optional[GazetteerEntry]:
+        return self.gazetteer.resolve(city) if self.gazetteer is not None else None
+
+    def cache_key(self, city: str, place: Optional[GazetteerEntry] = None) -> str:
+        """
+        Cache key for a city: its OpenWeatherMap id when resolved locally, else the normalized string.
+        """
+        return f"id:{place.owm_id}" if place is not None else normalize_city(city)
+
     async def get_weather_forecast(self, city: str) -> dict:
         """
         For best results, city should be in the format "CityName,CountryCode"
         e.g., "San Francisco,US" or "London,GB".
         For US cities, "CityName,StateCode,CountryCode" (e.g., "San Francisco,CA,US") might also work.
+
+        Results are cached per normalized city for Config.WEATHER_CACHE_TTL_SECONDS; unknown
+        cities are remembered for Config.WEATHER_NEGATIVE_CACHE_TTL_SECONDS and fail fast.
+        Concurrent lookups of the same city share one request. Cities found in the local
+        gazetteer are fetched by id, so differently spelled names of one place share a cache entry.
+        When the API is failing or slower than Config.WEATHER_LATENCY_SLO_SECONDS, a previously
+        fetched result is returned with `"stale": True` instead.
+        """
+        place = self.resolve_city(city)
+        params = {"id": place.owm_id} if place is not None else {"q": city}
+        weather = await self._lookup(self.cache_key(city, place), city, params)
+        return {**weather, "city": city}
+
+    async def get_weather_by_coordinates(self, lat: float, lon: float) -> dict:
+        """
+        Current weather at a coordinate, e.g. a sample point along a route.
+
+        Callers should snap coordinates to a coarse grid first (see `src.tools.polyline.snap_to_grid`)
+        so nearby points share a cache entry. Cached like city lookups.
+
+        Returns:
+            Weather dictionary with the nearest place name under `city` plus `lat` and `lon`.
+        """
+        lat, lon = round(float(lat), 4), round(float(lon), 4)
+        weather = await self._lookup(f"cell:{lat},{lon}", f"{lat},{lon}", {"lat": lat, "lon": lon})
+        return {**weather, "lat": lat, "lon": lon}
+
+    async def _lookup(self, key: str, label: str, params: dict) -> dict:
+        """
+        Serve `key` from cache, or fetch it, sharing one request between concurrent callers.
+        If a last known good value exists, wait at most the latency SLO before falling back to it.
         """
-        logger.info(f"Attempting to fetch weather for city: '{city}'")
+        cached = self.cache.get(key)
+        if isinstance(cached, _NegativeEntry):
+            self.negative_hits += 1
+            logger.info(f"Weather negative cache hit for '{label}'")
+            raise cached.error()
+        if cached is not None:
+            logger.info(f"Weather cache hit for '{label}'")
+            return cached
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(self._fetch_and_cache(key, label, params))
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # The lookup is shielded, so one caller's cancellation doesn't cancel it for the others
+        return await stale_while_revalidate(in_flight, self.stale.get(key), Config.WEATHER_LATENCY_SLO_SECONDS, label)
+
+    async def _fetch_and_cache(self, key: str, label: str, params: dict) -> dict:
+        try:
+            weather = await self.breaker.call(lambda: self._fetch(label, params))
+        except aiohttp.ClientResponseError as e:
+            if e.status in _NEGATIVE_CACHE_STATUSES:
+                self.cache.set(key, _NegativeEntry.from_error(e), ttl=self.negative_ttl)
+            raise
+        self.cache.set(key, weather)
+        self.stale.set(key, weather)
+        return weather
+
+    async def _fetch(self, label: str, params: dict) -> dict:
+        logger.info(f"Attempting to fetch weather for: '{label}'")
         try:
-            params = {"q": city, "appid": self.api_key, "units": "metric"}
-            response = await asyncio.to_thread(
-                requests.get, self.base_url, params = params
-            )
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"Successfully fetched weather for '{city}': {data['weather'][0]['description']}, Temp: {data['main']['temp']}°C")
-            return {
-                "city": city,
-                "temperature": data["main"]["temp"],
-                "weather": data["weather"][0]["description"],
-                "humidity": data["main"]["humidity"],
-                "country": data.get("sys", {}).get("country") # Adding country for context
-            }
+            params = {**params, "appid": self.api_key, "units": "metric"}
+            async with self.http_client.session().get(self.base_url, params=params) as response:
+                if response.status >= 400:
+                    body = await response.text()
+                    logger.error(f"HTTP error fetching weather data for '{label}': {response.status} - {body}")
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            logger.info(f"Successfully fetched weather for '{label}': {data['weather'][0]['description']}, Temp: {data['main']['temp']}°C")
+            return self._parse(data.get("name") or label, data)
         
-        except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error fetching weather data for '{city}': {http_err.response.status_code} - {http_err.response.text}")
+        except aiohttp.ClientResponseError:
+            # Already logged with the response body above
             # You could raise a custom error or return a specific dict indicating failure
             raise # Re-raise the error to be caught by the agent/orchestrator
         except Exception as e:
-            logger.error(f"Generic error fetching weather data for '{city}': {str(e)}", exc_info=True)
+            logger.error(f"Generic error fetching weather data for '{label}': {str(e)}", exc_info=True)
             raise
+
+    async def get_weather_many(self, cities: List[str]) -> List[Optional[dict]]:
+        """
+        Fetch weather for several cities with as few round trips as possible.
+
+        Inputs are deduplicated by cache key and served from cache where possible. Cities the
+        gazetteer resolves are fetched through the group endpoint in chunks of
+        Config.WEATHER_GROUP_CHUNK_SIZE ids; the rest use single lookups, at most
+        Config.WEATHER_MAX_CONCURRENCY at a time.
+
+        Returns:
+            One result per input city, in input order; None where the lookup failed.
+        """
+        unique: Dict[str, tuple] = {}
+        for city in cities:
+            place = self.resolve_city(city)
+            unique.setdefault(self.cache_key(city, place), (city, place))
+
+        results: Dict[str, Optional[dict]] = {}
+        grouped, single = [], []
+        for key, (city, place) in unique.items():
+            cached = self.cache.get(key)
+            if isinstance(cached, _NegativeEntry):
+                self.negative_hits += 1
+                results[key] = None
+            elif cached is not None:
+                results[key] = cached
+            elif place is not None:
+                grouped.append((key, city, place))
+            else:
+                single.append((key, city))
+
+        chunk_size = Config.WEATHER_GROUP_CHUNK_SIZE
+        chunks = [grouped[i:i + chunk_size] for i in range(0, len(grouped), chunk_size)]
+        for chunk_results in await asyncio.gather(*(self._fetch_group(chunk) for chunk in chunks)):
+            for key, weather in chunk_results.items():
+                if weather is None:
+                    # Not returned by the group endpoint; retry as a single lookup
+                    single.append((key, unique[key][0]))
+                else:
+                    results[key] = weather
+
+        semaphore = asyncio.Semaphore(Config.WEATHER_MAX_CONCURRENCY)
+
+        async def fetch_one(key: str, city: str) -> None:
+            async with semaphore:
+                try:
+                    results[key] = await self.get_weather_forecast(city)
+                except Exception as e:
+                    logger.warning(f"Weather lookup failed for '{city}': {str(e) or type(e).__name__}")
+                    results[key] = None
+
+        await asyncio.gather(*(fetch_one(key, city) for key, city in single))
+
+        ordered = []
+        for city in cities:
+            weather = results.get(self.cache_key(city, self.resolve_city(city)))
+            ordered.append({**weather, "city": city} if weather is not None else None)
+        return ordered
+
+    async def _fetch_group(self, chunk: List[tuple]) -> Dict[str, Optional[dict]]:
+        """
+        Fetch one chunk of resolved cities via the group endpoint and cache each result.
+
+        Returns:
+            Mapping of cache key to weather, with None for cities the response did not include
+            (or for the whole chunk if the request failed).
+        """
+        ids = ",".join(str(place.owm_id) for _, _, place in chunk)
+        logger.info(f"Fetching weather for {len(chunk)} cities in one group request")
+        params = {"id": ids, "appid": self.api_key, "units": "metric"}
+
+        async def fetch() -> dict:
+            async with self.http_client.session().get(self.group_url, params=params) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+        try:
+            data = await self.breaker.call(fetch)
+        except Exception as e:
+            logger.warning(f"Group weather request failed, falling back to single lookups: {str(e) or type(e).__name__}")
+            return {key: None for key, _, _ in chunk}
+
+        by_id = {item.get("id"): item for item in data.get("list", [])}
+        results = {}
+        for key, city, place in chunk:
+            item = by_id.get(place.owm_id)
+            if item is None:
+                results[key] = None
+                continue
+            weather = self._parse(city, item)
+            self.cache.set(key, weather)
+            self.stale.set(key, weather)
+            results[key] = weather
+        return results
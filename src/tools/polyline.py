@@ -0,0 +1,261 @@
+# src/tools/polyline.py
+import heapq
+import numpy as np
+from typing import Optional, Tuple
+
+# Mean Earth radius used for haversine distances
+EARTH_RADIUS_KM = 6371.0088
+
+def decode_polyline(encoded: str, precision: int = 5) -> np.ndarray:
+    """
+    Decode a Google encoded polyline into an (N, 2) array of (lat, lng).
+
+    The whole string is decoded with array operations rather than a per-character loop, so
+    polylines with tens of thousands of vertices decode in a few milliseconds.
+
+    Args:
+        encoded: Encoded polyline string, e.g. from the Routes API `encoded_polyline`.
+        precision: Number of decimal places encoded (5 for Google polylines).
+
+    Returns:
+        Float array of shape (N, 2) with latitude and longitude columns.
+
+    Raises:
+        ValueError: If the string is truncated or not a valid polyline.
+    """
+    if not encoded:
+        return np.empty((0, 2))
+    chars = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if chars.min() < 0 or chars.max() > 0x3F:
+        raise ValueError("Invalid character in encoded polyline")
+    # Each value is a run of 5-bit chunks, little-end first; the last chunk has the 0x20 bit clear
+    ends = np.flatnonzero(chars < 0x20)
+    if ends.size == 0 or ends[-1] != chars.size - 1 or ends.size % 2:
+        raise ValueError("Truncated encoded polyline")
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    offsets = np.arange(chars.size) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((chars & 0x1F) << (5 * offsets), starts)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision
+
+def cumulative_distances(points: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distance in kilometres from the first point to each point along the line.
+
+    Args:
+        points: Array of shape (N, 2) with latitude and longitude in degrees.
+
+    Returns:
+        Array of shape (N,), starting at 0.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.empty(0)
+    lat, lng = np.radians(points[:, 0]), np.radians(points[:, 1])
+    dlat, dlng = np.diff(lat), np.diff(lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlng / 2) ** 2
+    segments = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return np.concatenate(([0.0], np.cumsum(segments)))
+
+def sample_by_distance(points: np.ndarray, spacing_km: float, max_samples: Optional[int] = None) -> np.ndarray:
+    """
+    Points every `spacing_km` along the line, interpolated between vertices, plus the end point.
+
+    Args:
+        points: Array of shape (N, 2) with latitude and longitude in degrees.
+        spacing_km: Distance between samples.
+        max_samples: If set and the spacing would yield more, samples are spread evenly instead.
+
+    Returns:
+        Array of shape (M, 2), starting at the first point and ending at the last.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) < 2:
+        return points.copy()
+    distances = cumulative_distances(points)
+    total = distances[-1]
+    if spacing_km <= 0 or total == 0:
+        targets = np.array([0.0, total])
+    else:
+        targets = np.arange(0.0, total, spacing_km)
+        targets = np.append(targets, total)
+    if max_samples and len(targets) > max_samples:
+        targets = np.linspace(0.0, total, max(max_samples, 2))
+    return np.column_stack((
+        np.interp(targets, distances, points[:, 0]),
+        np.interp(targets, distances, points[:, 1])
+    ))
+
+def snap_to_grid(points: np.ndarray, cell_degrees: float) -> np.ndarray:
+    """
+    Snap points to the centres of a `cell_degrees` grid and drop repeats, keeping route order.
+
+    Nearby samples land in the same cell, so they can share one lookup and one cache entry.
+
+    Returns:
+        Array of shape (K, 2) with one row per distinct cell, in order of first appearance.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0 or cell_degrees <= 0:
+        return points.copy()
+    cells = np.round(np.round(points / cell_degrees) * cell_degrees, 6)
+    _, first = np.unique(cells, axis=0, return_index=True)
+    return cells[np.sort(first)]
+
+def encode_polyline(points: np.ndarray, precision: int = 5) -> str:
+    """
+    Encode (lat, lng) points as a Google encoded polyline; the inverse of `decode_polyline`.
+
+    Args:
+        points: Array-like of shape (N, 2) with latitude and longitude.
+        precision: Number of decimal places to keep (5 for Google polylines).
+
+    Returns:
+        Encoded polyline string.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) == 0:
+        return ""
+    scaled = np.round(points * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    # Split every value into 5-bit chunks, set the continuation bit on all but its last chunk
+    shifts = 5 * np.arange(max(1, (int(values.max()).bit_length() + 4) // 5))
+    chunks = (values[:, None] >> shifts) & 0x1F
+    counts = 1 + np.count_nonzero((values[:, None] >> shifts[1:]) > 0, axis=1)
+    positions = np.arange(len(shifts))
+    chars = chunks | np.where(positions < (counts - 1)[:, None], 0x20, 0)
+    return (chars[positions < counts[:, None]] + 63).astype(np.uint8).tobytes().decode("ascii")
+
+def _project(points: np.ndarray) -> np.ndarray:
+    """
+    Equirectangular projection to kilometres, accurate enough for comparing deviations along a route.
+    """
+    mean_lat = np.radians(points[:, 0].mean())
+    return np.radians(points) * EARTH_RADIUS_KM * np.array([1.0, np.cos(mean_lat)])
+
+def _segment_distances(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """
+    Distance from each of `points` to the segment from `start` to `end` (all projected).
+    """
+    direction = end - start
+    length_sq = direction @ direction
+    if length_sq == 0:
+        return np.hypot(*(points - start).T)
+    t = np.clip((points - start) @ direction / length_sq, 0.0, 1.0)
+    return np.hypot(*(points - (start + t[:, None] * direction)).T)
+
+def distance_to_line(points: np.ndarray, line: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distance from each point to a line, and how far along the line its closest point is.
+
+    Uses the same equirectangular projection as `simplify`, which is accurate to well under
+    a percent over a route corridor.
+
+    Args:
+        points: Array of shape (M, 2) with latitude and longitude.
+        line: Array of shape (N, 2), N >= 1, with latitude and longitude.
+
+    Returns:
+        Two arrays of shape (M,): distance to the line and position along it, both in kilometres.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    line = np.asarray(line, dtype=float).reshape(-1, 2)
+    if len(line) == 1:
+        line = np.vstack((line, line))
+    projected = _project(np.vstack((line, points)))
+    xy_line, xy_points = projected[:len(line)], projected[len(line):]
+    starts, directions = xy_line[:-1], np.diff(xy_line, axis=0)
+    lengths_sq = np.einsum("ij,ij->i", directions, directions)
+    # (M, S): clamp each point's projection onto every segment
+    offsets = xy_points[:, None, :] - starts[None, :, :]
+    t = np.einsum("msj,sj->ms", offsets, directions) / np.where(lengths_sq > 0, lengths_sq, 1)
+    t = np.clip(t, 0.0, 1.0)
+    distances = np.linalg.norm(offsets - t[..., None] * directions[None, :, :], axis=-1)
+    nearest = np.argmin(distances, axis=1)
+    rows = np.arange(len(xy_points))
+    segment_starts = np.concatenate(([0.0], np.cumsum(np.sqrt(lengths_sq))))[:-1]
+    progress = segment_starts[nearest] + t[rows, nearest] * np.sqrt(lengths_sq[nearest])
+    return distances[rows, nearest], progress
+
+def _douglas_peucker(xy: np.ndarray, max_vertices: int) -> np.ndarray:
+    # Ranked Douglas-Peucker: always split the segment whose farthest vertex deviates most,
+    # until the vertex budget is spent. Equivalent to classic DP with the tightest tolerance
+    # that still fits in `max_vertices`.
+    keep = [0, len(xy) - 1]
+    heap = []
+
+    def push(first: int, last: int) -> None:
+        if last - first < 2:
+            return
+        distances = _segment_distances(xy[first + 1:last], xy[first], xy[last])
+        farthest = int(np.argmax(distances))
+        heapq.heappush(heap, (-distances[farthest], first, last, first + 1 + farthest))
+
+    push(0, len(xy) - 1)
+    while heap and len(keep) < max_vertices:
+        deviation, first, last, split = heapq.heappop(heap)
+        if deviation == 0:
+            break
+        keep.append(split)
+        push(first, split)
+        push(split, last)
+    return np.sort(np.array(keep))
+
+def _visvalingam(xy: np.ndarray, max_vertices: int) -> np.ndarray:
+    # Visvalingam-Whyatt: repeatedly drop the vertex whose triangle with its neighbours has the
+    # smallest area, updating the neighbours' areas as vertices disappear. Initial areas are
+    # vectorized; the removal loop works on plain floats, which beats per-vertex NumPy calls.
+    n = len(xy)
+    a, b, c = xy[:-2], xy[1:-1], xy[2:]
+    initial = np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])) / 2
+    areas = [float("inf")] + initial.tolist() + [float("inf")]
+    x, y = xy[:, 0].tolist(), xy[:, 1].tolist()
+    previous = list(range(-1, n - 1))
+    following = list(range(1, n + 1))
+    heap = [(area, index) for index, area in enumerate(areas[1:-1], start=1)]
+    heapq.heapify(heap)
+    removed = [False] * n
+    remaining = n
+    while heap and remaining > max_vertices:
+        area, index = heapq.heappop(heap)
+        if removed[index] or area != areas[index]:
+            continue  # Stale entry, superseded by a later update
+        removed[index] = True
+        remaining -= 1
+        before, after = previous[index], following[index]
+        following[before], previous[after] = after, before
+        for neighbour in (before, after):
+            if 0 < neighbour < n - 1:
+                p, q = previous[neighbour], following[neighbour]
+                updated = abs((x[neighbour] - x[p]) * (y[q] - y[p]) - (x[q] - x[p]) * (y[neighbour] - y[p])) / 2
+                # Never let a neighbour's area drop below the one just removed
+                areas[neighbour] = max(updated, area)
+                heapq.heappush(heap, (areas[neighbour], neighbour))
+    return np.flatnonzero(~np.array(removed))
+
+def simplify(points: np.ndarray, max_vertices: int, method: str = "douglas_peucker") -> np.ndarray:
+    """
+    Reduce a line to at most `max_vertices` vertices while keeping its shape, always keeping both ends.
+
+    Args:
+        points: Array-like of shape (N, 2) with latitude and longitude.
+        max_vertices: Target vertex count (at least 2 for lines with two or more points).
+        method: "douglas_peucker" (keeps the points of greatest deviation) or "visvalingam"
+            (drops the points that contribute the least area).
+
+    Returns:
+        Array of shape (M, 2), M <= max(max_vertices, 2), a subset of the input in original order.
+
+    Raises:
+        ValueError: For an unknown method.
+    """
+    if method not in ("douglas_peucker", "visvalingam"):
+        raise ValueError(f"Unknown simplification method: {method}")
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    max_vertices = max(int(max_vertices), 2)
+    if len(points) <= max_vertices:
+        return points.copy()
+    xy = _project(points)
+    keep = _douglas_peucker(xy, max_vertices) if method == "douglas_peucker" else _visvalingam(xy, max_vertices)
+    return points[keep]
@@ -0,0 +1,306 @@
+# src/tools/record_replay.py
+import aiohttp
+import asyncio
+import atexit
+import contextlib
+import gzip
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import time
+import numpy as np
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, NamedTuple, Optional
+from config import Config
+from src.llm_integration.llm_client import LLMClient
+from src.tools.google_maps_tool import GoogleMapsTool, RouteMatrix
+from src.tools.google_search_tool import GoogleSearchTool
+from src.tools.openweathermap_tool import OpenWeatherMapTool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ReplayMiss(KeyError):
+    """
+    Raised in replay mode when a call has no recording; the cassette never falls through to the network.
+    """
+
+class ReplayedError(RuntimeError):
+    """
+    A recorded failure whose original exception type can't be rebuilt on replay.
+    """
+
+class Intercept(NamedTuple):
+    """
+    One external call captured by a cassette: `owner.method` is replaced while the cassette is active.
+    """
+    owner: type
+    method: str
+    kind: str
+    # (instance, bound arguments) -> JSON-serializable request description used for the fingerprint
+    describe: Callable[[Any, dict], Any]
+    encode: Callable[[Any], Any] = lambda value: value
+    decode: Callable[[Any], Any] = lambda value: value
+
+def _arguments(instance: Any, arguments: dict) -> dict:
+    return arguments
+
+def _encode_matrix(matrix: RouteMatrix) -> dict:
+    return {"durations_s": matrix.durations_s.tolist(), "distances_m": matrix.distances_m.tolist()}
+
+def _decode_matrix(data: dict) -> RouteMatrix:
+    return RouteMatrix(np.array(data["durations_s"], dtype=float), np.array(data["distances_m"], dtype=float))
+
+INTERCEPTS = [
+    # The client's cache key already covers the model, its settings and the prompt
+    Intercept(LLMClient, "generate", "llm", lambda client, arguments: client.cache_key(arguments["prompt"])),
+    Intercept(LLMClient, "stream", "llm_stream", lambda client, arguments: client.cache_key(arguments["prompt"])),
+    Intercept(GoogleMapsTool, "get_directions", "directions", _arguments),
+    Intercept(GoogleMapsTool, "get_route_matrix", "route_matrix", _arguments, _encode_matrix, _decode_matrix),
+    Intercept(OpenWeatherMapTool, "get_weather_forecast", "weather", _arguments),
+    Intercept(OpenWeatherMapTool, "get_weather_by_coordinates", "weather_point", _arguments),
+    # One /group request per chunk of gazetteer-resolved cities, identified by their cache keys
+    Intercept(OpenWeatherMapTool, "_fetch_group", "weather_group", lambda tool, arguments: [key for key, _, _ in arguments["chunk"]]),
+    # How long the caller waits is not part of the request
+    Intercept(GoogleSearchTool, "search_corridor", "pois", lambda tool, arguments: {k: v for k, v in arguments.items() if k != "wait_seconds"}),
+]
+
+def _json_default(value: Any) -> Any:
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+def _error_entry(error: Exception) -> dict:
+    """
+    Recording of a failed call: its type and arguments, so replay raises the same kind of error.
+    """
+    entry = {"error": f"{type(error).__name__}: {str(error)}", "error_type": f"{type(error).__module__}:{type(error).__qualname__}"}
+    if isinstance(error, aiohttp.ClientResponseError):
+        entry["error_response"] = {
+            "status": error.status,
+            "message": error.message,
+            "method": error.request_info.method,
+            "url": str(error.request_info.real_url)
+        }
+    else:
+        entry["error_args"] = json.loads(json.dumps(list(error.args), default=_json_default))
+    return entry
+
+def _exception_type(name: Optional[str]) -> Optional[type]:
+    module_name, _, qualname = (name or "").partition(":")
+    try:
+        value = importlib.import_module(module_name)
+        for attribute in qualname.split("."):
+            value = getattr(value, attribute)
+    except (ImportError, AttributeError, ValueError):
+        return None
+    return value if isinstance(value, type) and issubclass(value, Exception) else None
+
+def replayed_error(entry: dict) -> Exception:
+    """
+    The recorded exception rebuilt with its original type (e.g. a ValueError, or an aiohttp
+    ClientResponseError with its status), or ReplayedError when that type can't be rebuilt.
+    """
+    error_type = _exception_type(entry.get("error_type"))
+    response = entry.get("error_response")
+    try:
+        if error_type is not None and response is not None and issubclass(error_type, aiohttp.ClientResponseError):
+            request_info = aiohttp.RequestInfo(URL(response["url"]), response["method"], CIMultiDictProxy(CIMultiDict()), URL(response["url"]))
+            return error_type(request_info, (), status=response["status"], message=response["message"])
+        if error_type is not None:
+            return error_type(*entry.get("error_args", []))
+    except Exception:
+        pass
+    return ReplayedError(entry["error"])
+
+def fingerprint(kind: str, request: Any) -> str:
+    """
+    Stable digest of a call: the kind plus its canonical JSON request description.
+    """
+    canonical = json.dumps([kind, request], sort_keys=True, separators=(",", ":"), default=_json_default)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+class Cassette:
+    """
+    Records external calls (LLM completions, routes, weather, POI searches) with their observed
+    latency, or replays them from a gzip-compressed JSON Lines fixture without any network access.
+
+    While `activate()` is in effect the methods listed in INTERCEPTS are patched on their classes,
+    so every instance, including shared registry clients, goes through the cassette. Each entry is
+    keyed by a fingerprint of the request; repeated identical calls replay their recordings in
+    order, and the last one is reused once they run out. Responses served from a tool's own cache
+    while recording are recorded with that (short) latency, so disable caches for a cold-start recording.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", simulate_latency: bool = True, latency_scale: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+        self.entries: Dict[str, List[dict]] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self._cursors: Dict[str, int] = {}
+        self._originals: Dict[Intercept, Callable] = {}
+        if mode == "replay":
+            self.load()
+
+    @classmethod
+    def from_config(cls) -> Optional["Cassette"]:
+        """
+        Cassette configured by Config.REPLAY_MODE ("record" or "replay"), or None when it is "off".
+        """
+        if Config.REPLAY_MODE == "off":
+            return None
+        return cls(
+            Config.REPLAY_CASSETTE_PATH,
+            mode=Config.REPLAY_MODE,
+            simulate_latency=Config.REPLAY_SIMULATE_LATENCY,
+            latency_scale=Config.REPLAY_LATENCY_SCALE
+        )
+
+    def load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["fingerprint"], []).append(entry)
+        logger.info(f"Loaded {sum(len(entries) for entries in self.entries.values())} recorded calls from {self.path}")
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8") as handle:
+            # Copies: background calls may still be recording while a long-lived cassette saves
+            for entries in list(self.entries.values()):
+                for entry in list(entries):
+                    handle.write(json.dumps(entry, separators=(",", ":"), default=_json_default) + "\n")
+        os.replace(temporary, self.path)
+        logger.info(f"Saved {self.recorded} recorded calls to {self.path}")
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "recorded": self.recorded, "replayed": self.replayed, "fingerprints": len(self.entries)}
+
+    def _record(self, key: str, kind: str, entry: dict) -> None:
+        self.entries.setdefault(key, []).append({"fingerprint": key, "kind": kind, **entry})
+        self.recorded += 1
+
+    def _next(self, key: str, kind: str) -> dict:
+        entries = self.entries.get(key)
+        if not entries:
+            raise ReplayMiss(f"No recorded {kind} call with fingerprint {key}")
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = cursor + 1
+        self.replayed += 1
+        return entries[min(cursor, len(entries) - 1)]
+
+    async def _wait(self, seconds: float) -> None:
+        if self.simulate_latency and seconds > 0:
+            await asyncio.sleep(seconds * self.latency_scale)
+
+    def _wrap(self, intercept: Intercept, original: Callable) -> Callable:
+        cassette = self
+        signature = inspect.signature(original)
+
+        def key_for(instance: Any, args: tuple, kwargs: dict) -> str:
+            bound = signature.bind(instance, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in list(bound.arguments.items())[1:]}
+            return fingerprint(intercept.kind, intercept.describe(instance, arguments))
+
+        if inspect.isasyncgenfunction(original):
+            async def stream(instance, *args, **kwargs) -> AsyncIterator[Any]:
+                key = key_for(instance, args, kwargs)
+                if cassette.mode == "replay":
+                    entry = cassette._next(key, intercept.kind)
+                    elapsed = 0.0
+                    for offset, chunk in entry.get("chunks", []):
+                        await cassette._wait(offset - elapsed)
+                        elapsed = offset
+                        yield intercept.decode(chunk)
+                    if "error" in entry:
+                        raise replayed_error(entry)
+                    return
+                started = time.perf_counter()
+                chunks = []
+                try:
+                    async for chunk in original(instance, *args, **kwargs):
+                        chunks.append([round(time.perf_counter() - started, 4), intercept.encode(chunk)])
+                        yield chunk
+                except Exception as e:
+                    cassette._record(key, intercept.kind, {"chunks": chunks, **_error_entry(e)})
+                    raise
+                cassette._record(key, intercept.kind, {"chunks": chunks})
+            return stream
+
+        async def call(instance, *args, **kwargs) -> Any:
+            key = key_for(instance, args, kwargs)
+            if cassette.mode == "replay":
+                entry = cassette._next(key, intercept.kind)
+                await cassette._wait(entry["latency_s"])
+                if "error" in entry:
+                    raise replayed_error(entry)
+                return intercept.decode(entry["response"])
+            started = time.perf_counter()
+            try:
+                response = await original(instance, *args, **kwargs)
+            except Exception as e:
+                # Cancellations (timeouts upstream) are not failures of the dependency and are not recorded
+                cassette._record(key, intercept.kind, {"latency_s": round(time.perf_counter() - started, 4), **_error_entry(e)})
+                raise
+            cassette._record(key, intercept.kind, {"latency_s": round(time.perf_counter() - started, 4), "response": intercept.encode(response)})
+            return response
+        return call
+
+    def start(self) -> "Cassette":
+        """
+        Patch the intercepted methods until `stop()`; for a cassette that lives as long as the process.
+        """
+        if self._originals:
+            raise RuntimeError("Cassette is already active")
+        for intercept in INTERCEPTS:
+            original = getattr(intercept.owner, intercept.method)
+            self._originals[intercept] = original
+            setattr(intercept.owner, intercept.method, self._wrap(intercept, original))
+        logger.info(f"Cassette active in {self.mode} mode ({self.path})")
+        return self
+
+    def stop(self) -> None:
+        """
+        Restore the intercepted methods; a recording is saved.
+        """
+        for intercept, original in self._originals.items():
+            setattr(intercept.owner, intercept.method, original)
+        self._originals.clear()
+        if self.mode == "record":
+            self.save()
+        logger.info(f"Cassette deactivated: {self.stats()}")
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["Cassette"]:
+        """
+        Patch the intercepted methods for the duration of the block; a recording is saved on exit.
+        """
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+
+def start_cassette_from_config() -> Optional[Cassette]:
+    """
+    Start the cassette selected by Config.REPLAY_MODE for the rest of the process, or return None
+    when it is "off". A recording is saved when the process exits.
+    """
+    cassette = Cassette.from_config()
+    if cassette is not None:
+        cassette.start()
+        if cassette.mode == "record":
+            atexit.register(cassette.stop)
+    return cassette
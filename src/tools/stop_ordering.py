@@ -0,0 +1,164 @@
+# src/tools/stop_ordering.py
+import logging
+import re
+import time
+import numpy as np
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cost of one second of arriving after a stop closes, relative to one second of driving
+LATENESS_PENALTY = 10.0
+# Stand-in for pairs with no route, large enough that the solver avoids them
+UNREACHABLE_SECONDS = 1e7
+
+_TIME_PATTERN = re.compile(r"\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*", re.IGNORECASE)
+_HOURS_PATTERN = re.compile(
+    r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|–|to)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?",
+    re.IGNORECASE
+)
+
+class StopOrder(NamedTuple):
+    """
+    Visiting order over matrix indices, starting at the start index and ending at the end index.
+    """
+    order: List[int]
+    duration_s: float
+    lateness_s: float
+
+def _minutes(hour: str, minute: Optional[str], meridiem: Optional[str]) -> int:
+    hour = int(hour) % 24
+    if meridiem and meridiem.lower() == "pm" and hour < 12:
+        hour += 12
+    elif meridiem and meridiem.lower() == "am" and hour == 12:
+        hour = 0
+    return hour * 60 + int(minute or 0)
+
+def parse_time_of_day(text: Optional[str]) -> Optional[int]:
+    """
+    Parse a time such as "09:00", "9am" or "17" into minutes after midnight, or None.
+    """
+    match = _TIME_PATTERN.fullmatch(str(text)) if text else None
+    return _minutes(*match.groups()) if match else None
+
+def parse_opening_hours(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Parse opening hours such as "09:00-17:00", "9am - 5pm", "9-5" or "10 to 18" into minutes after midnight.
+
+    Returns:
+        (open, close) in minutes, or None if the text has no recognizable range.
+    """
+    match = _HOURS_PATTERN.search(str(text)) if text else None
+    if match is None:
+        return None
+    opens = _minutes(*match.group(1, 2, 3))
+    closes = _minutes(*match.group(4, 5, 6))
+    if not match.group(3) and not match.group(6) and closes <= opens and opens < 12 * 60 and closes < 12 * 60:
+        closes += 12 * 60  # "9-5" means 9am to 5pm
+    if closes <= opens:
+        closes += 24 * 60  # Open past midnight
+    return opens, closes
+
+def _schedule(order: Sequence[int], durations: np.ndarray, dwell: np.ndarray, windows: Optional[np.ndarray]) -> Tuple[float, float]:
+    """
+    Simulate the trip: drive, wait for a stop to open if early, stay `dwell` seconds.
+
+    Returns:
+        Total elapsed seconds and total lateness (arrivals after closing) in seconds.
+    """
+    clock = lateness = 0.0
+    for previous, current in zip(order, order[1:]):
+        clock += durations[previous, current]
+        if windows is not None:
+            opens, closes = windows[current]
+            if clock < opens:
+                clock = opens
+            elif clock > closes:
+                lateness += clock - closes
+        clock += dwell[current]
+    return clock, lateness
+
+def _nearest_neighbour(durations: np.ndarray, start: int, end: int) -> List[int]:
+    remaining = [index for index in range(len(durations)) if index not in (start, end)]
+    order = [start]
+    while remaining:
+        nearest = min(remaining, key=lambda index: durations[order[-1], index])
+        order.append(nearest)
+        remaining.remove(nearest)
+    order.append(end)
+    return order
+
+def order_stops(
+    durations: np.ndarray,
+    start: int = 0,
+    end: Optional[int] = None,
+    dwell_s: Optional[Sequence[float]] = None,
+    windows_s: Optional[Sequence[Optional[Tuple[float, float]]]] = None,
+    time_budget_s: float = 0.05
+) -> StopOrder:
+    """
+    Find a short visiting order from `start` through every other index to `end`.
+
+    Seeds with nearest-neighbour, then improves with 2-opt (segment reversal) and Or-opt
+    (moving runs of 1-3 stops) until no move helps or `time_budget_s` runs out. Deterministic
+    for a given input. Asymmetric matrices and time windows are handled by evaluating each
+    candidate order with a full schedule simulation.
+
+    Args:
+        durations: (N, N) travel times in seconds; NaN where no route exists.
+        start: Index the trip starts from.
+        end: Index the trip ends at (defaults to the last index).
+        dwell_s: Seconds spent at each index.
+        windows_s: Per index, (open, close) in seconds after departure, or None for always open.
+            Arriving early waits for opening; arriving late is penalized.
+        time_budget_s: Wall-clock limit for the improvement phase.
+
+    Returns:
+        StopOrder with the order and its total duration and lateness in seconds.
+    """
+    durations = np.nan_to_num(np.asarray(durations, dtype=float), nan=UNREACHABLE_SECONDS)
+    n = len(durations)
+    end = n - 1 if end is None else end
+    dwell = np.zeros(n) if dwell_s is None else np.asarray(dwell_s, dtype=float)
+    windows = None
+    if windows_s is not None and any(window is not None for window in windows_s):
+        windows = np.array([window if window is not None else (-np.inf, np.inf) for window in windows_s], dtype=float)
+
+    def cost(order: List[int]) -> float:
+        elapsed, lateness = _schedule(order, durations, dwell, windows)
+        return elapsed + LATENESS_PENALTY * lateness
+
+    best = _nearest_neighbour(durations, start, end)
+    best_cost = cost(best)
+    deadline = time.perf_counter() + time_budget_s
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        # 2-opt: reverse the interior segment best[i..j]
+        for i in range(1, len(best) - 2):
+            for j in range(i + 1, len(best) - 1):
+                candidate = best[:i] + best[i:j + 1][::-1] + best[j + 1:]
+                candidate_cost = cost(candidate)
+                if candidate_cost < best_cost - 1e-9:
+                    best, best_cost, improved = candidate, candidate_cost, True
+            if time.perf_counter() >= deadline:
+                break
+        # Or-opt: move a run of 1-3 stops elsewhere
+        for length in (1, 2, 3):
+            for i in range(1, len(best) - length):
+                segment = best[i:i + length]
+                rest = best[:i] + best[i + length:]
+                for k in range(1, len(rest)):
+                    if k == i:
+                        continue
+                    candidate = rest[:k] + segment + rest[k:]
+                    candidate_cost = cost(candidate)
+                    if candidate_cost < best_cost - 1e-9:
+                        best, best_cost, improved = candidate, candidate_cost, True
+                        break
+            if time.perf_counter() >= deadline:
+                break
+
+    elapsed, lateness = _schedule(best, durations, dwell, windows)
+    return StopOrder(best, elapsed, lateness)
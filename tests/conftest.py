@@ -0,0 +1,23 @@
+# tests/conftest.py
+import pytest
+from config import Config
+from src.tools.record_replay import Cassette
+
+@pytest.fixture(autouse=True)
+def no_live_poi_search(monkeypatch):
+    """
+    Keep the planner's POI search off the live Places API; tests of the search build their own tool.
+    """
+    monkeypatch.setattr(Config, "POI_SEARCH_ENABLED", False)
+
+@pytest.fixture(scope="session", autouse=True)
+def cassette():
+    """
+    REPLAY_MODE=record or REPLAY_MODE=replay runs the suite against Config.REPLAY_CASSETTE_PATH.
+    """
+    cassette = Cassette.from_config()
+    if cassette is None:
+        yield None
+        return
+    with cassette.activate():
+        yield cassette
@@ -35,7 +35,7 @@ async def test_full_trip_flow():
     # Patch dependencies
     with patch.object(orchestrator.planner, "generate_response", AsyncMock(return_value=mock_initial_plan)), \
          patch.object(orchestrator.optimizer.maps_tool, "get_directions", AsyncMock(return_value=mock_route_data)), \
-         patch.object(orchestrator.optimizer.weather_tool, "get_weather_forecast", AsyncMock(side_effect=[mock_weather_origin, mock_weather_destination])), \
+         patch.object(orchestrator.optimizer.weather_tool, "get_weather_many", AsyncMock(return_value=[mock_weather_origin, mock_weather_destination])), \
          patch.object(orchestrator.optimizer, "generate_response", AsyncMock(return_value=mock_optimized_plan)), \
          patch.object(orchestrator.reporter, "generate_response", AsyncMock(return_value=mock_final_itinerary)):
         result = await orchestrator.process_query(query, origin, destination, preferences, planner_prompt)
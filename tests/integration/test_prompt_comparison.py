@@ -1,7 +1,10 @@
 # tests/integration/test_prompt_comparison.py
+import asyncio
+import time
 import pytest
 from unittest.mock import AsyncMock, patch
 from evaluation.evaluation_script import EvaluationScript
+from src.prompts.planner_prompts import PLANNER_PROMPT_CASUAL
 
 @pytest.mark.asyncio
 async def test_prompt_comparison():
@@ -46,6 +49,8 @@ async def test_prompt_comparison():
 
     # Patch dependencies
     with patch.object(evaluator.orchestrator.planner, "process", AsyncMock(return_value=mock_initial_plan)), \
+         patch.object(evaluator.orchestrator.optimizer.maps_tool, "get_directions", AsyncMock(return_value=mock_route_data)), \
+         patch.object(evaluator.orchestrator.optimizer.weather_tool, "get_weather_many", AsyncMock(return_value=[mock_weather_origin, mock_weather_destination])), \
          patch.object(evaluator.orchestrator.optimizer, "process", AsyncMock(return_value=mock_optimizer_output)), \
          patch.object(evaluator.orchestrator.reporter, "process", AsyncMock(return_value={"final_itinerary": mock_final_itinerary})), \
          patch.object(evaluator.llm_client, "generate", AsyncMock(return_value=mock_critique_response)):
@@ -104,6 +109,8 @@ async def test_prompt_comparison_evaluation_error():
 
     # Patch dependencies to simulate an evaluation error
     with patch.object(evaluator.orchestrator.planner, "process", AsyncMock(return_value="Initial plan")), \
+         patch.object(evaluator.orchestrator.optimizer.maps_tool, "get_directions", AsyncMock(return_value=mock_optimizer_output["route_data"])), \
+         patch.object(evaluator.orchestrator.optimizer.weather_tool, "get_weather_many", AsyncMock(return_value=[mock_optimizer_output["weather_origin"], mock_optimizer_output["weather_destination"]])), \
          patch.object(evaluator.orchestrator.optimizer, "process", AsyncMock(return_value=mock_optimizer_output)), \
          patch.object(evaluator.orchestrator.reporter, "process", AsyncMock(return_value={"final_itinerary": mock_final_itinerary})), \
          patch.object(evaluator.llm_client, "generate", AsyncMock(return_value=mock_invalid_critique)):
@@ -127,4 +134,98 @@ async def test_prompt_comparison_evaluation_error():
         assert result["route_feasibility"] == 0.0, "Route feasibility should be 0.0 for invalid critique"
         assert result["constraint_satisfaction"] == 0.0, "Constraint satisfaction should be 0.0 for invalid critique"
         assert result["response_quality"] == 0.0, "Response quality should be 0.0 for invalid critique"
-        assert result["total"] == 0.0, "Total score should be 0.0 for invalid critique"
\ No newline at end of file
+        assert result["total"] == 0.0, "Total score should be 0.0 for invalid critique"
+
+@pytest.mark.asyncio
+async def test_prompt_variants_run_concurrently_and_fail_independently():
+    evaluator = EvaluationScript()
+    query = "Plan a scenic trip from San Francisco to Los Angeles"
+    origin = "San Francisco, CA, US"
+    destination = "Los Angeles, CA, US"
+    preferences = {"avoid_bad_weather": True, "include_pois": True}
+    mock_critique_response = '{"route_feasibility": 0.9, "constraint_satisfaction": 0.9, "response_quality": 0.9, "comments": "Good"}'
+    mock_optimizer_output = {
+        "optimized_plan": "Optimized plan",
+        "route_data": {"distance": "600 km"},
+        "weather_origin": {"city": "San Francisco"},
+        "weather_destination": {"city": "Los Angeles"}
+    }
+
+    async def slow_planner(input_data: dict) -> str:
+        await asyncio.sleep(0.2)
+        if input_data["planner_prompt"] == PLANNER_PROMPT_CASUAL:
+            raise RuntimeError("planner failed")
+        return "Initial plan"
+
+    async def reporter(input_data: dict, on_token=None) -> dict:
+        return {"final_itinerary": f"Itinerary from {input_data['initial_plan']}"}
+
+    directions = AsyncMock(return_value=mock_optimizer_output["route_data"])
+    weather = AsyncMock(return_value=[mock_optimizer_output["weather_origin"], mock_optimizer_output["weather_destination"]])
+    optimizer = AsyncMock(return_value=mock_optimizer_output)
+    with patch.object(evaluator.orchestrator.planner, "process", slow_planner), \
+         patch.object(evaluator.orchestrator.optimizer.maps_tool, "get_directions", directions), \
+         patch.object(evaluator.orchestrator.optimizer.weather_tool, "get_weather_many", weather), \
+         patch.object(evaluator.orchestrator.optimizer, "process", optimizer), \
+         patch.object(evaluator.orchestrator.reporter, "process", reporter), \
+         patch.object(evaluator.llm_client, "generate", AsyncMock(return_value=mock_critique_response)):
+        started = time.perf_counter()
+        itinerary, results = await evaluator.run_evaluation(query, origin, destination, preferences)
+        elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5, "Variants should overlap instead of running one after another"
+    assert [result["prompt"] for result in results] == ["casual", "precise", "scenic"], "Results keep prompt order"
+    assert results[0]["error"] == "planner failed"
+    assert all(result["total"] == pytest.approx(0.9) for result in results[1:]), "One failing variant doesn't cancel the others"
+    assert itinerary == {"final_itinerary": "Itinerary from Initial plan"}
+    assert directions.await_count == 1 and weather.await_count == 1, "Route and weather are fetched once for all variants"
+    snapshots = [call.args[0]["route_data"] for call in optimizer.await_args_list]
+    assert len(snapshots) == 2 and snapshots[0] is snapshots[1], "Variants share one tool data snapshot"
+
+@pytest.mark.asyncio
+async def test_prompt_variants_plan_before_the_shared_weather_is_in():
+    evaluator = EvaluationScript()
+    events = []
+
+    async def planner(input_data: dict) -> str:
+        events.append("planner:start")
+        return "Initial plan"
+
+    async def slow_weather(cities: list) -> list:
+        await asyncio.sleep(0.2)
+        events.append("weather:end")
+        return [{"city": city, "weather": "clear"} for city in cities]
+
+    async def reporter(input_data: dict, on_token=None) -> dict:
+        return {"final_itinerary": "Itinerary"}
+
+    directions = AsyncMock(return_value={"distance": "600 km", "waypoints": [[37.77, -122.42], [34.05, -118.24]]})
+    search_corridor = AsyncMock(return_value=[])
+    with patch("src.agents.planner_agent.Config.POI_SEARCH_ENABLED", True), \
+         patch.object(evaluator.orchestrator.planner, "process", planner), \
+         patch.object(evaluator.orchestrator.planner.search_tool, "search_corridor", search_corridor), \
+         patch.object(evaluator.orchestrator.optimizer.maps_tool, "get_directions", directions), \
+         patch.object(evaluator.orchestrator.optimizer.weather_tool, "get_weather_many", side_effect=slow_weather) as weather, \
+         patch.object(evaluator.orchestrator.optimizer, "process", AsyncMock(return_value={"optimized_plan": "Optimized plan"})), \
+         patch.object(evaluator.orchestrator.reporter, "process", reporter), \
+         patch.object(evaluator.llm_client, "generate", AsyncMock(return_value='{"route_feasibility": 1, "constraint_satisfaction": 1, "response_quality": 1}')):
+        await evaluator.run_evaluation("Plan a trip", "San Francisco, CA, US", "Los Angeles, CA, US", {})
+
+    assert events[:3] == ["planner:start"] * 3, "Variants plan as soon as the route is in"
+    assert directions.await_count == 1 and weather.await_count == 1
+    assert search_corridor.await_count == 3 and search_corridor.call_args.args[0] == directions.return_value["waypoints"]
+
+@pytest.mark.asyncio
+async def test_failed_shared_route_fails_every_variant_once():
+    evaluator = EvaluationScript()
+    directions = AsyncMock(side_effect=RuntimeError("routes unavailable"))
+    planner = AsyncMock(return_value="Initial plan")
+    with patch.object(evaluator.orchestrator.planner, "process", planner), \
+         patch.object(evaluator.orchestrator.optimizer.maps_tool, "get_directions", directions), \
+         patch.object(evaluator.orchestrator.optimizer.weather_tool, "get_weather_many", AsyncMock(return_value=[{"city": "San Francisco"}, {"city": "Los Angeles"}])), \
+         patch.object(evaluator.llm_client, "generate", AsyncMock(side_effect=AssertionError("nothing to critique"))):
+        itinerary, results = await evaluator.run_evaluation("Plan a trip", "San Francisco, CA, US", "Los Angeles, CA, US", {})
+
+    assert itinerary == {}
+    assert [result["error"] for result in results] == ["routes unavailable"] * 3, "Every variant records the shared route failure"
+    assert directions.await_count == 1, "The route is not refetched per variant"
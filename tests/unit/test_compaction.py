@@ -0,0 +1,53 @@
+# tests/unit/test_compaction.py
+from datetime import timedelta
+from src.prompts.compaction import CompactionReport, compact_route, compact_weather
+from src.tools.polyline import decode_polyline
+
+GOOGLE_SAMPLE_POLYLINE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+class FakeProtoRoute:
+    def __init__(self):
+        self.steps = [{"instruction": "Head south on US-101 S"} for _ in range(200)]
+
+def make_route_data():
+    return {
+        "overall_distance_meters": 616800,
+        "overall_distance_text": "616.8 km",
+        "overall_duration_str": timedelta(hours=5, minutes=52),
+        "overall_duration_text": timedelta(hours=5, minutes=52),
+        "overall_polyline": GOOGLE_SAMPLE_POLYLINE,
+        "legs_data": [{
+            "distance_meters": 616800,
+            "distance_text": "616.8 km",
+            "duration_str": "21120s",
+            "duration_text": "21120s",
+            "polyline": GOOGLE_SAMPLE_POLYLINE,
+            "steps": []
+        }],
+        "raw_route_object": FakeProtoRoute()
+    }
+
+def test_decode_polyline_matches_reference_example():
+    assert decode_polyline(GOOGLE_SAMPLE_POLYLINE).tolist() == [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+
+def test_compact_route_builds_digest_and_reports_savings():
+    report = CompactionReport()
+    digest = compact_route(make_route_data(), token_budget=500, report=report)
+
+    assert digest == {
+        "distance_km": 616.8,
+        "duration_min": 352,
+        "legs": [{"distance_km": 616.8, "duration_min": 352}],
+        "waypoints": [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+    }
+    summary = report.summary()
+    assert summary["stages"]["route"]["bytes_after"] < summary["stages"]["route"]["bytes_before"]
+    assert summary["tokens_saved"] > 0
+
+def test_compact_route_respects_token_budget_and_passes_unknown_shapes():
+    digest = compact_route(make_route_data(), token_budget=20)
+    assert "legs" not in digest, "Per-leg detail should be dropped to meet the budget"
+    assert len(digest["waypoints"]) == 2
+
+    assert compact_route({"distance": "600 km", "duration": "6 hours"}) == {"distance": "600 km", "duration": "6 hours"}
+    assert compact_weather({"city": "San Francisco", "temperature": 20, "country": None}) == {"city": "San Francisco", "temperature": 20}
@@ -0,0 +1,80 @@
+# tests/unit/test_hedging.py
+import pytest
+import asyncio
+from unittest.mock import MagicMock
+from src.cache.lru_cache import TTLCache
+from src.cache.tiered_cache import TieredCache
+from src.llm_integration.llm_client import LLMClient
+from src.llm_integration.hedging import HedgingPolicy, LatencyHistogram
+from src.llm_integration.rate_limiter import RateLimiter
+
+class SlowFirstModel:
+    """Fake chat model whose first call stalls; later calls answer quickly."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+
+    async def agenerate(self, messages):
+        self.calls += 1
+        try:
+            await asyncio.sleep(5 if self.calls == 1 else 0.01)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        generation = MagicMock()
+        generation.message.content = f"Response {self.calls}"
+        response = MagicMock()
+        response.generations = [[generation]]
+        return response
+
+def test_latency_histogram_percentile():
+    histogram = LatencyHistogram(window=100)
+    for value in range(1, 101):
+        histogram.record(value / 100)
+    assert histogram.percentile(95) == pytest.approx(0.95)
+    assert histogram.percentile(50) == pytest.approx(0.5)
+    assert LatencyHistogram().percentile(95) is None
+
+@pytest.mark.asyncio
+async def test_llm_client_hedges_slow_call():
+    policy = HedgingPolicy(percentile=95, max_hedge_ratio=0.5, min_samples=3, min_delay=0.05)
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1_000_000, max_concurrency=4)
+    client = LLMClient(cache=TieredCache(TTLCache(max_entries=4)), rate_limiter=limiter, hedging=policy)
+    client.llm = SlowFirstModel()
+    for _ in range(3):
+        client.latency_histogram.record(0.02)
+    policy.requests = 3  # Prior traffic, so the hedge budget allows one more request
+
+    result = await asyncio.wait_for(client.generate("Plan a trip"), timeout=2)
+
+    assert result == "Response 2", "The hedged request should win"
+    assert client.llm.cancelled == 1, "The slow request should be cancelled"
+    assert client.hedging_metrics()["hedges"] == 1
+    assert client.hedging_metrics()["hedge_wins"] == 1
+
+def test_hedging_policy_caps_extra_requests():
+    policy = HedgingPolicy(max_hedge_ratio=0.1, min_samples=1)
+    policy.requests = 5
+    assert not policy.allow_hedge(), "One hedge in five requests exceeds a 10% budget"
+    policy.requests = 10
+    assert policy.allow_hedge()
+
+@pytest.mark.asyncio
+async def test_latency_histogram_excludes_rate_limit_backoff():
+    class ThrottledOnceModel(SlowFirstModel):
+        async def agenerate(self, messages):
+            if self.calls == 0:
+                self.calls += 1
+                error = Exception("429 Resource has been exhausted")
+                error.retry_after = 0.2
+                raise error
+            return await super().agenerate(messages)
+
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1_000_000, max_concurrency=4)
+    client = LLMClient(cache=TieredCache(TTLCache(max_entries=4)), rate_limiter=limiter, hedging=HedgingPolicy(min_samples=3))
+    client.llm = ThrottledOnceModel()
+
+    assert await client.generate("Plan a trip") == "Response 2"
+    assert len(client.latency_histogram) == 1, "Only the successful model call is sampled"
+    assert client.latency_histogram.percentile(100) < 0.1, "Backoff before the retry is not model latency"
@@ -0,0 +1,197 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, patch
+from src.orchestrator.main_orchestrator import MainOrchestrator
+from src.orchestrator.stage_graph import StageGraph
+from src.prompts.planner_prompts import PLANNER_PROMPT_CASUAL
+
+@pytest.mark.asyncio
+async def test_stage_graph_runs_independent_stages_concurrently():
+    events = []
+
+    async def stage(name, delay):
+        events.append(f"{name}:start")
+        await asyncio.sleep(delay)
+        events.append(f"{name}:end")
+        return name
+
+    graph = StageGraph()
+    graph.add_stage("a", lambda deps: stage("a", 0.05))
+    graph.add_stage("b", lambda deps: stage("b", 0.01))
+    graph.add_stage("c", lambda deps: stage("c", 0), depends_on=("a", "b"))
+    results = await graph.run()
+
+    assert results == {"a": "a", "b": "b", "c": "c"}
+    assert events.index("b:start") < events.index("a:end"), "Independent stages should overlap"
+    assert events.index("c:start") > events.index("a:end"), "Dependent stage should wait for its inputs"
+
+@pytest.mark.asyncio
+async def test_stage_graph_cancels_remaining_stages_on_failure():
+    cancelled = asyncio.Event()
+
+    async def slow(deps):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def failing(deps):
+        raise ValueError("No routes found")
+
+    graph = StageGraph()
+    graph.add_stage("slow", slow)
+    graph.add_stage("failing", failing)
+    with pytest.raises(ValueError, match="No routes found"):
+        await graph.run()
+    assert cancelled.is_set()
+
+def test_stage_graph_rejects_cycles():
+    graph = StageGraph()
+    graph.add_stage("a", AsyncMock(), depends_on=("b",))
+    graph.add_stage("b", AsyncMock(), depends_on=("a",))
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(graph.run())
+
+@pytest.mark.asyncio
+async def test_orchestrator_prefetches_route_while_planning():
+    orchestrator = MainOrchestrator()
+    events = []
+
+    async def slow_planner(input_data):
+        events.append("planner:start")
+        await asyncio.sleep(0.05)
+        events.append("planner:end")
+        return "Drive from San Francisco to Los Angeles"
+
+    async def directions(origin, destination):
+        events.append("route:start")
+        return {"distance": "600 km", "duration": "6 hours"}
+
+    with patch.object(orchestrator.planner, "process", side_effect=slow_planner), \
+         patch.object(orchestrator.optimizer.maps_tool, "get_directions", side_effect=directions), \
+         patch.object(orchestrator.optimizer.weather_tool, "get_weather_many", AsyncMock(return_value=[{"city": "X", "weather": "clear"}, {"city": "X", "weather": "clear"}])), \
+         patch.object(orchestrator.optimizer, "generate_response", AsyncMock(return_value="Optimized plan")), \
+         patch.object(orchestrator.reporter, "generate_response", AsyncMock(return_value="Final itinerary")):
+        result = await orchestrator.process_query(
+            "Plan a scenic trip", "San Francisco, CA, US", "Los Angeles, CA, US",
+            {"avoid_bad_weather": True}, PLANNER_PROMPT_CASUAL
+        )
+
+    assert result == {"final_itinerary": "Final itinerary"}
+    assert events.index("route:start") < events.index("planner:end"), "Route should be fetched while the planner runs"
+
+@pytest.mark.asyncio
+async def test_orchestrator_isolates_concurrent_requests():
+    orchestrator = MainOrchestrator()
+
+    async def planner(input_data):
+        # Finish in reverse order of submission to interleave the requests
+        await asyncio.sleep(0.05 if input_data["destination"] == "Los Angeles, CA, US" else 0.01)
+        return f"Plan to {input_data['destination']}"
+
+    async def optimizer_llm(prompt):
+        await asyncio.sleep(0.01)
+        return prompt
+
+    async def reporter_llm(prompt):
+        return prompt
+
+    with patch.object(orchestrator.planner, "process", side_effect=planner), \
+         patch.object(orchestrator.optimizer.maps_tool, "get_directions", AsyncMock(return_value={"distance": "600 km"})), \
+         patch.object(orchestrator.optimizer.weather_tool, "get_weather_many", AsyncMock(return_value=[{"weather": "clear"}, {"weather": "clear"}])), \
+         patch.object(orchestrator.optimizer, "generate_response", side_effect=optimizer_llm), \
+         patch.object(orchestrator.reporter, "generate_response", side_effect=reporter_llm):
+        results = await asyncio.gather(*[
+            orchestrator.process_query("Plan a trip", "San Francisco, CA, US", destination, {"avoid_bad_weather": True}, PLANNER_PROMPT_CASUAL)
+            for destination in ["Los Angeles, CA, US", "Sacramento, CA, US", "Monterey, CA, US"]
+        ])
+
+    for destination, result in zip(["Los Angeles, CA, US", "Sacramento, CA, US", "Monterey, CA, US"], results):
+        assert f"Plan to {destination}" in result["final_itinerary"]
+        others = {"Los Angeles, CA, US", "Sacramento, CA, US", "Monterey, CA, US"} - {destination}
+        assert not any(f"Plan to {other}" in result["final_itinerary"] for other in others), "Requests must not share state"
+
+@pytest.mark.asyncio
+async def test_orchestrator_cancels_tool_calls_when_request_times_out():
+    orchestrator = MainOrchestrator()
+    route_cancelled = asyncio.Event()
+
+    async def slow_directions(origin, destination):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            route_cancelled.set()
+            raise
+
+    with patch("src.orchestrator.main_orchestrator.Config.REQUEST_TIMEOUT_SECONDS", 0.05), \
+         patch.object(orchestrator.planner, "process", AsyncMock(return_value="Plan")), \
+         patch.object(orchestrator.optimizer.maps_tool, "get_directions", side_effect=slow_directions), \
+         patch.object(orchestrator.optimizer.weather_tool, "get_weather_many", AsyncMock(return_value=[{"weather": "clear"}, {"weather": "clear"}])):
+        with pytest.raises(asyncio.TimeoutError):
+            await orchestrator.process_query("Plan a trip", "San Francisco, CA, US", "Los Angeles, CA, US", {"avoid_bad_weather": True}, PLANNER_PROMPT_CASUAL)
+
+    assert route_cancelled.is_set(), "The in-flight route call should be cancelled"
+
+@pytest.mark.asyncio
+async def test_orchestrator_uses_tool_data_snapshot():
+    orchestrator = MainOrchestrator()
+    tool_data = {
+        "route_data": {"distance_km": 615.0, "duration_min": 360},
+        "weather_origin": {"city": "San Francisco", "weather": "fog"},
+        "weather_destination": {"city": "Los Angeles", "weather": "sunny"},
+        "route_weather": [{"city": "San Luis Obispo", "weather": "clear"}]
+    }
+    directions = AsyncMock(side_effect=AssertionError("route should come from the snapshot"))
+    weather = AsyncMock(side_effect=AssertionError("weather should come from the snapshot"))
+    optimizer_prompts = []
+
+    async def optimizer_llm(prompt):
+        optimizer_prompts.append(prompt)
+        return "Optimized plan"
+
+    with patch.object(orchestrator.planner, "process", AsyncMock(return_value="Plan")), \
+         patch.object(orchestrator.optimizer.maps_tool, "get_directions", directions), \
+         patch.object(orchestrator.optimizer.weather_tool, "get_weather_many", weather), \
+         patch.object(orchestrator.optimizer, "generate_response", side_effect=optimizer_llm), \
+         patch.object(orchestrator.reporter, "generate_response", AsyncMock(return_value="Final itinerary")):
+        result = await orchestrator.process_query(
+            "Plan a trip", "San Francisco, CA, US", "Los Angeles, CA, US", {"avoid_bad_weather": True},
+            PLANNER_PROMPT_CASUAL, tool_data=tool_data
+        )
+
+    assert result == {"final_itinerary": "Final itinerary"}
+    directions.assert_not_awaited()
+    weather.assert_not_awaited()
+    assert "San Luis Obispo" in optimizer_prompts[0] and "fog" in optimizer_prompts[0]
+
+@pytest.mark.asyncio
+async def test_orchestrator_plans_while_a_slow_route_is_in_flight():
+    orchestrator = MainOrchestrator()
+    events = []
+
+    async def planner(input_data):
+        events.append("planner:start")
+        return "Plan"
+
+    async def slow_directions(origin, destination):
+        await asyncio.sleep(0.2)
+        events.append("route:end")
+        return {"distance": "600 km", "waypoints": [[37.77, -122.42], [34.05, -118.24]]}
+
+    search_corridor = AsyncMock(return_value=[{"name": "Madonna Inn", "rating": 4.5, "detour_km": 0.4}])
+    with patch("src.agents.planner_agent.Config.POI_SEARCH_ENABLED", True), \
+         patch("src.agents.planner_agent.Config.POI_ROUTE_WAIT_SECONDS", 0.01), \
+         patch.object(orchestrator.planner, "process", side_effect=planner) as process, \
+         patch.object(orchestrator.planner.search_tool, "search_corridor", search_corridor), \
+         patch.object(orchestrator.optimizer.maps_tool, "get_directions", side_effect=slow_directions), \
+         patch.object(orchestrator.optimizer.weather_tool, "get_weather_many", AsyncMock(return_value=[{"weather": "clear"}, {"weather": "clear"}])), \
+         patch.object(orchestrator.optimizer, "generate_response", AsyncMock(return_value="Optimized plan")), \
+         patch.object(orchestrator.reporter, "generate_response", AsyncMock(return_value="Final itinerary")):
+        await orchestrator.process_query("Plan a trip", "San Francisco, CA, US", "Los Angeles, CA, US", {"departure_date": "2026-10-21"}, PLANNER_PROMPT_CASUAL)
+
+    assert events == ["planner:start", "route:end"], "The planner should not wait for a slow route"
+    line = search_corridor.call_args.args[0]
+    assert len(line) == 2 and round(line[0][0]) == 38 and round(line[1][0]) == 34, "Origin-destination corridor from the gazetteer"
+    assert search_corridor.call_args.kwargs["weekday"] == 2, "Opening hours for the departure day (a Wednesday)"
+    assert process.call_args.args[0]["candidate_pois"][0]["name"] == "Madonna Inn"
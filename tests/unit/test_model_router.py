@@ -0,0 +1,95 @@
+# tests/unit/test_model_router.py
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.llm_integration.model_router import ModelRouter
+
+def make_client(model_name, delay, response):
+    async def generate(prompt):
+        await asyncio.sleep(delay)
+        return response
+    client = MagicMock()
+    client.model_name = model_name
+    client.generate = AsyncMock(side_effect=generate)
+    return client
+
+@pytest.mark.asyncio
+async def test_router_uses_routed_model_within_budget():
+    router = ModelRouter(routes={"reporter": "gemini-2.0-flash-lite"}, fallback_model="gemini-fast", budgets={"reporter": 1.0})
+    primary = make_client("gemini-2.0-flash-lite", 0.01, "primary answer")
+
+    with patch("src.llm_integration.model_router.get_llm_client") as get_client:
+        result = await router.generate("reporter", "Format the itinerary", client=primary)
+
+    assert result == "primary answer"
+    get_client.assert_not_called()
+    assert router.model_for("reporter") == "gemini-2.0-flash-lite"
+
+@pytest.mark.asyncio
+async def test_router_falls_back_when_budget_exceeded():
+    router = ModelRouter(routes={"critique": "gemini-pro"}, fallback_model="gemini-fast", budgets={"critique": 0.05})
+    primary = make_client("gemini-pro", 5, "slow answer")
+    fallback = make_client("gemini-fast", 0.01, "fast answer")
+
+    with patch("src.llm_integration.model_router.get_llm_client", return_value=fallback) as get_client:
+        result = await asyncio.wait_for(router.generate("critique", "Score this itinerary", client=primary), timeout=2)
+
+    assert result == "fast answer"
+    get_client.assert_called_once_with("gemini-fast")
+    assert router.fallbacks == {"critique": 1}
+
+@pytest.mark.asyncio
+async def test_router_cancels_primary_when_caller_is_cancelled():
+    router = ModelRouter(routes={"critique": "gemini-pro"}, fallback_model="gemini-fast", budgets={"critique": 5})
+    cancelled = asyncio.Event()
+
+    async def generate(prompt):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    primary = MagicMock(model_name="gemini-pro", generate=generate)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(router.generate("critique", "Score this itinerary", client=primary), timeout=0.05)
+    await asyncio.sleep(0)
+    assert cancelled.is_set(), "The primary call must not outlive its caller"
+
+def make_streaming_client(model_name, first_chunk_delay, chunks, closed):
+    async def stream(prompt):
+        try:
+            await asyncio.sleep(first_chunk_delay)
+            for chunk in chunks:
+                yield chunk
+        finally:
+            closed.append(model_name)
+    return MagicMock(model_name=model_name, stream=stream)
+
+@pytest.mark.asyncio
+async def test_router_stream_falls_back_on_slow_first_chunk():
+    router = ModelRouter(routes={"reporter": "gemini-pro"}, fallback_model="gemini-fast", budgets={"reporter": 0.05})
+    closed = []
+    primary = make_streaming_client("gemini-pro", 5, ["slow"], closed)
+    fallback = make_streaming_client("gemini-fast", 0.01, ["# Itinerary", "\nDay 1"], closed)
+
+    with patch("src.llm_integration.model_router.get_llm_client", return_value=fallback):
+        chunks = await asyncio.wait_for(_collect(router.stream("reporter", "Format the itinerary", client=primary)), timeout=2)
+
+    assert chunks == ["# Itinerary", "\nDay 1"]
+    assert sorted(closed) == ["gemini-fast", "gemini-pro"], "The losing stream is closed"
+    assert router.fallbacks == {"reporter": 1}
+
+@pytest.mark.asyncio
+async def test_router_stream_keeps_primary_within_budget():
+    router = ModelRouter(routes={"reporter": "gemini-pro"}, fallback_model="gemini-fast", budgets={"reporter": 1.0})
+    primary = make_streaming_client("gemini-pro", 0, ["# Itinerary", "\nDay 1"], [])
+
+    with patch("src.llm_integration.model_router.get_llm_client") as get_client:
+        chunks = await _collect(router.stream("reporter", "Format the itinerary", client=primary))
+
+    assert chunks == ["# Itinerary", "\nDay 1"]
+    get_client.assert_not_called()
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
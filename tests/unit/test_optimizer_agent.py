@@ -1,7 +1,10 @@
 import pytest
 import asyncio
 from unittest.mock import AsyncMock, patch
+import json
+import numpy as np
 from src.agents.optimizer_agent import OptimizerAgent
+from src.tools.google_maps_tool import RouteMatrix
 
 @pytest.mark.asyncio
 async def test_optimizer_agent_process():
@@ -24,7 +27,7 @@ async def test_optimizer_agent_process():
 
     # Patch tool methods and generate_response
     with patch.object(agent.maps_tool, "get_directions", AsyncMock(return_value=mock_route_data)), \
-         patch.object(agent.weather_tool, "get_weather_forecast", AsyncMock(side_effect=[mock_weather_origin, mock_weather_destination])), \
+         patch.object(agent.weather_tool, "get_weather_many", AsyncMock(return_value=[mock_weather_origin, mock_weather_destination])), \
          patch.object(agent, "generate_response", AsyncMock(return_value=mock_optimized_plan)):
         result = await agent.process(input_data)
 
@@ -49,4 +52,96 @@ async def test_optimizer_agent_missing_input():
 
     # Test for ValueError
     with pytest.raises(ValueError, match="Missing required input data"):
-        await agent.process(input_data)
\ No newline at end of file
+        await agent.process(input_data)
+
+@pytest.mark.asyncio
+async def test_optimizer_agent_proceeds_without_destination_weather():
+    # Initialize OptimizerAgent
+    agent = OptimizerAgent()
+
+    input_data = {
+        "initial_plan": "Drive from San Francisco to Los Angeles",
+        "origin": "San Francisco, CA, US",
+        "destination": "Los Angeles, CA, US",
+        "preferences": {"avoid_bad_weather": True, "include_pois": True}
+    }
+    mock_route_data = {"distance": "600 km", "duration": "6 hours"}
+    mock_weather_origin = {"city": "San Francisco", "temperature": 20, "weather": "clear"}
+    weather = AsyncMock(return_value=[mock_weather_origin, None])  # The destination lookup failed
+
+    with patch.object(agent.maps_tool, "get_directions", AsyncMock(return_value=mock_route_data)), \
+         patch.object(agent.weather_tool, "get_weather_many", weather), \
+         patch.object(agent, "generate_response", AsyncMock(return_value="Optimized plan")):
+        result = await agent.process(input_data)
+
+    weather.assert_awaited_once_with(["San Francisco, CA, US", "Los Angeles, CA, US"])
+    assert result["route_data"] == mock_route_data
+    assert result["weather_origin"] == mock_weather_origin
+    assert result["weather_destination"]["unavailable"] is True, "Missing weather should be marked unavailable"
+    assert result["optimized_plan"] == "Optimized plan"
+
+@pytest.mark.asyncio
+async def test_optimizer_agent_samples_weather_along_route():
+    agent = OptimizerAgent()
+
+    input_data = {
+        "initial_plan": "Drive from Sacramento to the Oregon coast",
+        "origin": "Sacramento, CA, US",
+        "destination": "Coos Bay, OR, US",
+        "preferences": {"avoid_bad_weather": True}
+    }
+    mock_route_data = {"overall_distance_meters": 800000, "overall_duration_str": "28800s", "overall_polyline": "_p~iF~ps|U_ulLnnqC_mqNvxq`@"}
+    mock_weather = {"city": "Somewhere", "temperature": 15, "weather": "light rain"}
+    looked_up = []
+
+    async def mock_weather_at(lat, lon):
+        looked_up.append((lat, lon))
+        return {**mock_weather, "lat": lat, "lon": lon}
+
+    with patch("src.agents.optimizer_agent.Config.ROUTE_WEATHER_SPACING_KM", 100), \
+         patch.object(agent.maps_tool, "get_directions", AsyncMock(return_value=mock_route_data)), \
+         patch.object(agent.weather_tool, "get_weather_many", AsyncMock(return_value=[mock_weather, mock_weather])), \
+         patch.object(agent.weather_tool, "get_weather_by_coordinates", side_effect=mock_weather_at), \
+         patch.object(agent, "generate_response", AsyncMock(return_value="Optimized plan")):
+        result = await agent.process(input_data)
+
+    assert len(result["route_weather"]) == len(looked_up) > 2, "One lookup per sampled grid cell"
+    assert len(set(looked_up)) == len(looked_up), "Grid cells should be unique"
+    assert looked_up[0] == (38.5, -120.25) and looked_up[-1] == (43.25, -126.5), "Cells follow driving order"
+    assert "sample_points" not in result["route_data"]
+
+@pytest.mark.asyncio
+async def test_optimizer_agent_orders_plan_stops_locally():
+    agent = OptimizerAgent()
+    initial_plan = json.dumps({
+        "origin": "San Francisco, CA, US",
+        "destination": "Los Angeles, CA, US",
+        "points_of_interest": [
+            {"name": "Santa Barbara Mission", "description": "Historic mission"},
+            {"name": "Monterey Bay Aquarium", "opening_hours": "9:30 AM - 6 PM"},
+            "Hearst Castle"
+        ]
+    })
+    input_data = {
+        "initial_plan": f"```json\n{initial_plan}\n```",
+        "origin": "San Francisco, CA, US",
+        "destination": "Los Angeles, CA, US",
+        "preferences": {"include_pois": True},
+        "route_data": {"distance": "600 km"},
+        "weather_origin": {"weather": "clear"},
+        "weather_destination": {"weather": "sunny"}
+    }
+    # Positions along the coast in driving hours: SF 0, Santa Barbara 5.5, Monterey 2, Hearst Castle 3.5, LA 7
+    hours = np.array([0, 5.5, 2, 3.5, 7])
+    matrix = RouteMatrix(np.abs(hours[:, None] - hours[None, :]) * 3600, np.abs(hours[:, None] - hours[None, :]) * 90000)
+
+    with patch.object(agent.maps_tool, "get_route_matrix", AsyncMock(return_value=matrix)) as get_route_matrix, \
+         patch.object(agent, "generate_response", AsyncMock(return_value="Optimized plan")) as generate_response:
+        result = await agent.process(input_data)
+
+    places = get_route_matrix.call_args.args[0]
+    assert places == ["San Francisco, CA, US", "Santa Barbara Mission", "Monterey Bay Aquarium", "Hearst Castle", "Los Angeles, CA, US"]
+    assert get_route_matrix.call_args.kwargs["addresses"] == places[1:-1], "Stops bypass the city gazetteer"
+    assert [stop["name"] for stop in result["ordered_stops"]] == ["Monterey Bay Aquarium", "Hearst Castle", "Santa Barbara Mission"]
+    assert result["ordered_stops"][0]["drive_min"] == 120
+    assert "Monterey Bay Aquarium" in generate_response.call_args.args[0]
\ No newline at end of file
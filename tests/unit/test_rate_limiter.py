@@ -0,0 +1,73 @@
+# tests/unit/test_rate_limiter.py
+import pytest
+import asyncio
+from unittest.mock import MagicMock
+from src.cache.lru_cache import TTLCache
+from src.cache.tiered_cache import TieredCache
+from src.llm_integration.llm_client import LLMClient
+from src.llm_integration.rate_limiter import RateLimiter, is_rate_limit_error, retry_after_seconds
+
+class FakeRateLimitError(Exception):
+    code = 429
+
+class FakeQuotaModel:
+    """Local stand-in for the chat model that answers the first `failures` calls with a 429."""
+
+    def __init__(self, failures: int, retry_after: str = ""):
+        self.failures = failures
+        self.retry_after = retry_after
+        self.calls = 0
+
+    async def agenerate(self, messages):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise FakeRateLimitError(f"429 Resource has been exhausted. {self.retry_after}")
+        generation = MagicMock()
+        generation.message.content = "Itinerary"
+        response = MagicMock()
+        response.generations = [[generation]]
+        return response
+
+def test_rate_limit_error_detection():
+    assert is_rate_limit_error(FakeRateLimitError("quota"))
+    assert not is_rate_limit_error(ValueError("Invalid argument"))
+    assert retry_after_seconds(Exception("429 quota exceeded, retry_delay { seconds: 7 }")) == 7.0
+    assert retry_after_seconds(Exception("boom")) is None
+
+@pytest.mark.asyncio
+async def test_llm_client_retries_429_from_fake_model():
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=1_000_000, max_concurrency=2, max_retries=3, backoff_base=0.5, sleep=fake_sleep)
+    client = LLMClient(cache=TieredCache(TTLCache(max_entries=4)), rate_limiter=limiter)
+    client.llm = FakeQuotaModel(failures=2, retry_after="Please retry in 3s")
+
+    result = await client.generate("Plan a trip from San Francisco to Los Angeles")
+
+    assert result == "Itinerary"
+    assert client.llm.calls == 3
+    assert sleeps == [3.0, 3.0], "Server retry-after hint should be respected"
+    metrics = client.rate_limit_metrics()
+    assert metrics["throttled"] == 2
+    assert metrics["succeeded"] == 1
+    assert metrics["requests_per_minute"] < 600, "Request rate should back off after 429s"
+
+@pytest.mark.asyncio
+async def test_rate_limiter_bounds_concurrency_and_gives_up():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1_000_000, max_concurrency=2, max_retries=1, backoff_base=0.001)
+
+    async def call():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    results = await asyncio.gather(*[limiter.run(call, tokens=10) for _ in range(6)])
+    assert results == ["ok"] * 6
+    assert limiter.metrics()["max_in_flight"] == 2
+
+    model = FakeQuotaModel(failures=5)
+    with pytest.raises(FakeRateLimitError):
+        await limiter.run(lambda: model.agenerate([]))
+    assert model.calls == 2, "Should stop after max_retries"
@@ -49,4 +49,28 @@ async def test_reporter_agent_missing_input():
 
     # Test for ValueError
     with pytest.raises(ValueError, match="Missing required input data"):
-        await agent.process(input_data)
\ No newline at end of file
+        await agent.process(input_data)
+
+@pytest.mark.asyncio
+async def test_reporter_agent_streams_tokens():
+    # Initialize ReporterAgent
+    agent = ReporterAgent()
+
+    input_data = {
+        "optimized_plan": "Drive from San Francisco to Los Angeles with scenic stops",
+        "route_data": {"distance": "600 km", "duration": "6 hours"},
+        "weather_origin": {"city": "San Francisco", "temperature": 20, "weather": "clear"},
+        "weather_destination": {"city": "Los Angeles", "temperature": 25, "weather": "sunny"},
+        "preferences": {"avoid_bad_weather": True, "include_pois": True}
+    }
+
+    async def mock_stream(prompt):
+        for chunk in ["# Travel Itinerary\n", "**From**: San Francisco\n", "**To**: Los Angeles"]:
+            yield chunk
+
+    received = []
+    with patch.object(agent.llm_client, "stream", mock_stream):
+        result = await agent.process(input_data, on_token=received.append)
+
+    assert received == ["# Travel Itinerary\n", "**From**: San Francisco\n", "**To**: Los Angeles"]
+    assert result["final_itinerary"] == "".join(received)
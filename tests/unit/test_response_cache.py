@@ -0,0 +1,99 @@
+# tests/unit/test_response_cache.py
+import pytest
+import threading
+from unittest.mock import AsyncMock, MagicMock
+from src.cache.lru_cache import TTLCache
+from src.cache.disk_cache import SQLiteCache
+from src.cache.tiered_cache import TieredCache
+from src.llm_integration.llm_client import LLMClient
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_ttl_cache_lru_eviction_and_expiry():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=2, default_ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None, "Least recently used entry should be evicted"
+
+    clock.now = 11
+    assert cache.get("a") is None, "Entry should expire after its TTL"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+def test_sqlite_cache_persists_and_caps_size(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, max_entries=2, default_ttl=60)
+    cache.set("a", {"text": "first"})
+    cache.set("b", {"text": "second"})
+    cache.set("c", {"text": "third"})
+    cache.close()
+
+    reopened = SQLiteCache(path, max_entries=2)
+    assert len(reopened) == 2
+    assert reopened.get("c") == {"text": "third"}
+    assert reopened.get("a") is None, "Oldest entry should be evicted beyond max_entries"
+
+@pytest.mark.asyncio
+async def test_llm_client_serves_repeated_prompt_from_cache(tmp_path):
+    cache = TieredCache(TTLCache(max_entries=8, default_ttl=60), SQLiteCache(str(tmp_path / "llm.sqlite3")))
+    client = LLMClient(cache=cache)
+
+    generation = MagicMock()
+    generation.message.content = "Drive down Highway 1"
+    response = MagicMock()
+    response.generations = [[generation]]
+    fake_llm = MagicMock()
+    fake_llm.agenerate = AsyncMock(return_value=response)
+    client.llm = fake_llm
+
+    first = await client.generate("Plan a trip from San Francisco to Los Angeles")
+    second = await client.generate("Plan a trip from San Francisco to Los Angeles")
+
+    assert first == second == "Drive down Highway 1"
+    assert fake_llm.agenerate.await_count == 1, "Repeated prompt should not reach the model"
+    assert client.cache_stats()["memory"]["hits"] == 1
+
+def test_llm_clients_are_shared_per_model_and_settings():
+    from src.llm_integration.client_registry import get_llm_client, reset_llm_clients
+    from src.agents.planner_agent import PlannerAgent
+    from src.agents.reporter_agent import ReporterAgent
+
+    reset_llm_clients()
+    try:
+        assert PlannerAgent().llm_client is ReporterAgent().llm_client, "Agents should share one client"
+        assert get_llm_client() is get_llm_client()
+        assert get_llm_client(temperature=0.2) is not get_llm_client(), "Different settings need a separate client"
+        assert get_llm_client(temperature=0.2).cache is get_llm_client().cache, "Clients share the response cache"
+    finally:
+        reset_llm_clients()
+
+@pytest.mark.asyncio
+async def test_tiered_cache_reaches_disk_off_the_event_loop(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "llm_cache.db"))
+    cache = TieredCache(TTLCache(max_entries=10), disk)
+    threads = []
+    for method in ("get_with_expiry", "set"):
+        original = getattr(disk, method)
+
+        def tracked(*args, original=original, **kwargs):
+            threads.append(threading.current_thread())
+            return original(*args, **kwargs)
+        setattr(disk, method, tracked)
+
+    await cache.aset("prompt", "cached response")
+    cache.memory.clear()
+    assert await cache.aget("prompt") == "cached response"
+    assert await cache.aget("prompt") == "cached response", "Disk hits are promoted into memory"
+    assert len(threads) == 2 and threading.main_thread() not in threads, "SQLite runs on worker threads"
+    disk.close()
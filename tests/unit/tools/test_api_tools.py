@@ -0,0 +1,251 @@
+# tests/unit/tools/test_api_tools.py
+import pytest
+import asyncio
+import aiohttp
+import traceback
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from datetime import timedelta
+from types import SimpleNamespace
+from google.maps import routing_v2
+from src.cache.disk_cache import SQLiteCache
+from src.cache.lru_cache import TTLCache
+from src.cache.tiered_cache import TieredCache
+from src.tools.google_maps_tool import GoogleMapsTool
+from unittest.mock import patch
+import numpy as np
+from src.tools.http_client import PooledHTTPClient
+from src.tools.openweathermap_tool import OpenWeatherMapTool
+
+WEATHER_PAYLOADS = {
+    "San Francisco, CA, US": {"weather": [{"description": "clear sky"}], "main": {"temp": 18.5, "humidity": 70}, "sys": {"country": "US"}},
+    "Los Angeles, CA, US": {"weather": [{"description": "sunny"}], "main": {"temp": 25.1, "humidity": 40}, "sys": {"country": "US"}},
+}
+
+# OpenWeatherMap city ids, used when the gazetteer resolves a city locally
+WEATHER_CITY_IDS = {"5391959": "San Francisco, CA, US", "5368361": "Los Angeles, CA, US"}
+
+@pytest.fixture
+async def weather_server():
+    """Local stand-in for the OpenWeatherMap current-weather endpoint."""
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(dict(request.query))
+        if "lat" in request.query:
+            return web.json_response({"name": "Kettleman City", **WEATHER_PAYLOADS["Los Angeles, CA, US"]})
+        city = request.query.get("q") or WEATHER_CITY_IDS.get(request.query.get("id"))
+        payload = WEATHER_PAYLOADS.get(city)
+        if payload is None:
+            return web.json_response({"cod": "404", "message": "city not found"}, status=404)
+        return web.json_response(payload)
+
+    async def group_handler(request):
+        requests_seen.append(dict(request.query))
+        items = []
+        for city_id in request.query["id"].split(","):
+            city = WEATHER_CITY_IDS.get(city_id)
+            if city in WEATHER_PAYLOADS:
+                items.append({"id": int(city_id), **WEATHER_PAYLOADS[city]})
+        return web.json_response({"cnt": len(items), "list": items})
+
+    app = web.Application()
+    app.router.add_get("/data/2.5/weather", handler)
+    app.router.add_get("/data/2.5/group", group_handler)
+    server = TestServer(app)
+    await server.start_server()
+    server.requests_seen = requests_seen
+    yield server
+    await server.close()
+
+@pytest.fixture
+async def weather_tool(weather_server):
+    http_client = PooledHTTPClient(pool_size=4, pool_size_per_host=4, timeout_seconds=5, keepalive_seconds=30)
+    tool = OpenWeatherMapTool(http_client=http_client)
+    tool.base_url = str(weather_server.make_url("/data/2.5/weather"))
+    tool.group_url = str(weather_server.make_url("/data/2.5/group"))
+    yield tool
+    await http_client.close()
+
+@pytest.mark.asyncio
+async def test_weather_tool_fetches_over_pooled_session(weather_tool, weather_server):
+    origin = await weather_tool.get_weather_forecast("San Francisco, CA, US")
+    destination = await weather_tool.get_weather_forecast("Los Angeles, CA, US")
+
+    assert origin == {"city": "San Francisco, CA, US", "temperature": 18.5, "weather": "clear sky", "humidity": 70, "country": "US"}
+    assert destination["weather"] == "sunny"
+    assert weather_server.requests_seen[0]["units"] == "metric"
+    assert weather_server.requests_seen[0]["id"] == "5391959", "Known cities should be fetched by id"
+    assert weather_tool.http_client.session() is weather_tool.http_client.session(), "Session should be reused"
+
+@pytest.mark.asyncio
+async def test_weather_tool_raises_on_unknown_city(weather_tool):
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        await weather_tool.get_weather_forecast("Atlantis, XX")
+    assert error.value.status == 404
+
+@pytest.mark.asyncio
+async def test_weather_tool_caches_by_normalized_city(weather_tool, weather_server):
+    first = await weather_tool.get_weather_forecast("San Francisco, CA, US")
+    second = await weather_tool.get_weather_forecast("  san francisco,CA,US ")
+
+    assert len(weather_server.requests_seen) == 1, "Spelling variants should share one cache entry"
+    assert second["temperature"] == first["temperature"]
+    assert second["city"] == "  san francisco,CA,US ", "The caller's city string is echoed back"
+    assert weather_tool.cache_stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_weather_tool_negatively_caches_unknown_city(weather_tool, weather_server):
+    errors = []
+    for _ in range(3):
+        with pytest.raises(aiohttp.ClientResponseError) as raised:
+            await weather_tool.get_weather_forecast("Atlantis, XX")
+        errors.append(raised.value)
+
+    assert len(weather_server.requests_seen) == 1, "Unknown city should only be looked up once"
+    assert weather_tool.cache_stats()["negative_hits"] == 2
+    assert all(error.status == 404 for error in errors)
+    assert errors[1] is not errors[2], "Each negative hit raises its own exception"
+    assert len(traceback.extract_tb(errors[2].__traceback__)) == len(traceback.extract_tb(errors[1].__traceback__))
+
+@pytest.mark.asyncio
+async def test_weather_many_batches_known_cities_and_keeps_order(weather_tool, weather_server):
+    cities = ["Los Angeles, CA, US", "Atlantis, XX", "San Francisco, CA, US", "los angeles,CA,US"]
+    results = await weather_tool.get_weather_many(cities)
+
+    assert [r["city"] if r else None for r in results] == ["Los Angeles, CA, US", None, "San Francisco, CA, US", "los angeles,CA,US"]
+    assert results[2]["weather"] == "clear sky"
+    assert len(weather_server.requests_seen) == 2, "One group request for known cities plus one single lookup"
+    assert sorted(weather_server.requests_seen[0]["id"].split(",")) == ["5368361", "5391959"]
+
+    await weather_tool.get_weather_many(cities)
+    assert len(weather_server.requests_seen) == 2, "Second batch should be served from cache"
+
+@pytest.mark.asyncio
+async def test_weather_by_coordinates_caches_per_cell(weather_tool, weather_server):
+    first = await weather_tool.get_weather_by_coordinates(36.0, -120.0)
+    second = await weather_tool.get_weather_by_coordinates(36.0, -120.0)
+
+    assert first == second == {"city": "Kettleman City", "temperature": 25.1, "weather": "sunny", "humidity": 40, "country": "US", "lat": 36.0, "lon": -120.0}
+    assert len(weather_server.requests_seen) == 1
+    assert weather_server.requests_seen[0]["lat"] == "36.0"
+
+class FakeRoutesClient:
+    """Stand-in for the Routes API async client, counting compute_routes calls."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def compute_routes(self, request, metadata, timeout=None):
+        self.requests.append(request)
+        leg = SimpleNamespace(distance_meters=616800, duration=timedelta(hours=5, minutes=52), polyline=SimpleNamespace(encoded_polyline="_p~iF~ps|U"))
+        route = SimpleNamespace(distance_meters=616800, duration=timedelta(hours=5, minutes=52), legs=[leg], polyline=SimpleNamespace(encoded_polyline="_p~iF~ps|U_ulLnnqC"))
+        return SimpleNamespace(routes=[route])
+
+    async def compute_route_matrix(self, request, metadata, timeout=None):
+        self.requests.append(request)
+
+        async def stream():
+            # Elements arrive out of order; Atlantis is unreachable from anywhere
+            for i, origin in reversed(list(enumerate(request.origins))):
+                for j, destination in enumerate(request.destinations):
+                    unreachable = "Atlantis" in origin.waypoint.address + destination.waypoint.address
+                    yield SimpleNamespace(
+                        origin_index=i, destination_index=j, status=None,
+                        condition=routing_v2.types.RouteMatrixElementCondition.ROUTE_NOT_FOUND if unreachable else routing_v2.types.RouteMatrixElementCondition.ROUTE_EXISTS,
+                        distance_meters=1000 * (i + j + 1), duration=timedelta(minutes=10 * (i + j + 1))
+                    )
+        return stream()
+
+@pytest.mark.asyncio
+async def test_directions_are_cached_across_spellings_and_restarts(tmp_path):
+    def make_tool(client):
+        cache = TieredCache(TTLCache(max_entries=8), SQLiteCache(str(tmp_path / "routes.sqlite3")))
+        tool = GoogleMapsTool(cache=cache)
+        tool.async_client = lambda: client
+        return tool
+
+    client = FakeRoutesClient()
+    tool = make_tool(client)
+    first = await tool.get_directions("San Francisco, CA, US", "Los Angeles, CA, US")
+    second = await tool.get_directions("san francisco,CA,US", " Los Angeles, CA, US")
+
+    assert len(client.requests) == 1, "Spelling variants should share one cache entry"
+    assert first == second
+    assert first["overall_duration_str"] == "21120s"
+    assert "raw_route_object" not in first
+
+    restarted = make_tool(client)
+    assert await restarted.get_directions("San Francisco, CA, US", "Los Angeles, CA, US") == first
+    assert len(client.requests) == 1, "The on-disk tier should survive a restart"
+
+    await restarted.get_directions("San Francisco, CA, US", "Los Angeles, CA, US", traffic_aware=True)
+    assert len(client.requests) == 2, "Traffic-aware requests bypass the cache"
+    assert client.requests[-1].routing_preference == routing_v2.types.RoutingPreference.TRAFFIC_AWARE
+
+@pytest.mark.asyncio
+async def test_routes_client_is_reused_per_loop_and_warm_up_is_best_effort():
+    tool = GoogleMapsTool(cache=None)
+    client = tool.async_client()
+    assert tool.async_client() is client, "One long-lived channel per event loop"
+
+    async def never_ready():
+        await asyncio.sleep(10)
+
+    client.transport.grpc_channel.channel_ready = never_ready
+    assert await tool.warm_up(timeout=0.01) is False, "Warm-up failures are logged, not raised"
+    await tool.close()
+
+@pytest.mark.asyncio
+async def test_route_matrix_chunks_requests_and_caches_pairs():
+    client = FakeRoutesClient()
+    tool = GoogleMapsTool(cache=TieredCache(TTLCache(max_entries=64)))
+    tool.gazetteer = None  # Send addresses so the fake can see place names
+    tool.async_client = lambda: client
+    places = ["Monterey, CA, US", "Atlantis, XX", "Fresno, CA, US"]
+
+    with patch("src.tools.google_maps_tool.Config.ROUTE_MATRIX_MAX_ELEMENTS", 4):
+        matrix = await tool.get_route_matrix(places, places)
+
+    assert matrix.durations_s.shape == (3, 3)
+    assert all(len(r.origins) * len(r.destinations) <= 4 for r in client.requests), "Requests respect the element limit"
+    assert np.isnan(matrix.durations_s[1]).all() and np.isnan(matrix.distances_m[:, 1]).all(), "Unreachable pairs are NaN"
+    assert not np.isnan(matrix.durations_s[[0, 2]][:, [0, 2]]).any()
+    requests_made = len(client.requests)
+
+    again = await tool.get_route_matrix(["monterey,CA,US", "Fresno, CA, US"], ["Fresno, CA, US"])
+    assert len(client.requests) == requests_made, "Every pair, including unreachable ones, is cached"
+    assert again.durations_s[0, 0] == matrix.durations_s[0, 2]
+
+@pytest.mark.asyncio
+async def test_route_matrix_sends_points_of_interest_as_addresses():
+    client = FakeRoutesClient()
+    tool = GoogleMapsTool(cache=TieredCache(TTLCache(max_entries=8)))
+    tool.async_client = lambda: client
+    await tool.get_route_matrix(["San Francisco, CA, US", "Sacramento"], ["Sacramento"], addresses=["Sacramento"])
+
+    request = client.requests[0]
+    assert request.origins[0].waypoint.location.lat_lng.latitude == 37.7749, "Known cities go by coordinates"
+    assert request.origins[1].waypoint.address == "Sacramento"
+    assert request.destinations[0].waypoint.address == "Sacramento"
+
+@pytest.mark.asyncio
+async def test_route_matrix_batches_disk_cache_access(tmp_path):
+    client = FakeRoutesClient()
+    disk = SQLiteCache(str(tmp_path / "routes.db"))
+    tool = GoogleMapsTool(cache=TieredCache(TTLCache(max_entries=64), disk))
+    tool.gazetteer = None
+    tool.async_client = lambda: client
+    places = ["Monterey, CA, US", "Fresno, CA, US", "Bakersfield, CA, US"]
+
+    with patch.object(disk, "set", side_effect=AssertionError("one write per pair")), \
+         patch.object(disk, "get_with_expiry", side_effect=AssertionError("one read per pair")):
+        matrix = await tool.get_route_matrix(places, places)
+        requests_made = len(client.requests)
+        tool.cache.memory.clear()
+        again = await tool.get_route_matrix(places, places)
+
+    assert len(client.requests) == requests_made, "The second matrix is served from the disk tier"
+    assert np.array_equal(again.durations_s, matrix.durations_s)
+    assert len(disk) == 9
+    disk.close()
@@ -0,0 +1,92 @@
+# tests/unit/tools/test_circuit_breaker.py
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock
+from config import Config
+from src.cache.lru_cache import TTLCache
+from src.tools.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from src.tools.openweathermap_tool import OpenWeatherMapTool
+
+SF_WEATHER = {"city": "San Francisco", "temperature": 18, "weather": "fog", "humidity": 80, "country": "US"}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+async def failing():
+    raise ConnectionError("upstream down")
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_probes_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker("weather", failure_threshold=2, slow_call_seconds=1.0, reset_seconds=30, clock=clock)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await breaker.call(failing)
+    assert breaker.state == OPEN
+
+    fetch = AsyncMock(return_value="fresh")
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(fetch)
+    fetch.assert_not_awaited()
+
+    clock.now = 31
+    assert breaker.state == HALF_OPEN
+    assert await breaker.call(fetch) == "fresh"
+    assert breaker.state == CLOSED
+
+    async def slow():
+        clock.now += 5  # Over the 1s SLO
+        return "late"
+
+    assert await breaker.call(slow) == "late"
+    assert await breaker.call(slow) == "late"
+    assert breaker.state == OPEN, "Latency SLO violations count as failures"
+
+def make_tool(breaker: CircuitBreaker) -> OpenWeatherMapTool:
+    return OpenWeatherMapTool(cache=TTLCache(max_entries=8, default_ttl=60), gazetteer=None, breaker=breaker)
+
+@pytest.mark.asyncio
+async def test_slow_weather_serves_stale_and_revalidates(monkeypatch):
+    monkeypatch.setattr(Config, "WEATHER_LATENCY_SLO_SECONDS", 0.05)
+    tool = make_tool(CircuitBreaker("weather", failure_threshold=5))
+    tool._fetch = AsyncMock(return_value=SF_WEATHER)
+    assert await tool.get_weather_forecast("San Francisco") == SF_WEATHER
+    tool.cache.clear()
+
+    refreshed = {**SF_WEATHER, "temperature": 21}
+
+    async def slow_fetch(label, params):
+        await asyncio.sleep(0.3)
+        return refreshed
+
+    tool._fetch = slow_fetch
+    started = time.perf_counter()
+    weather = await tool.get_weather_forecast("San Francisco")
+    assert time.perf_counter() - started < 0.25, "Bounded by the SLO, not the upstream call"
+    assert weather["stale"] is True and weather["temperature"] == 18
+
+    await asyncio.sleep(0.35)
+    assert await tool.get_weather_forecast("San Francisco") == refreshed, "Background revalidation updated the cache"
+
+@pytest.mark.asyncio
+async def test_open_weather_breaker_serves_stale_or_fails_fast():
+    breaker = CircuitBreaker("weather", failure_threshold=1, reset_seconds=60)
+    tool = make_tool(breaker)
+    tool._fetch = AsyncMock(return_value=SF_WEATHER)
+    await tool.get_weather_forecast("San Francisco")
+    tool.cache.clear()
+
+    tool._fetch = AsyncMock(side_effect=ConnectionError("upstream down"))
+    stale = await tool.get_weather_forecast("San Francisco")
+    assert stale["stale"] is True and breaker.state == OPEN
+
+    weather = await tool.get_weather_forecast("San Francisco")
+    assert weather["stale"] is True
+    assert tool._fetch.await_count == 1, "No upstream call while the breaker is open"
+    with pytest.raises(CircuitOpenError):
+        await tool.get_weather_forecast("Los Angeles")
@@ -0,0 +1,55 @@
+# tests/unit/tools/test_gazetteer.py
+from src.tools.gazetteer import Gazetteer, get_gazetteer
+from src.tools.google_maps_tool import GoogleMapsTool
+from src.tools.openweathermap_tool import OpenWeatherMapTool
+
+def test_gazetteer_resolves_spelling_variants():
+    gazetteer = get_gazetteer()
+    expected = gazetteer.resolve("San Francisco, CA, US")
+
+    assert expected.owm_id == 5391959
+    assert expected.canonical_name == "San Francisco, CA, US"
+    assert round(expected.lat, 2) == 37.77
+    assert gazetteer.resolve("san francisco,ca,us") == expected
+    assert gazetteer.resolve("Sna Francisco, CA") == expected, "Small typos should resolve via trigrams"
+    assert gazetteer.resolve("Atlantis, XX") is None
+    assert gazetteer.resolve("1600 Amphitheatre Pkwy, Mountain View, CA") is None
+
+def test_gazetteer_qualifiers_and_prefix():
+    gazetteer = Gazetteer([
+        (1, "Portland", "OR", "US", 45.52, -122.68),
+        (2, "Portland", "ME", "US", 43.66, -70.26),
+        (3, "Porto", "", "PT", 41.15, -8.61),
+    ])
+    assert gazetteer.resolve("Portland, ME").owm_id == 2
+    assert gazetteer.resolve("Portland") is None, "Ambiguous names should not be guessed"
+    assert [entry.owm_id for entry in gazetteer.prefix("port")] == [1, 2, 3]
+
+def test_weather_tool_uses_city_id_cache_key():
+    tool = OpenWeatherMapTool()
+    sf = tool.resolve_city("San Francisco,CA,US")
+    assert tool.cache_key("San Francisco,CA,US", sf) == "id:5391959"
+    assert tool.cache_key("Atlantis", tool.resolve_city("Atlantis")) == "atlantis"
+
+def test_gazetteer_does_not_map_other_places_onto_cities():
+    gazetteer = get_gazetteer()
+    for place in [
+        "South San Francisco, CA, US", "Oakland Zoo, CA", "San Diego Zoo, CA", "San Francisco Airport, CA",
+        "Sacramento Zoo", "Santa Barbara Mission", "Washington, US"
+    ]:
+        assert gazetteer.resolve(place) is None, f"'{place}' is not a gazetteer city"
+    assert gazetteer.resolve("Washington, DC, US").owm_id == 4140963
+    assert gazetteer.resolve("Los Angles, CA, US").canonical_name == "Los Angeles, CA, US"
+    assert gazetteer.resolve("Sna Francisco, CA", fuzzy=False) is None
+
+def test_maps_tool_sends_unknown_places_as_addresses():
+    tool = GoogleMapsTool(cache=None)
+    assert tool._waypoint("Sacramento Zoo").address == "Sacramento Zoo"
+    assert tool._waypoint("Sacramento, CA, US").location.lat_lng.latitude == 38.5816
+
+def test_route_cache_key_uses_exact_gazetteer_hits_only():
+    tool = GoogleMapsTool(cache=None)
+    destination = "Los Angeles, CA, US"
+    assert tool.cache_key("San Francisco, CA, US", destination) == tool.cache_key("san francisco,ca,us", destination)
+    assert tool.cache_key("South San Francisco, CA, US", destination) != tool.cache_key("San Francisco, CA, US", destination)
+    assert tool.cache_key("Sna Francisco, CA", destination) != tool.cache_key("San Francisco, CA, US", destination)
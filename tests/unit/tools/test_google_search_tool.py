@@ -0,0 +1,123 @@
+# tests/unit/tools/test_google_search_tool.py
+import asyncio
+import json
+import os
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.tools.geohash import geohash_bounds, geohash_encode
+from src.tools.google_search_tool import GoogleSearchTool, POIIndex
+from src.tools.http_client import PooledHTTPClient
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "mock_data", "pois_sf_la.json")
+
+# US-101 from San Francisco to Los Angeles, as simplified route waypoints
+SF_LA_WAYPOINTS = [
+    [37.77, -122.42], [37.34, -121.89], [36.68, -121.66], [35.63, -120.69], [35.28, -120.66],
+    [34.95, -120.44], [34.42, -119.70], [34.28, -119.29], [34.05, -118.24]
+]
+
+EXPECTED_CORRIDOR_POIS = [
+    "Golden Gate Park", "Mission San Juan Bautista", "Mission San Miguel Arcángel", "Madonna Inn",
+    "Pismo Beach Pier", "Solvang Danish Village", "Old Mission Santa Barbara", "Griffith Observatory"
+]
+
+def test_geohash_round_trip():
+    cell = geohash_encode(57.64911, 10.40744, 11)
+    assert cell == "u4pruydqqvj"
+    lat_min, lat_max, lon_min, lon_max = geohash_bounds(cell)
+    assert lat_min <= 57.64911 <= lat_max and lon_min <= 10.40744 <= lon_max
+
+@pytest.mark.asyncio
+async def test_corridor_search_from_offline_fixture():
+    tool = GoogleSearchTool(index=POIIndex.load(FIXTURE_PATH, precision=3), offline=True)
+    pois = await tool.search_corridor(SF_LA_WAYPOINTS)
+
+    assert [poi["name"] for poi in pois] == EXPECTED_CORRIDOR_POIS, "Best rated within the corridor, in route order"
+    assert all(poi["detour_km"] <= 25 for poi in pois)
+    assert tool.network_calls == 0
+
+@pytest.fixture
+async def places_server():
+    """Local stand-in for Places Text Search, answering from the fixture within the requested rectangle."""
+    with open(FIXTURE_PATH, encoding="utf-8") as handle:
+        fixture = json.load(handle)["pois"]
+    requests_seen = []
+
+    async def handler(request):
+        body = await request.json()
+        requests_seen.append(body)
+        rectangle = body["locationRestriction"]["rectangle"]
+        places = [
+            {
+                "id": poi["id"],
+                "displayName": {"text": poi["name"]},
+                "formattedAddress": poi["address"],
+                "location": {"latitude": poi["lat"], "longitude": poi["lon"]},
+                "rating": poi["rating"],
+                "types": poi["types"],
+                "regularOpeningHours": {"weekdayDescriptions": ["Monday: Closed"] + [
+                    f"{day}: {poi['opening_hours']}" for day in ("Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+                ]} if poi["opening_hours"] else None
+            }
+            for poi in fixture
+            if rectangle["low"]["latitude"] <= poi["lat"] < rectangle["high"]["latitude"]
+            and rectangle["low"]["longitude"] <= poi["lon"] < rectangle["high"]["longitude"]
+        ]
+        return web.json_response({"places": places})
+
+    app = web.Application()
+    app.router.add_post("/v1/places:searchText", handler)
+    server = TestServer(app)
+    await server.start_server()
+    server.requests_seen = requests_seen
+    yield server
+    await server.close()
+
+@pytest.mark.asyncio
+async def test_corridor_search_fills_and_persists_index(places_server, tmp_path):
+    http_client = PooledHTTPClient(pool_size=4, pool_size_per_host=4, timeout_seconds=5, keepalive_seconds=30)
+    index_path = str(tmp_path / "poi_index.json")
+
+    def make_tool():
+        tool = GoogleSearchTool(index=POIIndex.load(index_path, precision=3), http_client=http_client)
+        tool.search_url = str(places_server.make_url("/v1/places:searchText"))
+        return tool
+
+    first = make_tool()
+    pois = await first.search_corridor(SF_LA_WAYPOINTS, weekday=2)
+    assert [poi["name"] for poi in pois] == EXPECTED_CORRIDOR_POIS
+    assert first.network_calls == len(places_server.requests_seen) > 0
+    assert pois[0]["opening_hours"] == "5:00 AM – 12:00 AM", "Hours are for the requested weekday"
+
+    restarted = make_tool()
+    assert await restarted.search_corridor(SF_LA_WAYPOINTS, weekday=2) == pois
+    assert restarted.network_calls == 0, "A repeated corridor is answered from the persisted index"
+    monday = await restarted.search_corridor(SF_LA_WAYPOINTS, weekday=0)
+    assert monday[0]["opening_hours"] == "Closed"
+    await http_client.close()
+
+@pytest.mark.asyncio
+async def test_corridor_search_stops_waiting_on_a_slow_index_miss(places_server, tmp_path):
+    http_client = PooledHTTPClient(pool_size=4, pool_size_per_host=4, timeout_seconds=5, keepalive_seconds=30)
+    tool = GoogleSearchTool(index=POIIndex(precision=3, path=str(tmp_path / "poi_index.json")), http_client=http_client)
+    tool.search_url = str(places_server.make_url("/v1/places:searchText"))
+
+    assert await tool.search_corridor(SF_LA_WAYPOINTS, wait_seconds=0) == [], "Nothing indexed yet"
+    await asyncio.gather(*tool._background)
+    pois = await tool.search_corridor(SF_LA_WAYPOINTS, wait_seconds=0)
+    assert [poi["name"] for poi in pois] == EXPECTED_CORRIDOR_POIS, "The abandoned search still filled the index"
+    await http_client.close()
+    await http_client.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_corridors_share_cell_searches(places_server, tmp_path):
+    http_client = PooledHTTPClient(pool_size=4, pool_size_per_host=4, timeout_seconds=5, keepalive_seconds=30)
+    tool = GoogleSearchTool(index=POIIndex(precision=3, path=str(tmp_path / "poi_index.json")), http_client=http_client)
+    tool.search_url = str(places_server.make_url("/v1/places:searchText"))
+
+    results = await asyncio.gather(*(tool.search_corridor(SF_LA_WAYPOINTS) for _ in range(3)))
+    assert all([poi["name"] for poi in pois] == EXPECTED_CORRIDOR_POIS for pois in results)
+    searched = [json.dumps(body["locationRestriction"], sort_keys=True) for body in places_server.requests_seen]
+    assert len(searched) == len(set(searched)), "Each cold cell is searched once"
+    await http_client.close()
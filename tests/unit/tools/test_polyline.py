@@ -0,0 +1,55 @@
+# tests/unit/tools/test_polyline.py
+import numpy as np
+import pytest
+from src.tools.polyline import cumulative_distances, decode_polyline, encode_polyline, sample_by_distance, simplify, snap_to_grid
+
+GOOGLE_SAMPLE_POLYLINE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+def test_decode_polyline_returns_coordinate_array():
+    points = decode_polyline(GOOGLE_SAMPLE_POLYLINE)
+
+    assert points.shape == (3, 2)
+    np.testing.assert_allclose(points, [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]])
+    assert decode_polyline("").shape == (0, 2)
+    with pytest.raises(ValueError):
+        decode_polyline(GOOGLE_SAMPLE_POLYLINE[:-1])
+
+def test_sample_by_distance_spaces_points_along_the_line():
+    # Due north along a meridian: one degree of latitude is about 111.2 km
+    line = np.array([[0.0, 10.0], [1.0, 10.0], [3.0, 10.0]])
+    distances = cumulative_distances(line)
+    assert distances[-1] == pytest.approx(333.6, abs=0.5)
+
+    samples = sample_by_distance(line, 100)
+    assert len(samples) == 5, "Samples at 0, 100, 200 and 300 km plus the end point"
+    np.testing.assert_allclose(samples[[0, -1]], line[[0, -1]])
+    np.testing.assert_allclose(np.diff(cumulative_distances(samples))[:3], 100, rtol=1e-6)
+    assert len(sample_by_distance(line, 1, max_samples=6)) == 6
+
+def test_snap_to_grid_merges_nearby_points_in_route_order():
+    points = np.array([[37.77, -122.41], [37.80, -122.45], [36.10, -121.20], [37.76, -122.40]])
+    cells = snap_to_grid(points, 0.25)
+
+    assert cells.tolist() == [[37.75, -122.5], [36.0, -121.25]], "Later samples in a seen cell are dropped"
+
+def test_encode_polyline_round_trips():
+    assert encode_polyline([[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]) == GOOGLE_SAMPLE_POLYLINE
+
+    rng = np.random.default_rng(7)
+    points = np.round(np.cumsum(rng.normal(0, 0.01, (2000, 2)), axis=0) + [37.77, -122.42], 5)
+    np.testing.assert_allclose(decode_polyline(encode_polyline(points)), points, atol=1e-9)
+    assert encode_polyline([]) == ""
+
+@pytest.mark.parametrize("method", ["douglas_peucker", "visvalingam"])
+def test_simplify_keeps_ends_and_corners(method):
+    # An L-shaped route densely sampled along both arms
+    north = np.column_stack((np.linspace(37.0, 38.0, 500), np.full(500, -122.0)))
+    east = np.column_stack((np.full(500, 38.0), np.linspace(-122.0, -121.0, 500)))[1:]
+    route = np.vstack((north, east))
+    simplified = simplify(route, 3, method=method)
+
+    np.testing.assert_allclose(simplified, [[37.0, -122.0], [38.0, -122.0], [38.0, -121.0]])
+    assert len(simplify(route, 50, method=method)) <= 50
+    assert len(simplify(route[:10], 50, method=method)) == 10, "Short lines are returned unchanged"
+    with pytest.raises(ValueError):
+        simplify(route, 10, method="radial")
\ No newline at end of file
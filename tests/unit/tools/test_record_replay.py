@@ -0,0 +1,112 @@
+# tests/unit/tools/test_record_replay.py
+import aiohttp
+import asyncio
+import gzip
+import time
+import pytest
+from multidict import CIMultiDict, CIMultiDictProxy
+from unittest.mock import AsyncMock, MagicMock
+from yarl import URL
+from src.llm_integration.llm_client import LLMClient
+from src.tools.openweathermap_tool import OpenWeatherMapTool
+from src.tools.record_replay import Cassette, ReplayMiss
+
+PROMPT = "Plan a trip from San Francisco to Los Angeles"
+
+def make_llm_client(text: str) -> LLMClient:
+    client = LLMClient()
+    client.cache = None
+    generation = MagicMock()
+    generation.message.content = text
+    response = MagicMock()
+    response.generations = [[generation]]
+
+    async def slow_generate(messages):
+        await asyncio.sleep(0.05)
+        return response
+
+    client.llm = MagicMock()
+    client.llm.agenerate = slow_generate
+    return client
+
+def make_weather_tool(fetch: AsyncMock) -> OpenWeatherMapTool:
+    tool = OpenWeatherMapTool(gazetteer=None)
+    tool._fetch = fetch
+    return tool
+
+@pytest.mark.asyncio
+async def test_recorded_session_replays_offline_with_latency(tmp_path):
+    path = str(tmp_path / "session.jsonl.gz")
+    weather = {"city": "San Francisco", "temperature": 18, "weather": "fog", "humidity": 80, "country": "US"}
+    request_info = aiohttp.RequestInfo(URL("https://api.openweathermap.org/data/2.5/weather"), "GET", CIMultiDictProxy(CIMultiDict()))
+    not_found = aiohttp.ClientResponseError(request_info, (), status=404, message="Not Found")
+    recorder = Cassette(path, mode="record")
+    with recorder.activate():
+        client = make_llm_client("Drive down Highway 1")
+        tool = make_weather_tool(AsyncMock(side_effect=[weather, ValueError("city not found"), not_found]))
+        assert await client.generate(PROMPT) == "Drive down Highway 1"
+        assert await tool.get_weather_forecast("San Francisco") == weather
+        with pytest.raises(ValueError):
+            await tool.get_weather_forecast("Atlantis")
+        with pytest.raises(aiohttp.ClientResponseError):
+            await tool.get_weather_forecast("Lemuria")
+    assert recorder.stats()["recorded"] == 4
+    with gzip.open(path, "rt") as handle:
+        assert len(handle.readlines()) == 4
+
+    # Replay with the real dependencies unreachable
+    player = Cassette(path, mode="replay")
+    with player.activate():
+        client = make_llm_client("unused")
+        client.llm.agenerate = AsyncMock(side_effect=AssertionError("network call during replay"))
+        tool = make_weather_tool(AsyncMock(side_effect=AssertionError("network call during replay")))
+        started = time.perf_counter()
+        assert await client.generate(PROMPT) == "Drive down Highway 1"
+        assert time.perf_counter() - started >= 0.04, "Recorded latency should be simulated"
+        assert await tool.get_weather_forecast("San Francisco") == weather
+        with pytest.raises(ValueError, match="city not found"):
+            await tool.get_weather_forecast("Atlantis")
+        with pytest.raises(aiohttp.ClientResponseError) as replayed_not_found:
+            await tool.get_weather_forecast("Lemuria")
+        assert replayed_not_found.value.status == 404, "Recorded errors are replayed with their original type"
+        with pytest.raises(ReplayMiss):
+            await client.generate("A prompt that was never recorded")
+    assert player.replayed == 4
+    assert OpenWeatherMapTool.get_weather_forecast.__name__ == "get_weather_forecast", "Originals restored on exit"
+
+@pytest.mark.asyncio
+async def test_stream_replays_chunks_in_order(tmp_path):
+    path = str(tmp_path / "stream.jsonl.gz")
+    client = make_llm_client("unused")
+
+    async def fake_astream(messages):
+        for text in ("# Itinerary", "\nDay 1", "\nDay 2"):
+            yield MagicMock(content=text)
+
+    client.llm.astream = fake_astream
+    with Cassette(path, mode="record").activate():
+        recorded = [chunk async for chunk in client.stream(PROMPT)]
+
+    client.llm.astream = MagicMock(side_effect=AssertionError("network call during replay"))
+    with Cassette(path, mode="replay", simulate_latency=False).activate():
+        replayed = [chunk async for chunk in client.stream(PROMPT)]
+    assert replayed == recorded == ["# Itinerary", "\nDay 1", "\nDay 2"]
+
+@pytest.mark.asyncio
+async def test_weather_group_replays_offline(tmp_path):
+    path = str(tmp_path / "group.jsonl.gz")
+    cities = ["San Francisco, CA, US", "Los Angeles, CA, US"]
+    group = {"list": [
+        {"id": 5391959, "weather": [{"description": "fog"}], "main": {"temp": 18, "humidity": 80}, "sys": {"country": "US"}},
+        {"id": 5368361, "weather": [{"description": "sunny"}], "main": {"temp": 25, "humidity": 40}, "sys": {"country": "US"}},
+    ]}
+    tool = OpenWeatherMapTool(breaker=MagicMock(call=AsyncMock(return_value=group)))
+    with Cassette(path, mode="record").activate():
+        recorded = await tool.get_weather_many(cities)
+
+    tool = OpenWeatherMapTool(breaker=MagicMock(call=AsyncMock(side_effect=AssertionError("network call during replay"))))
+    player = Cassette(path, mode="replay", simulate_latency=False)
+    with player.activate():
+        replayed = await tool.get_weather_many(cities)
+    assert replayed == recorded and [weather["weather"] for weather in replayed] == ["fog", "sunny"]
+    assert player.replayed == 1, "Both cities came from one recorded group request"
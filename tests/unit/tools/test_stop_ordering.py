@@ -0,0 +1,56 @@
+# tests/unit/tools/test_stop_ordering.py
+import itertools
+import numpy as np
+from src.tools.stop_ordering import order_stops, parse_opening_hours, parse_time_of_day
+
+def euclidean_matrix(points):
+    points = np.asarray(points, dtype=float)
+    return np.linalg.norm(points[:, None] - points[None, :], axis=-1) * 60
+
+def brute_force(durations):
+    n = len(durations)
+    best = None
+    for middle in itertools.permutations(range(1, n - 1)):
+        order = (0,) + middle + (n - 1,)
+        total = sum(durations[a, b] for a, b in zip(order, order[1:]))
+        best = total if best is None else min(best, total)
+    return best
+
+def test_order_stops_matches_brute_force_on_small_instances():
+    rng = np.random.default_rng(3)
+    for _ in range(5):
+        durations = euclidean_matrix(rng.uniform(0, 100, (8, 2)))
+        result = order_stops(durations, time_budget_s=1.0)
+
+        assert result.order[0] == 0 and result.order[-1] == 7
+        assert sorted(result.order) == list(range(8))
+        assert result.duration_s <= brute_force(durations) * 1.02, "Should be within 2% of optimal"
+
+def test_order_stops_avoids_zig_zag_and_unreachable_pairs():
+    # Stops listed out of order along a straight road from 0 to 10
+    positions = [[0, 0], [7, 0], [2, 0], [9, 0], [4, 0], [10, 0]]
+    durations = euclidean_matrix(positions)
+    assert order_stops(durations).order == [0, 2, 4, 1, 3, 5]
+
+    durations[2, 4] = durations[4, 2] = np.nan
+    order = order_stops(durations).order
+    assert {2, 4} not in [set(pair) for pair in zip(order, order[1:])], "Pairs without a route are avoided"
+
+def test_order_stops_respects_time_windows():
+    durations = euclidean_matrix([[0, 0], [1, 0], [2, 0], [3, 0]])
+    # Stop 1 only opens late, so it is cheaper to visit stop 2 first and come back
+    windows = [None, (600, 3600), (0, 300), None]
+    result = order_stops(durations, windows_s=windows, time_budget_s=1.0)
+
+    assert result.order == [0, 2, 1, 3]
+    assert result.lateness_s == 0
+
+def test_parse_opening_hours_and_times():
+    assert parse_opening_hours("Open 9 AM - 5 PM daily") == (540, 1020)
+    assert parse_opening_hours("10:30-18:00") == (630, 1080)
+    assert parse_opening_hours("22:00 to 2:00") == (1320, 1560), "Closing after midnight"
+    assert parse_opening_hours("Always open") is None
+    assert parse_opening_hours("9-5") == (540, 1020), "A bare closing hour before noon is pm"
+    assert parse_opening_hours("10 - 2") == (600, 840)
+    assert parse_time_of_day("9am") == 540
+    assert parse_time_of_day("noonish") is None